@@ -0,0 +1,4 @@
+from benchmark.synthetic_data import scales, generate_subjects, generate_operations, generate_anomalies, \
+    generate_reference_data
+from benchmark.database import create_engines, load_synthetic_data, SyntheticExtractData
+from benchmark.run_benchmark import Benchmark, save_results, compare_results
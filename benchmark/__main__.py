@@ -0,0 +1,2 @@
+from benchmark.run_benchmark import main
+main()
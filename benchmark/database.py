@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: local sqlite stand-in of dwa, evaluation and kassandra databases for the benchmark
+@TODO:
+"""
+
+import os
+import sqlalchemy
+from sqlalchemy import text
+from kassandra.extraction import ExtractData
+from benchmark.synthetic_data import generate_subjects, generate_operations, generate_anomalies
+
+database_names = ['dwa', 'evaluation', 'kassandra']
+operations_table, operations_subjects_table, subjects_table, anomalies_table = \
+    'OPERATIONS', 'OPERATIONS_SUBJECTS', 'SUBJECTS', 'ANOMALIES'
+intermediary_column = 'INTERMEDIARY_CODE'
+
+# queries of the extraction on the sqlite tables (same placeholders of the queries of the extraction package)
+queries = {'ndg.sql': f"SELECT DISTINCT S.NDG FROM {operations_subjects_table} S "
+                      f"JOIN {operations_table} O ON O.CODE_OPERATION = S.CODE_OPERATION "
+                      f"WHERE O.{intermediary_column} = '%s' AND O.DATE_OPERATION BETWEEN %s'%s' AND %s'%s 23:59:59'",
+           'operations.sql': f"SELECT DISTINCT O.ACCOUNT, O.SIGN, O.AMOUNT, O.DATE_OPERATION, O.CODE_OPERATION, "
+                             f"O.CAUSAL, O.COUNTERPART_COUNTRY FROM {operations_table} O "
+                             f"JOIN {operations_subjects_table} S ON O.CODE_OPERATION = S.CODE_OPERATION "
+                             f"WHERE O.{intermediary_column} = '%s' AND S.NDG IN %s",
+           'operations_subject.sql': f"SELECT CODE_OPERATION, NDG, SUBJECT_TYPE FROM {operations_subjects_table} "
+                                     f"WHERE {intermediary_column} = '%s' AND NDG IN %s",
+           'subjects.sql': f"SELECT NDG, BIRTH_DAY, LEGAL_SPECIE, GROSS_INCOME, RESIDENCE_PROVINCE, RESIDENCE_CITY, "
+                           f"RESIDENCE_COUNTRY, SAE, ATECO, RISK_PROFILE, NCHECKREQUIRED, NCHECKDEBITED, "
+                           f"NCHECKAVAILABLE FROM {subjects_table} WHERE {intermediary_column} = '%s' AND NDG IN %s",
+           'anomalies_other_systems.sql': f"SELECT SOFTWARE, DATA, STATO, NDG, XML FROM {anomalies_table} "
+                                          f"WHERE {intermediary_column} = '%s' AND SOFTWARE IN %s"}
+
+indexes = {operations_table: ['CODE_OPERATION', 'DATE_OPERATION'], operations_subjects_table: ['NDG', 'CODE_OPERATION'],
+           subjects_table: ['NDG'], anomalies_table: ['NDG']}
+
+
+class SyntheticExtractData(ExtractData):
+    """
+        extraction of the synthetic data (queries on the sqlite tables of the benchmark)
+    """
+
+    @staticmethod
+    def _private_read_query(query_path: str) -> str:
+        """
+            :param query_path: path of the query of the extraction package
+            :return: query on the sqlite tables with the same name
+        """
+
+        return queries[os.path.basename(query_path)]
+
+
+def create_engines(directory: str) -> dict:
+    """
+        create a sqlite database for dwa, evaluation and kassandra
+        :param directory: directory of the databases
+        :return: dict with the engines (dwa, evaluation, kassandra)
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    return {name: sqlalchemy.create_engine(f'sqlite:///{os.path.join(directory, name)}.db') for name in database_names}
+
+
+def _create_indexes(engine: sqlalchemy.engine.Engine, table: str) -> None:
+    """
+        :param engine: engine of the database
+        :param table: table to index
+    """
+
+    with engine.begin() as connection:
+        for column in indexes[table]:
+            connection.execute(text(f'CREATE INDEX IF NOT EXISTS IX_{table}_{column} ON {table} ({column})'))
+
+
+def load_synthetic_data(engines: dict, n_subjects: int, n_operations: int, intermediary_code: str, ref_month: str,
+                        months: int = 12, anomalies_ratio: float = 0.05, chunk_size: int = 1_000_000,
+                        random_state: int = 0) -> dict:
+    """
+        generate the synthetic data and load it in the databases (the operations are loaded chunk by chunk)
+        :param engines: dict with the engines (dwa, evaluation, kassandra)
+        :param n_subjects: number of subjects
+        :param n_operations: number of operations
+        :param intermediary_code: intermediary code of the data
+        :param ref_month: reference month (e.g. 062023)
+        :param months: number of months of the operations
+        :param anomalies_ratio: ratio of the subjects with an anomaly
+        :param chunk_size: number of operations generated and loaded at a time
+        :param random_state: seed of the generator
+        :return: number of rows loaded for each table
+    """
+
+    rows = {}
+    subjects = generate_subjects(n_subjects, random_state)
+    subjects.insert(0, intermediary_column, intermediary_code)
+    subjects.to_sql(subjects_table, engines['dwa'], if_exists='replace', index=False, chunksize=100_000)
+    rows[subjects_table] = subjects.shape[0]
+
+    if_exists = 'replace'
+    rows[operations_table], rows[operations_subjects_table] = 0, 0
+    for operations, operations_subjects in generate_operations(n_subjects, n_operations, ref_month, months,
+                                                               chunk_size, random_state):
+        operations.insert(0, intermediary_column, intermediary_code)
+        operations_subjects.insert(0, intermediary_column, intermediary_code)
+        operations.to_sql(operations_table, engines['dwa'], if_exists=if_exists, index=False, chunksize=100_000)
+        operations_subjects.to_sql(operations_subjects_table, engines['dwa'], if_exists=if_exists, index=False,
+                                   chunksize=100_000)
+        rows[operations_table] += operations.shape[0]
+        rows[operations_subjects_table] += operations_subjects.shape[0]
+        if_exists = 'append'
+
+    anomalies = generate_anomalies(n_subjects, ref_month, anomalies_ratio, random_state=random_state)
+    anomalies.insert(0, intermediary_column, intermediary_code)
+    anomalies.to_sql(anomalies_table, engines['evaluation'], if_exists='replace', index=False, chunksize=100_000)
+    rows[anomalies_table] = anomalies.shape[0]
+
+    for table in [subjects_table, operations_table, operations_subjects_table]:
+        _create_indexes(engines['dwa'], table)
+    _create_indexes(engines['evaluation'], anomalies_table)
+    return rows
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: end-to-end benchmark of the pipeline on synthetic data (a json record for each run and a csv of all the
+            runs to compare the stages across commits)
+@TODO:
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+import logging as log
+from datetime import datetime
+from kassandra.profiling import StageProfiler
+from kassandra.config_module import app_config as apc
+from kassandra.config_module import feature_creation_config as fcc
+from kassandra.registry_management import Registry, RegistryLastPrediction
+from unittest.mock import patch
+from benchmark.synthetic_data import scales, generate_reference_data
+from benchmark.database import create_engines, load_synthetic_data, SyntheticExtractData
+
+benchmark_stages = ['generate_load', 'registry_load_many', 'extraction', 'target', 'features', 'last_prediction_load',
+                    'last_prediction_read', 'subject_management']
+results_directory = os.path.join(os.path.dirname(__file__), 'results')
+results_file = 'benchmark_results.csv'
+results_columns = ['COMMIT', 'DATE', 'SCALE', 'SUBJECTS', 'OPERATIONS', 'STAGE', 'SECONDS', 'CPU_SECONDS',
+                   'PEAK_RSS_DELTA_MB', 'ROWS', 'ROWS_PER_SECOND', 'ERROR']
+
+system_id, control_code, intermediary_code, model_name_date = 'KASSANDRA', 'KAS-00', '123456', '20230701'
+
+
+def get_commit() -> str:
+    """
+        :return: commit of the repository (None if git is not available)
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+class Benchmark:
+    def __init__(self, n_subjects: int, n_operations: int, directory: str, ref_month: str = '062023',
+                 scale: str = None, stages: list = None, max_workers: int = 1, ndg_filter: str = 'bind',
+                 chunk_size: int = 1000, random_state: int = 0):
+        """
+            :param n_subjects: number of subjects
+            :param n_operations: number of operations
+            :param directory: directory of the sqlite databases
+            :param ref_month: reference month (e.g. 062023)
+            :param scale: name of the scale (e.g. small), only saved in the results
+            :param stages: stages to run (default: all the stages, the stages depending on a failed stage are skipped)
+            :param max_workers: number of parallel connections of the extraction
+            :param ndg_filter: strategy to filter the ndg in the extraction queries (chunk, bind or temp_table)
+            :param chunk_size: number of ndg of each extraction query
+            :param random_state: seed of the synthetic data
+        """
+
+        self.n_subjects = int(n_subjects)
+        self.n_operations = int(n_operations)
+        self.ref_month = ref_month
+        self.scale = scale
+        self.stages = stages if stages is not None else list(benchmark_stages)
+        self.max_workers = max_workers
+        self.ndg_filter = ndg_filter
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+
+        self.directory = directory
+        self.engines = create_engines(directory)
+        self.profiler = StageProfiler('benchmark', scale=scale, subjects=self.n_subjects,
+                                      operations=self.n_operations)
+        self._private_data = {}
+
+    def _private_stage(self, name: str, function: callable, requires: list = None) -> None:
+        """
+            run and record a stage (errors are recorded and do not stop the benchmark)
+            :param name: name of the stage
+            :param function: function of the stage, it returns the number of rows processed
+            :param requires: data produced by the previous stages and needed by this stage
+        """
+
+        if name not in self.stages: return
+        missing = [key for key in (requires or []) if key not in self._private_data]
+        if len(missing) > 0:
+            log.warning(f'>> Stage {name} skipped, missing {missing}')
+            with self.profiler.stage(name) as stage:
+                stage['error'] = f'skipped, missing {missing}'
+            return
+
+        with self.profiler.stage(name) as stage:
+            try:
+                stage['rows'] = function()
+            except Exception as e:
+                log.warning(f'>> Stage {name} failed: {e}', exc_info=True)
+                stage['error'] = str(e)
+        log.info(f'>> Stage {name} completed in {stage.get("seconds", 0):.3f} s')
+
+    def _private_generate_load(self) -> int:
+        rows = load_synthetic_data(self.engines, self.n_subjects, self.n_operations, intermediary_code,
+                                   self.ref_month, random_state=self.random_state)
+        return sum(rows.values())
+
+    def _private_registry_load_many(self) -> int:
+        registry = Registry(engine=self.engines['kassandra'])
+        if registry.get_table() is None:
+            registry.create_registry_table_index()
+
+        # the subjects reported in the last months
+        random = np.random.default_rng(self.random_state)
+        size = max(1, self.n_subjects // 100)
+        ndgs = random.choice(self.n_subjects, size, replace=False) + 100_000_001
+        records = pd.DataFrame({c.name: None for c in registry.get_columns_registry()}, index=range(size))
+        records[records.columns[:3]] = [system_id, control_code, intermediary_code]
+        records[records.columns[3]] = ndgs.astype(str)
+        records[records.columns[4]] = pd.Timestamp.now().normalize() - pd.to_timedelta(random.integers(0, 60, size),
+                                                                                           unit='D')
+        records[records.columns[5]] = random.random(size)
+        records[records.columns[6]] = model_name_date
+
+        self._private_data['registry'] = registry
+        return registry.load_many(records, on_conflict='overwrite')
+
+    def _private_extraction(self) -> int:
+        extract_data = SyntheticExtractData(engine_evaluation=self.engines['evaluation'],
+                                            engine_dwa=self.engines['dwa'],
+                                            registry=self._private_data['registry'],
+                                            system_id=system_id, control_code=control_code,
+                                            intermediary_code=intermediary_code, ref_month=self.ref_month,
+                                            registry_month_to_skip=3, reported_other_systems=['DISCOVERY'],
+                                            chunk_size=self.chunk_size, max_workers=self.max_workers,
+                                            ndg_filter=self.ndg_filter)
+        extract_data()
+        operations, operations_subjects, subjects = extract_data.get_dwa_data()
+
+        self._private_data.update({'extract_data': extract_data, 'operations': operations,
+                                   'operations_subjects': operations_subjects, 'subjects': subjects})
+        return operations.shape[0] + operations_subjects.shape[0] + subjects.shape[0]
+
+    def _private_target(self) -> int:
+        target = self._private_data['extract_data'].get_target()
+        self._private_data['target'] = target
+        return target.shape[0]
+
+    def _private_features(self) -> int:
+        from kassandra.features_creation import BuildFeatures
+
+        features = BuildFeatures(subjects=self._private_data['subjects'].copy(),
+                                 operations=self._private_data['operations'],
+                                 operations_subjects=self._private_data['operations_subjects'],
+                                 target_information=self._private_data['target'],
+                                 months_operations=fcc.operations_months_features,
+                                 bank_months=apc.bank_months, partitions=apc.features_partitions)()
+        self._private_data['features'] = features
+        return features.shape[0]
+
+    def _private_predictions(self) -> pd.DataFrame:
+        ndgs = self._private_data['extract_data'].get_ndgs()
+        random = np.random.default_rng(self.random_state)
+        return pd.DataFrame({'prediction': random.random(len(ndgs))}, index=pd.Index(ndgs, name=fcc.ndg_name))
+
+    def _private_last_prediction_load(self) -> int:
+        registry_last_prediction = RegistryLastPrediction(engine=self.engines['kassandra'])
+        if registry_last_prediction.get_table() is None:
+            registry_last_prediction.create_registry_table_index()
+
+        predictions = self._private_predictions()
+        registry_last_prediction.load(system_id=system_id, control_code=control_code,
+                                      intermediary_code=intermediary_code, prediction=predictions,
+                                      model_name_date=model_name_date)
+        self._private_data['registry_last_prediction'] = registry_last_prediction
+        return predictions.shape[0]
+
+    def _private_last_prediction_read(self) -> int:
+        last_prediction = self._private_data['registry_last_prediction'].get_last_prediction(
+            system_id=system_id, control_code=control_code, intermediary_code=intermediary_code)
+        return last_prediction.shape[0]
+
+    def _private_subject_management(self) -> int:
+        from unittest.mock import MagicMock
+        from sklearn.ensemble import RandomForestClassifier
+        from ml_anomaly_gate import AnomalyGate
+        from kassandra.prediction_and_loading import SubjectManagement, FeatureCategories
+        from kassandra.features_creation.shap_explainer import create_explainer
+
+        # model on the numerical features (the encoders of the production are not part of the benchmark)
+        features = self._private_data['features'].select_dtypes('number')
+        random = np.random.default_rng(self.random_state)
+        model = RandomForestClassifier(n_estimators=20, max_depth=5, random_state=self.random_state)
+        model.fit(features, random.random(features.shape[0]) < 0.1)
+        explainer, _ = create_explainer(model, features, background_size=100)
+
+        gate = AnomalyGate(system=system_id, id_transition='0001')
+        gate.define_id(code=control_code, bank_code=intermediary_code, name=system_id)
+        gate.define_basic_information(code=control_code, bank_code=intermediary_code, description=system_id)
+
+        subjects = self._private_data['subjects'].drop_duplicates(subset=[fcc.ndg_name]).copy()
+        subject_management = SubjectManagement(model_object=model, model_date_name=model_name_date,
+                                               shap_explainer=explainer,
+                                               registry_object=self._private_data['registry'],
+                                               registry_last_prediction_object=MagicMock(),
+                                               evaluation_connection=self.engines['evaluation'],
+                                               subjects_info=subjects,
+                                               features_categories=FeatureCategories({}, [], [], [], []),
+                                               anomaly_gate=gate, ref_month_anomaly=self.ref_month,
+                                               threshold=0.5, registry_batch_loading=True, profiler=self.profiler)
+        subject_management(input_to_predict=features.copy())
+        return features.shape[0]
+
+    def __call__(self) -> dict:
+        """
+            run the stages of the benchmark (features creation on synthetic reference data, the reference files and
+            the province cache of the installation are not used)
+            :return: record of the run (information, totals and stages)
+        """
+
+        reference_data = generate_reference_data(os.path.join(self.directory, 'reference_data'), self.random_state)
+        with patch.multiple(fcc, **reference_data), patch.object(apc, 'cache_directory', self.directory):
+            self._private_stage('generate_load', self._private_generate_load)
+            self._private_stage('registry_load_many', self._private_registry_load_many)
+            self._private_stage('extraction', self._private_extraction, ['registry'])
+            self._private_stage('target', self._private_target, ['extract_data'])
+            self._private_stage('features', self._private_features, ['subjects', 'target'])
+            self._private_stage('last_prediction_load', self._private_last_prediction_load, ['extract_data'])
+            self._private_stage('last_prediction_read', self._private_last_prediction_read,
+                                ['registry_last_prediction'])
+            self._private_stage('subject_management', self._private_subject_management, ['features'])
+
+        for engine in self.engines.values():
+            engine.dispose()
+
+        return {**self.profiler.to_dict(), 'commit': get_commit(), 'python': sys.version.split()[0]}
+
+
+def save_results(record: dict, directory: str = results_directory) -> str:
+    """
+        save the json record of the run and append its stages to the csv of all the runs
+        :param record: record of the run
+        :param directory: directory of the results
+        :return: path of the csv of all the runs
+    """
+
+    os.makedirs(directory, exist_ok=True)
+    date = datetime.now().strftime('%Y%m%d%H%M%S')
+    with open(os.path.join(directory, f'benchmark_{record["scale"]}_{record["commit"]}_{date}.json'), 'w') as file:
+        json.dump(record, file, indent=2, default=str)
+
+    rows = pd.DataFrame([[record['commit'], record['start'], record['scale'], record['subjects'], record['operations'],
+                          stage['stage'], stage.get('seconds'), stage.get('cpu_seconds'),
+                          stage.get('peak_rss_delta_mb'), stage.get('rows'), stage.get('rows_per_second'),
+                          stage.get('error')] for stage in record['stages']], columns=results_columns)
+
+    path = os.path.join(directory, results_file)
+    rows.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+    return path
+
+
+def compare_results(path: str, base_commit: str, head_commit: str = None, scale: str = None) -> pd.DataFrame:
+    """
+        compare the median seconds of each stage of two commits
+        :param path: csv of all the runs
+        :param base_commit: commit of reference
+        :param head_commit: commit to compare (default: last commit of the csv)
+        :param scale: scale of the runs (default: all the scales)
+        :return: df with the median seconds of the two commits (BASE, HEAD) and their ratio for each scale and stage
+    """
+
+    results = pd.read_csv(path, dtype={'COMMIT': str})
+    results = results[results['ERROR'].isna()]
+    if scale is not None:
+        results = results[results['SCALE'] == scale]
+    head_commit = head_commit if head_commit is not None else results['COMMIT'].iloc[-1]
+
+    seconds = results.groupby(['SCALE', 'STAGE', 'COMMIT'])['SECONDS'].median().unstack('COMMIT')
+    comparison = pd.DataFrame({'BASE': seconds.get(base_commit), 'HEAD': seconds.get(head_commit)},
+                              index=seconds.index)
+    comparison['RATIO'] = comparison['HEAD'] / comparison['BASE']
+    return comparison.dropna(how='all', subset=['BASE', 'HEAD']).reset_index()
+
+
+def main(arguments: list = None) -> None:
+    """
+        run the benchmark from the command line (e.g. python -m benchmark --scale small)
+        :param arguments: command line arguments (default: sys.argv)
+        :return: None
+    """
+
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='benchmark on synthetic data')
+    parser.add_argument('--scale', choices=list(scales), default='tiny', help='number of subjects and operations')
+    parser.add_argument('--subjects', type=int, help='number of subjects (instead of the scale)')
+    parser.add_argument('--operations', type=int, help='number of operations (instead of the scale)')
+    parser.add_argument('--stages', nargs='+', choices=benchmark_stages, help='stages to run (default: all)')
+    parser.add_argument('--directory', help='directory of the sqlite databases (default: temporary directory)')
+    parser.add_argument('--results', default=results_directory, help='directory of the results')
+    parser.add_argument('--max-workers', type=int, default=1, help='parallel connections of the extraction')
+    parser.add_argument('--ndg-filter', default='bind', help='ndg filter of the extraction (chunk, bind, temp_table)')
+    parser.add_argument('--compare', nargs='+', metavar='COMMIT', help='compare the results of two commits')
+    args = parser.parse_args(arguments)
+
+    log.basicConfig(level=log.INFO, format=apc.logging_format, datefmt=apc.logging_date_format)
+    path = os.path.join(args.results, results_file)
+
+    if args.compare is not None:
+        print(compare_results(path, *args.compare[:2]).to_string(index=False))
+        return
+
+    n_subjects, n_operations = scales[args.scale]
+    n_subjects = args.subjects if args.subjects is not None else n_subjects
+    n_operations = args.operations if args.operations is not None else n_operations
+    scale = args.scale if args.subjects is None and args.operations is None else f'{n_subjects}_{n_operations}'
+
+    with tempfile.TemporaryDirectory() as directory:
+        record = Benchmark(n_subjects=n_subjects, n_operations=n_operations, directory=args.directory or directory,
+                           scale=scale, stages=args.stages, max_workers=args.max_workers,
+                           ndg_filter=args.ndg_filter)()
+
+    path = save_results(record, args.results)
+    log.info(f'>> Benchmark completed in {record["seconds"]:.3f} s, results saved in {path}')
+    print(pd.DataFrame(record['stages']).to_string(index=False))
+
+    errors = {stage['stage']: stage['error'] for stage in record['stages'] if stage.get('error') is not None}
+    if len(errors) > 0:
+        raise SystemExit(f'>> Benchmark stages failed or skipped: {errors}')
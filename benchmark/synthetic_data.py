@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: synthetic operations, operations subjects, subjects and evaluation anomalies for the benchmark
+@TODO:
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from kassandra.config_module import feature_creation_config as fcc
+from kassandra.config_module.extraction_config import cols_names_evaluation_csv, default_software
+
+# scales of the benchmark (subjects, operations)
+scales = {'tiny': (1_000, 10_000),
+          'small': (10_000, 100_000),
+          'medium': (100_000, 1_000_000),
+          'large': (1_000_000, 10_000_000)}
+
+provinces = ['MI', 'RM', 'NA', 'TO', 'PA', 'BO', 'FI', 'BA', 'VE', 'GE', 'VR', 'CT', 'BS', 'PD', 'TS']
+countries = ['086', '087', '088', '090', '091', '092', '094', '096', '027', '038']
+legal_species = ['PF', 'PG', 'DI']
+causals = ['26', '27', '48', '50', '78', '66', '34', '43', '18', '19', 'Z1', 'Z2', 'AC', 'BA', 'CA']
+statuses = [fcc.to_alert_value, fcc.not_to_alert_value]
+
+anomaly_xml = '<main><attributes><simple><id>REFMONTH</id><value>%s</value></simple></attributes></main>'
+
+
+def get_ndgs(n_subjects: int) -> np.ndarray:
+    """
+        :param n_subjects: number of subjects
+        :return: ndg of the subjects (string, e.g. 100000001)
+    """
+
+    return (np.arange(n_subjects, dtype=np.int64) + 100_000_001).astype(str)
+
+
+def generate_subjects(n_subjects: int, random_state: int = 0) -> pd.DataFrame:
+    """
+        generate the subjects information
+        :param n_subjects: number of subjects
+        :param random_state: seed of the generator
+        :return: df with the subjects columns of the features creation
+    """
+
+    random = np.random.default_rng(random_state)
+    birthday = pd.Timestamp('1940-01-01') + pd.to_timedelta(random.integers(0, 365 * 60, n_subjects), unit='D')
+
+    return pd.DataFrame({fcc.ndg_name: get_ndgs(n_subjects),
+                         fcc.birth_column: birthday.strftime('%Y-%m-%d'),
+                         'LEGAL_SPECIE': random.choice(legal_species, n_subjects),
+                         'GROSS_INCOME': np.round(random.lognormal(10, 1, n_subjects), 2),
+                         fcc.residence_province_column: random.choice(provinces, n_subjects),
+                         'RESIDENCE_CITY': random.choice(['CITTA_' + str(i) for i in range(50)], n_subjects),
+                         'RESIDENCE_COUNTRY': random.choice(countries, n_subjects, p=[0.91] + [0.01] * 9),
+                         fcc.sae_column: random.choice(['600', '614', '430', '432', '615'], n_subjects),
+                         fcc.ateco_column: random.choice(['47', '56', '41', '68', '01', '00'], n_subjects),
+                         'RISK_PROFILE': random.integers(1, 5, n_subjects),
+                         'NCHECKREQUIRED': random.poisson(1, n_subjects),
+                         'NCHECKDEBITED': random.poisson(1, n_subjects),
+                         'NCHECKAVAILABLE': random.poisson(2, n_subjects)})
+
+
+def generate_operations(n_subjects: int, n_operations: int, ref_month: str, months: int = 12,
+                        chunk_size: int = 1_000_000, random_state: int = 0) -> iter:
+    """
+        generate the operations and the operations subjects in chunks (the chunks can be loaded without keeping all
+        the operations in memory), the number of operations of each subject follows a heavy-tailed distribution
+        :param n_subjects: number of subjects
+        :param n_operations: number of operations
+        :param ref_month: reference month (e.g. 062023), last month of the operations
+        :param months: number of months of the operations
+        :param chunk_size: number of operations of each chunk
+        :param random_state: seed of the generator
+        :return: generator of (operations, operations subjects)
+    """
+
+    random = np.random.default_rng(random_state)
+    ndgs = get_ndgs(n_subjects)
+    weights = random.pareto(1.5, n_subjects) + 1
+    weights /= weights.sum()
+
+    end = datetime.strptime(ref_month, '%m%Y') + relativedelta(months=1)
+    start = end - relativedelta(months=months)
+    seconds = int((end - start).total_seconds())
+
+    for offset in range(0, n_operations, chunk_size):
+        size = min(chunk_size, n_operations - offset)
+        codes = (np.arange(offset, offset + size, dtype=np.int64) + 1).astype(str)
+        owners = random.choice(n_subjects, size, p=weights)
+        dates = pd.Timestamp(start) + pd.to_timedelta(random.integers(0, seconds, size), unit='s')
+
+        operations = pd.DataFrame({'ACCOUNT': np.char.add('C', (owners % 997_331).astype(str)),
+                                   fcc.sign_column: random.choice([fcc.sign_options_in, fcc.sign_options_out], size),
+                                   fcc.amount_column: np.round(random.lognormal(6, 1.5, size), 2),
+                                   fcc.date_operation_column: dates.strftime('%Y-%m-%d %H:%M:%S'),
+                                   'CODE_OPERATION': codes,
+                                   fcc.causal_column: random.choice(causals, size),
+                                   fcc.counterpart_column: random.choice(countries, size, p=[0.91] + [0.01] * 9)})
+
+        # an operation subject for each operation (the owner) and a second one for 10% of the operations
+        second = random.random(size) < 0.1
+        operations_subjects = pd.DataFrame({'CODE_OPERATION': np.concatenate([codes, codes[second]]),
+                                            fcc.ndg_name: np.concatenate([ndgs[owners],
+                                                                          ndgs[random.choice(n_subjects,
+                                                                                             second.sum())]]),
+                                            fcc.subject_type_column: np.repeat(['T', 'E'], [size, second.sum()])})
+        yield operations, operations_subjects
+
+
+def generate_anomalies(n_subjects: int, ref_month: str, ratio: float = 0.05, months: int = 24,
+                       random_state: int = 0) -> pd.DataFrame:
+    """
+        generate the anomalies of the evaluation (COMPORTAMENT anomalies with the refmonth in the XML)
+        :param n_subjects: number of subjects
+        :param ref_month: reference month (e.g. 062023)
+        :param ratio: ratio of the subjects with an anomaly
+        :param months: number of months of the anomalies before the reference month
+        :param random_state: seed of the generator
+        :return: df with the columns of the evaluation (SOFTWARE, DATA, STATO, NDG, XML)
+    """
+
+    random = np.random.default_rng(random_state)
+    size = int(n_subjects * ratio)
+    end = datetime.strptime(ref_month, '%m%Y')
+
+    month = pd.DatetimeIndex([end - relativedelta(months=int(value)) for value in range(months)])
+    dates = month[random.integers(0, months, size)]
+    software = random.choice(default_software, size)
+
+    anomalies = pd.DataFrame({'SOFTWARE': software,
+                              'DATA': dates.strftime('%Y-%m-%d %H:%M:%S.000'),
+                              'STATO': random.choice(statuses, size, p=[0.3, 0.7]),
+                              fcc.ndg_name: random.choice(get_ndgs(n_subjects), size, replace=False),
+                              'XML': [anomaly_xml % value for value in dates.strftime('%Y%m')]})
+    anomalies.columns = cols_names_evaluation_csv
+    return anomalies
+
+
+def generate_reference_data(directory: str, random_state: int = 0) -> dict:
+    """
+        generate the reference data of the features creation on the provinces, countries, causals and codes of the
+        synthetic data (list values, analytical causal and province categorization)
+        :param directory: directory of the files
+        :param random_state: seed of the generator
+        :return: paths of the files (names of the configuration of the features creation)
+    """
+
+    random = np.random.default_rng(random_state)
+    os.makedirs(directory, exist_ok=True)
+    paths = {'list_values_path': os.path.join(directory, 'list_values.csv'),
+             'analytical_causal_path': os.path.join(directory, 'analytical_causal.csv'),
+             'country_province_path': os.path.join(directory, 'country_province.xlsx')}
+
+    list_values = {'PRV_NORD': provinces[::2], 'PRV_SUD': provinces[1::2], 'SAE_FAMIGLIE': ['600', '614', '615'],
+                   'SAE_IMPRESE': ['430', '432'], 'ATECO_COMMERCIO': ['47', '56'], 'ATECO_ALTRO': ['41', '68', '01'],
+                   'RISCHIO_PAESE_ALTISSIMO': countries[-2:], 'RISCHIO_PAESE_ALTO': countries[-5:-2]}
+    rows = max(len(values) for values in list_values.values())
+    pd.DataFrame({column: values + [''] * (rows - len(values)) for column, values in list_values.items()}) \
+        .to_csv(paths['list_values_path'], sep=fcc.list_values_delimiter, index=False)
+
+    # two causals for each group of the analytical causal
+    pd.DataFrame({column: [causals[i % len(causals)], causals[(i + 3) % len(causals)]]
+                  for i, column in enumerate(fcc.analytical_causal_columns)}) \
+        .to_csv(paths['analytical_causal_path'], sep=fcc.analytical_causal_delimiter, index=False)
+
+    province = pd.DataFrame({column: np.round(random.random(len(provinces)) * 12, 3)
+                             for column in fcc.province_columns})
+    for column in fcc.province_features_to_not_process:
+        province[column] = [column[:3].upper() + str(i % 3) for i in range(len(provinces))]
+    province['Sigla'] = provinces
+    province.to_excel(paths['country_province_path'], sheet_name=fcc.province_sheet_name, index=False)
+
+    return paths
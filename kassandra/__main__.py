@@ -1,4 +1,5 @@
-from kassandra.starter.log import log
+from kassandra.starter.log import log, setup_logging
+setup_logging()
 log.info(f'>> *** STARTING SUBJECT PRIORITIZATION ONESHOT ***')
 
 from kassandra.starter.subject_prioritization_oneshot import main
@@ -11,8 +11,6 @@ import os
 
 from dotenv import dotenv_values
 
-from test.temp_dir_manager import TempDirManager
-
 env = dotenv_values()
 
 base_path = env['BASE_PATH']
@@ -21,6 +19,7 @@ verbose = int(env['VERBOSE'])
 time_to_sleep = int(env['TIME_TO_SLEEP_MONITORING_KASSANDRA'])
 
 if 'TEST_ENV' in os.environ:
+    from test.temp_dir_manager import TempDirManager
     temp = TempDirManager()
     service_folder = temp.get_dir_name()
 else:
@@ -45,6 +44,39 @@ logging_date_format = '%Y-%m-%d %H:%M:%S'
 # bank months present in the database
 bank_months = 24
 
+# extraction (number of parallel connections to dwa, 1 means serial extraction, and ndg filter strategy)
+extraction_max_workers = int(env.get('EXTRACTION_MAX_WORKERS', 1))
+extraction_ndg_filter = env.get('EXTRACTION_NDG_FILTER', 'chunk')
+extraction_streaming = env.get('EXTRACTION_STREAMING', 'false').lower() in ['true', '1']
+operations_cache = env.get('OPERATIONS_CACHE', 'false').lower() in ['true', '1']
+extraction_schema = env.get('EXTRACTION_SCHEMA', 'false').lower() in ['true', '1']
+
+# ndg in the registry and in other systems removed before the extraction (their last prediction is not stored)
+exclusion_pruning = env.get('EXCLUSION_PRUNING', 'false').lower() in ['true', '1']
+
+# ndg partitions of the features creation (1 means all the subjects together, the peak memory of each partition
+# is about 1/partitions of the monolithic one)
+features_partitions = int(env.get('FEATURES_PARTITIONS', 1))
+
+# shap explainer (auto, tree, sampled, kmeans or full) and size of the summarised background
+shap_explainer_mode = env.get('SHAP_EXPLAINER_MODE', 'auto')
+shap_fallback_mode = env.get('SHAP_FALLBACK_MODE', 'kmeans')
+shap_background_size = int(env.get('SHAP_BACKGROUND_SIZE', 100))
+# full mode on the probability of the positive class as the other modes (default: output of predict)
+shap_full_probability = env.get('SHAP_FULL_PROBABILITY', 'false').lower() in ['true', '1']
+
+# registry rows loaded in batches (one transaction for each batch, failures raised at the end of the loading)
+registry_batch_loading = env.get('REGISTRY_BATCH_LOADING', 'false').lower() in ['true', '1']
+
+# batch of intermediaries (number of worker processes, 1 means serial in the same process, and summary directory)
+batch_max_workers = int(env.get('BATCH_MAX_WORKERS', 1))
+batch_directory = f'{service_folder}/batch'
+
+# stage profiler (json record of wall time, cpu time, peak memory and rows of each stage for each run)
+profiling = env.get('PROFILING', 'true').lower() in ['true', '1']
+profiling_log = env.get('PROFILING_LOG', 'false').lower() in ['true', '1']
+profiling_directory = f'{service_folder}/profiling'
+
 # census
 url_census = env['URL_CENSUS']
 system_id_name = "KASSANDRA"
@@ -72,6 +104,15 @@ models_directory = f'{service_folder}/ml_models'
 # x_train
 data_directory = f'{service_folder}/data'
 
+# snapshots of the streaming extraction
+extraction_directory = f'{service_folder}/extraction'
+
+# precomputed reference data (e.g. province features)
+cache_directory = f'{service_folder}/cache'
+
+# monthly partitions of the operations extracted from dwa (by intermediary code)
+operations_cache_directory = f'{service_folder}/operations_cache'
+
 # encoder
 save_encoder = True
 encoders_directory = f'{service_folder}/encoders'
@@ -9,6 +9,10 @@
 """
 
 import os
+from kassandra.config_module.feature_creation_config import operations_dtype, operations_subject_dtype, \
+    operations_subject_columns, subjects_columns
+from kassandra.config_module.prediction_and_loading_config import name_subject_col, fiscal_code_subject_col, \
+    office_subject_col
 
 anomaly_table_name = 'ANOMALY'
 date_operation_name = 'DATE_OPERATION'
@@ -37,3 +41,38 @@ else:
 operations_subject_query_path = os.path.join(queries_directory, 'operations_subject.sql')
 operations_query_path = os.path.join(queries_directory, 'operations.sql')
 subjects_query_path = os.path.join(queries_directory, 'subjects.sql')
+
+# strategies to filter the ndg in the dwa queries
+ndg_filter_chunk = 'chunk'  # literal IN lists of chunk_size ndg (default, fallback of the other strategies)
+ndg_filter_bind = 'bind'  # expanding bind parameter of chunk_size ndg (keep chunk_size <= 1000 on oracle)
+ndg_filter_temp_table = 'temp_table'  # ndg loaded once in a session-scoped temporary table
+ndg_filter_strategies = [ndg_filter_chunk, ndg_filter_bind, ndg_filter_temp_table]
+ndg_bind_name = 'ndgs'
+
+ndg_temp_table_name = 'KASSANDRA_NDG_FILTER'
+ndg_temp_table_length = 32
+ndg_temp_table_ddl = {'sqlite': 'CREATE TEMP TABLE IF NOT EXISTS {table} ({column} VARCHAR({length}))',
+                      'mysql': 'CREATE TEMPORARY TABLE IF NOT EXISTS {table} ({column} VARCHAR({length}))',
+                      'mssql': "IF OBJECT_ID('tempdb..{table}') IS NULL CREATE TABLE {table} ({column} VARCHAR({length}))",
+                      'oracle': 'CREATE GLOBAL TEMPORARY TABLE {table} ({column} VARCHAR2({length})) ON COMMIT PRESERVE ROWS'}
+ndg_temp_table_prefix = {'mssql': '#'}
+
+# datasets extracted from dwa (streaming extraction is available for the datasets with a configured dtype)
+operations_dataset, operations_subject_dataset, subjects_dataset = 'operations', 'operations_subject', 'subjects'
+streaming_dtypes = {operations_dataset: operations_dtype, operations_subject_dataset: operations_subject_dtype}
+streaming_file_extension = '.arrow'
+
+# operations cache (one partition for each intermediary code and month of the operations)
+operations_cache_index = 'index.json'
+operations_cache_extension = '.parquet'
+operations_cache_month_format = '%Y-%m'
+operations_date_filter_query = 'SELECT * FROM ({query}) OPS WHERE OPS.{column} >= {date}'
+
+# schema of the datasets read from dwa (column: dtype, None keeps the dtype read from the database)
+datetime_dtype, float_dtype, category_dtype, storage_dtype = 'datetime64[ns]', 'float64', 'category', 'string'
+operations_schema = operations_dtype
+operations_subject_schema = {column: operations_subject_dtype for column in operations_subject_columns}
+subjects_schema = {column: None for column in subjects_columns + [name_subject_col, fiscal_code_subject_col,
+                                                                 office_subject_col]}
+dataset_schemas = {operations_dataset: operations_schema, operations_subject_dataset: operations_subject_schema,
+                   subjects_dataset: subjects_schema}
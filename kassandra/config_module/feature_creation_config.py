@@ -10,14 +10,21 @@
 
 import os
 
-from test.temp_dir_manager import TempDirManager
 
 root_path = os.path.dirname(__file__)
 data_path = os.path.join(root_path, '../features_creation/data')
 
 ndg_name = 'NDG'
+ndg_dtype, ndg_code_dtype = 'string', 'Int32'
+
+# ndg encoded to integer codes during the features creation (decoded only in the output)
+encode_ndg = True
 operations_months_features = 12
 x_train_name = '/x_train.csv'
+column_trans_file = 'encoder.joblib'
+column_names_file = 'column_names.joblib'
+model_extension = '.joblib'
+explainer_extension = '.explainer'
 merge_operation_subject_columns = 'CODE_OPERATION'
 days_in_year = 365.25
 
@@ -76,6 +83,10 @@ province_categorization_dict = [['Occupazione Totale', {alto: 0.5, medio: 0.41,
                                 ['Associazione di tipo mafioso', {alto: 1.0, medio: 0.1, basso: 0.0}]]
 province_features_to_not_process = ['Sigla', 'Provincia', 'Regione', 'Zona geografica', 'Provincia di Confine',
                                     'Provincia Turistica']
+province_cache_file = 'province_features.joblib'
+
+# reference data (list values, analytical causal, province) loaded once for each process and shared
+reference_data_registry = True
 
 # list values information
 list_values_path = os.path.join(data_path, 'list_values.csv')
@@ -87,7 +98,9 @@ date_operation_column, amount_column, month_year_column, \
     causal_column, counterpart_column, sign_column = 'DATE_OPERATION', 'AMOUNT', 'MONTH_YEAR', 'CAUSAL', 'COUNTERPART_COUNTRY', 'SIGN'
 operations_columns = ['ACCOUNT', sign_column, amount_column, date_operation_column, 'CODE_OPERATION', causal_column,
                       counterpart_column]
-operations_dtype = 'string'
+operations_dtype = {'ACCOUNT': 'string', sign_column: 'category', amount_column: 'float64',
+                    date_operation_column: 'datetime64[ns]', 'CODE_OPERATION': 'string', causal_column: 'category',
+                    counterpart_column: 'category'}
 sign_options_in, sign_options_out = 'A', 'D'
 
 # analysis information
@@ -98,6 +111,10 @@ analytical_causal_columns = ['COD_CONTANTE', 'COD_ASSEGNI', 'COD_FINANZIAMENTI',
                              'COD_TIT_CER_INV', 'COD_POS', 'COD_PAG_INC_DIVERSI', 'COD_EFF_DOC_RIBA', 'COD_DIVIDENDI',
                              'COD_REVERSALI']
 analytical_causal_dtype = 'string'
+not_to_alert_freq_column = 'NOT_TO_ALERT_FREQ'
+
+# statistics of the operations computed by the AggregationEngine (False to use a groupby for each statistic)
+vectorised_aggregation = True
 output_features_columns = [ndg_name, 'AVG_FREQ_A', 'AVG_FREQ_D', 'AVG_AMOUNT_A', 'AVG_AMOUNT_D',
                            'RISCHIO_PAESE_TOT_A', 'RISCHIO_PAESE_TOT_D',
                            'AVG_COD_CONTANTE_FREQ_A', 'AVG_COD_CONTANTE_FREQ_D',
@@ -111,7 +128,7 @@ output_features_columns = [ndg_name, 'AVG_FREQ_A', 'AVG_FREQ_D', 'AVG_AMOUNT_A',
                            'AVG_COD_EFF_DOC_RIBA_FREQ_A', 'AVG_COD_EFF_DOC_RIBA_FREQ_D',
                            'AVG_COD_DIVIDENDI_FREQ_A', 'AVG_COD_DIVIDENDI_FREQ_D',
                            'AVG_COD_REVERSALI_FREQ_A', 'AVG_COD_REVERSALI_FREQ_D',
-                           'AVG_RISCHIO_PAESE_A', 'AVG_RISCHIO_PAESE_D', 'NOT_TO_ALERT_FREQ']
+                           'AVG_RISCHIO_PAESE_A', 'AVG_RISCHIO_PAESE_D', not_to_alert_freq_column]
 
 # OPERATION SUBJECT INFORMATION
 operations_subject_dtype = 'string'
@@ -44,6 +44,9 @@ round_percentage = 2
 round_contributions = 5
 round_prediction_score = 4
 
+# subjects for each registry transaction of the registry batch loading
+registry_batch_size = 500
+
 
 boolean_features_values = {0: 'No', 1: 'Si'}
 boolean_features_name = ['NDG', 'STATUS', 'AGE_0_9', 'AGE_10-19', 'AGE_20-29', 'AGE_30-39',
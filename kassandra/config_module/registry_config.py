@@ -22,4 +22,17 @@ client_id_name = 'CLIENT_ID'
 report_date_name = 'REPORT_DATE'
 prediction_name = 'PREDICTION'
 model_name_date_name = 'MODEL_NAME_DATE'
-score_name = 'SCORE'
\ No newline at end of file
+score_name = 'SCORE'
+
+# latest prediction of each client and model selected on the db (window function) instead of pandas
+last_prediction_server_side = True
+
+# rows inserted for each transaction by load_many and policies for the rows already in the table
+load_many_batch_size = 500
+on_conflict_options = ['error', 'skip', 'overwrite']
+
+# attempts of an overwrite rejected by the unique key (key written again by a concurrent load)
+load_many_retries = 3
+
+# seconds before the reflected table is reflected again from the db (None means until invalidated)
+table_reflection_ttl = 3600
@@ -1 +1,3 @@
-from kassandra.extraction.extract_data import ExtractData
\ No newline at end of file
+from kassandra.extraction.exclusion_index import ExclusionIndex
+from kassandra.extraction.extract_data import ExtractData
+from kassandra.extraction.operations_cache import OperationsCache
\ No newline at end of file
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: ExclusionIndex object (ndg that can not be alerted, registry and other systems, built once)
+@TODO:
+"""
+
+import numpy as np
+import pandas as pd
+
+registry_source = 'registry'
+other_systems_source = 'other_systems'
+
+
+class ExclusionIndex:
+    def __init__(self, ndgs_from_registry: list = None, ndgs_from_other_systems: list = None):
+        """
+            hashed sets of the ndg to exclude (the ndg are compared as string)
+            :param ndgs_from_registry: ndg reported in the last months (registry)
+            :param ndgs_from_other_systems: ndg already reported by other systems (evaluation)
+        """
+
+        self._private_sources = {registry_source: self._private_to_set(ndgs_from_registry),
+                                 other_systems_source: self._private_to_set(ndgs_from_other_systems)}
+        self._private_ndgs = frozenset().union(*self._private_sources.values())
+
+    @staticmethod
+    def _private_to_set(ndgs: list) -> frozenset:
+        """
+            :param ndgs: list of ndg (None means no ndg)
+            :return: set of ndg as string
+        """
+
+        if ndgs is None: return frozenset()
+        return frozenset(str(ndg) for ndg in ndgs)
+
+    def __contains__(self, ndg: any) -> bool:
+        return str(ndg) in self._private_ndgs
+
+    def __len__(self) -> int:
+        return len(self._private_ndgs)
+
+    def get_ndgs(self, source: str = None) -> frozenset:
+        """
+            :param source: registry, other_systems or None (all the sources)
+            :return: set of the ndg to exclude
+        """
+
+        if source is None: return self._private_ndgs
+        if source not in self._private_sources:
+            raise ValueError(f'>> Invalid exclusion source {source}, options: {list(self._private_sources)}')
+        return self._private_sources[source]
+
+    def mask(self, ndgs: any, source: str = None) -> np.ndarray:
+        """
+            lookup of the unique values only (one hash lookup for each distinct ndg)
+            :param ndgs: ndg to check (list, pandas Series or Index)
+            :param source: registry, other_systems or None (all the sources)
+            :return: boolean array, True if the ndg is excluded
+        """
+
+        excluded = self.get_ndgs(source)
+        codes, uniques = pd.factorize(pd.Series(ndgs, dtype=object), use_na_sentinel=False)
+        if len(excluded) == 0 or len(uniques) == 0: return np.zeros(len(codes), dtype=bool)
+
+        found = np.fromiter((str(ndg) in excluded for ndg in uniques), dtype=bool, count=len(uniques))
+        return found[codes]
+
+    def filter(self, ndgs: list, source: str = None) -> list:
+        """
+            :param ndgs: list of ndg
+            :param source: registry, other_systems or None (all the sources)
+            :return: ndg not excluded (same order of the input)
+        """
+
+        excluded = self.mask(ndgs, source)
+        return [ndg for ndg, drop in zip(ndgs, excluded) if not drop]
+
+    def filter_df(self, df: pd.DataFrame, column: str, source: str = None) -> pd.DataFrame:
+        """
+            :param df: pandas dataframe
+            :param column: column of the ndg
+            :param source: registry, other_systems or None (all the sources)
+            :return: rows of the ndg not excluded
+        """
+
+        if df is None or df.empty: return df
+        return df[~self.mask(df[column], source)]
@@ -5,19 +5,31 @@
 @Date: 07/06/2023
 @Version: 1.0
 @Objective: extraction package of the data
-@TODO: Ottimizzazione di get_target (eliminare da self.target quei elementi presenti ndgs_from_other_systems)
+@TODO:
 """
 
+import os
 import pandas as pd
 import sqlalchemy
 import logging as log
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
+from sqlalchemy import text, bindparam, inspect
 from sqlalchemy.exc import SQLAlchemyError
 from kassandra.config_module.db_config import oracle_name
+from kassandra.config_module import feature_creation_config as fcc
 from kassandra.config_module.extraction_config import operations_subject_query_path, operations_query_path, \
     subjects_query_path, ndg_list_path, ndg_name, date_target_col, status_target_col, format_date, \
-    anomalies_other_systems_path, cols_names_evaluation_csv, dtypes_evaluation_csv, default_software
+    anomalies_other_systems_path, cols_names_evaluation_csv, dtypes_evaluation_csv, default_software, \
+    ndg_filter_chunk, ndg_filter_bind, ndg_filter_temp_table, ndg_filter_strategies, ndg_bind_name, \
+    ndg_temp_table_name, ndg_temp_table_length, ndg_temp_table_ddl, ndg_temp_table_prefix, operations_dataset, \
+    operations_subject_dataset, subjects_dataset, streaming_dtypes, streaming_file_extension, date_operation_name, \
+    operations_date_filter_query
+from kassandra.extraction.exclusion_index import ExclusionIndex
+from kassandra.extraction.operations_cache import OperationsCache
+from kassandra.extraction.schema import project_query, apply_schema, cast_columns, get_storage_dtypes, \
+    get_categorical_columns
 from kassandra.registry_management import Registry
 from kassandra.pre_processing_target.target_date_correction import update_target
 
@@ -26,7 +38,9 @@ class ExtractData:
     def __init__(self, engine_evaluation: sqlalchemy, engine_dwa: sqlalchemy,
                  registry: Registry, system_id: str, control_code: str, intermediary_code: str,
                  ref_month: str, registry_month_to_skip: int, reported_other_systems: list = None,
-                 chunk_size: int = 500):
+                 chunk_size: int = 500, max_workers: int = 1, ndg_filter: str = ndg_filter_chunk,
+                 streaming_directory: str = None, operations_cache_directory: str = None,
+                 operations_cache_months: int = None, schemas: dict = None, prune_excluded: bool = False):
         """
             init
             :param engine_evaluation: sqlalchemy engine object to connect to the database
@@ -39,6 +53,18 @@ class ExtractData:
             :param registry_month_to_skip: number of months to skip in the registry to be reported again
             :param reported_other_systems: list of systems that have already reported the ndg
             :param chunk_size: chunk size to read the data from the database
+            :param max_workers: number of parallel connections to dwa (1 means serial extraction)
+            :param ndg_filter: strategy to filter the ndg in the dwa queries (chunk, bind or temp_table)
+            :param streaming_directory: if not None, operations and operations subjects are streamed chunk by chunk
+                                        in a columnar file of this directory instead of being concatenated in memory
+            :param operations_cache_directory: if not None, the operations of the previous months are read from the
+                                               cache of this directory and only the missing months are extracted
+            :param operations_cache_months: number of months kept in the operations cache, it must be the window of
+                                            the operations query (default: months of the operations features)
+            :param schemas: schema of the datasets ({dataset: {column: dtype}}), the columns are selected in the
+                            queries and each chunk is cast while reading (e.g. extraction_config.dataset_schemas)
+            :param prune_excluded: if True, the ndg in the registry and in other systems are removed from the ndg to
+                                   process and from the target before the dwa extraction (they can not be alerted)
         """
 
         self.engine_dwa = engine_dwa
@@ -53,6 +79,8 @@ class ExtractData:
 
         self.ndgs_from_other_systems = []
         self.ndgs_from_registry = []
+        self.exclusion_index = ExclusionIndex()
+        self.prune_excluded = prune_excluded
 
         self.ndg_list = None
         self.operations_subject_df = None
@@ -70,6 +98,31 @@ class ExtractData:
         self.subjects_query = self._private_read_query(subjects_query_path)
 
         self.chunk_size = chunk_size
+        self.max_workers = max(1, int(max_workers))
+
+        if ndg_filter not in ndg_filter_strategies:
+            raise ValueError(f'>> Invalid ndg filter: {ndg_filter}')
+        self.ndg_filter = ndg_filter
+        self.streaming_directory = streaming_directory
+
+        self.operations_cache = None
+        if operations_cache_directory is not None:
+            self.operations_cache = OperationsCache(cache_directory=operations_cache_directory,
+                                                    intermediary_code=self.intermediary_code,
+                                                    ref_month_start=self.ref_month_start,
+                                                    retention_months=operations_cache_months
+                                                    if operations_cache_months is not None
+                                                    else fcc.operations_months_features)
+
+        # the operations cache needs the ndg of the operations
+        self.schemas = dict(schemas) if schemas is not None else {}
+        if self.operations_cache is not None and operations_dataset in self.schemas:
+            self.schemas[operations_dataset] = {ndg_name: None, **self.schemas[operations_dataset]}
+
+        self.operations_query = self._private_project_query(self.operations_query, operations_dataset)
+        self.operations_subject_query = self._private_project_query(self.operations_subject_query,
+                                                                    operations_subject_dataset)
+        self.subjects_query = self._private_project_query(self.subjects_query, subjects_dataset)
 
     def __call__(self):
         """
@@ -94,6 +147,17 @@ class ExtractData:
             raise FileNotFoundError(f'>> Query file not found: {query_path}')
         return query
 
+    def _private_project_query(self, query: str, dataset: str) -> str:
+        """
+            select only the columns of the schema of the dataset in the query
+            :param query: query to execute
+            :param dataset: name of the dataset extracted by the query
+            :return: query
+        """
+
+        if dataset not in self.schemas: return query
+        return project_query(query, self.schemas[dataset])
+
     @staticmethod
     def _private_ref_month_to_date(ref_month: str) -> (str, str):
         """
@@ -214,25 +278,281 @@ class ExtractData:
         self.ndgs_from_other_systems = self._private_get_ndg_from_other_systems()
         log.info(f">> Number of ndg present in other systems: {len(self.ndgs_from_other_systems)}")
 
-    def _private_common_function_extraction(self, query: str) -> pd.DataFrame:
+        self.exclusion_index = ExclusionIndex(self.ndgs_from_registry, self.ndgs_from_other_systems)
+        if not self.prune_excluded: return
+
+        # the excluded ndg are not extracted from dwa (and not featurised)
+        self.ndg_list = self.exclusion_index.filter(self.ndg_list)
+        self.target_df = self.exclusion_index.filter_df(self.target_df, ndg_name)
+        log.info(f">> Number of ndg to process after exclusion: {len(self.ndg_list)}")
+
+    def _private_get_ndg_chunks(self, ndgs: list = None) -> list:
+        """
+            split the ndg list in chunks of chunk_size elements
+            :param ndgs: ndg to split (None means all the ndg to process)
+            :return: list of ndg chunks
+        """
+
+        if ndgs is None:
+            ndgs = self._private_get_ndg_list()
+
+        return [ndgs[i:i + self.chunk_size] for i in range(0, len(ndgs), self.chunk_size)]
+
+    def _private_get_ndg_list(self) -> list:
+        """
+            :return: ndg to process (ValueError if there is no ndg to process)
+        """
+
+        if self.ndg_list is None: self.__call__()
+
+        if len(self.ndg_list) < 1:
+            raise ValueError(f'>> No ndg to process for the intermediary {self.intermediary_code}')
+        return self.ndg_list
+
+    def _private_read_chunk(self, query: str, ndgs: list) -> pd.DataFrame:
+        """
+            read a single chunk of ndg from dwa (literal IN list or expanding bind parameter)
+            :param query: query to execute
+            :param ndgs: ndg of the chunk
+            :return: DataFrame
+        """
+
+        if self.ndg_filter == ndg_filter_bind:
+            statement = text(query % (self.intermediary_code, ':' + ndg_bind_name))
+            statement = statement.bindparams(bindparam(ndg_bind_name, expanding=True))
+            return pd.read_sql_query(statement, self.engine_dwa, params={ndg_bind_name: ndgs})
+
+        ndgs_str = "(" + ", ".join(f"'{item}'" for item in ndgs) + ")"
+        return pd.read_sql_query(query % (self.intermediary_code, ndgs_str), self.engine_dwa)
+
+    @staticmethod
+    def _private_create_temp_table(connection: sqlalchemy.engine.Connection) -> str:
+        """
+            create the temporary table of the ndg if it does not exist
+            :param connection: connection to dwa
+            :return: name of the temporary table
+        """
+
+        dialect = connection.dialect.name
+        if dialect not in ndg_temp_table_ddl:
+            raise NotImplementedError(f'>> Temporary table not supported for {dialect}')
+
+        table_name = ndg_temp_table_prefix.get(dialect, '') + ndg_temp_table_name
+
+        # oracle global temporary tables are permanent objects, the rows are private to the session
+        if dialect == oracle_name and inspect(connection).has_table(ndg_temp_table_name): return table_name
+
+        try:
+            connection.execute(text(ndg_temp_table_ddl[dialect].format(table=table_name, column=ndg_name,
+                                                                       length=ndg_temp_table_length)))
+        except SQLAlchemyError:
+            # global temporary table created by another session between the check and the creation
+            if dialect != oracle_name or not inspect(connection).has_table(ndg_temp_table_name): raise
+        return table_name
+
+    def _private_get_ndg_filter(self) -> str:
+        """
+            choose the ndg filter strategy once for each extraction, before the reads are submitted (the temporary
+            table is created a single time and the chunks are used if it is not available)
+            :return: ndg filter strategy of the extraction
+        """
+
+        if self.ndg_filter != ndg_filter_temp_table: return self.ndg_filter
+
+        try:
+            with self.engine_dwa.begin() as connection:
+                self._private_create_temp_table(connection)
+        except (NotImplementedError, SQLAlchemyError) as e:
+            log.warning(f'>> Temporary table not available, fallback to the chunk extraction ({e})')
+            return ndg_filter_chunk
+        return ndg_filter_temp_table
+
+    def _private_load_temp_table(self, connection: sqlalchemy.engine.Connection, ndgs: list) -> str:
+        """
+            bulk load the ndg in a session-scoped temporary table
+            :param connection: connection to dwa (the table is visible only to this session)
+            :param ndgs: ndg to load
+            :return: name of the temporary table
+        """
+
+        # session-scoped temporary tables are created for each connection (no-op for the oracle global table)
+        table_name = self._private_create_temp_table(connection)
+
+        connection.execute(text(f'DELETE FROM {table_name}'))
+        connection.execute(text(f'INSERT INTO {table_name} ({ndg_name}) VALUES (:{ndg_bind_name})'),
+                           [{ndg_bind_name: ndg} for ndg in ndgs])
+        return table_name
+
+    def _private_read_temp_table(self, query: str, ndgs: list) -> pd.DataFrame:
+        """
+            read all the ndg with a single query joined with the temporary table (fallback to the chunks)
+            :param query: query to execute
+            :param ndgs: ndg to read
+            :return: DataFrame
+        """
+
+        with self.engine_dwa.connect() as connection:
+            try:
+                table_name = self._private_load_temp_table(connection, ndgs)
+            except (NotImplementedError, SQLAlchemyError) as e:
+                # fallback only for this read (the strategy of the other reads is not changed)
+                log.warning(f'>> Temporary table not available, fallback to the chunk extraction ({e})')
+                table_name = None
+
+            if table_name is not None:
+                ndgs_query = f'(SELECT {ndg_name} FROM {table_name})'
+                return pd.read_sql_query(query % (self.intermediary_code, ndgs_query), connection)
+
+        return pd.concat([self._private_read_chunk(query, chunk) for chunk in self._private_get_ndg_chunks(ndgs)])
+
+    def _private_get_tasks(self, query: str, ndg_filter: str, ndgs: list = None) -> list:
+        """
+            split the extraction of a query in independent reads according to the ndg filter strategy
+            :param query: query to execute
+            :param ndg_filter: ndg filter strategy of the extraction
+            :param ndgs: ndg to extract (None means all the ndg to process)
+            :return: list of (read function, query, ndgs)
+        """
+
+        if ndg_filter == ndg_filter_temp_table:
+            return [(self._private_read_temp_table, query, ndgs if ndgs is not None else self._private_get_ndg_list())]
+        return [(self._private_read_chunk, query, chunk) for chunk in self._private_get_ndg_chunks(ndgs)]
+
+    def _private_common_function_extraction(self, query: str, dataset: str = None, ndgs: list = None,
+                                            streaming: bool = True) -> pd.DataFrame:
         """
             common function to extract data
             :param query: query to execute
+            :param dataset: name of the dataset extracted (used for the schema and the streaming extraction)
+            :param ndgs: ndg to extract (None means all the ndg to process)
+            :param streaming: False to keep the chunks in memory even if the streaming extraction is enabled
             :return: DataFrame
         """
 
-        if self.ndg_list is None: self.__call__()
+        if self.max_workers == 1:
+            tasks = self._private_get_tasks(query, self._private_get_ndg_filter(), ndgs)
+            chunks = (function(query, chunk) for function, query, chunk in tasks)
+            return self._private_collect_chunks(chunks, dataset, streaming)
+
+        return self._private_parallel_extraction([query], [dataset], ndgs, streaming)[0]
+
+    def _private_parallel_extraction(self, queries: list, datasets: list, ndgs: list = None,
+                                     streaming: bool = True) -> list:
+        """
+            extract the chunks of all the queries through a bounded pool of connections to dwa
+            :param queries: queries to execute
+            :param datasets: names of the datasets extracted by the queries
+            :param ndgs: ndg to extract (None means all the ndg to process)
+            :param streaming: False to keep the chunks in memory even if the streaming extraction is enabled
+            :return: list of DataFrame (one for each query, in the same order)
+        """
+
+        ndg_filter = self._private_get_ndg_filter()
+        tasks = [self._private_get_tasks(query, ndg_filter, ndgs) for query in queries]
+
+        log.debug(f">> Parallel extraction of {sum(len(t) for t in tasks)} reads with {self.max_workers} workers")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [[executor.submit(function, query, ndgs) for function, query, ndgs in query_tasks]
+                       for query_tasks in tasks]
+            return [self._private_collect_chunks((future.result() for future in query_futures), dataset, streaming)
+                    for query_futures, dataset in zip(futures, datasets)]
+
+    def _private_collect_chunks(self, chunks: iter, dataset: str = None, streaming: bool = True) -> pd.DataFrame:
+        """
+            apply the schema to each chunk and concatenate the chunks in memory or stream them on disk
+            :param chunks: iterable of DataFrame
+            :param dataset: name of the dataset extracted
+            :param streaming: False to keep the chunks in memory even if the streaming extraction is enabled
+            :return: DataFrame
+        """
+
+        if dataset in self.schemas:
+            chunks = (apply_schema(chunk, self.schemas[dataset]) for chunk in chunks)
+
+        if not streaming or self.streaming_directory is None or dataset not in streaming_dtypes:
+            # the categories of the chunks are different, they are restored after the concatenation
+            dataframe = pd.concat(chunks)
+            return cast_columns(dataframe, get_categorical_columns(dataframe.columns, self.schemas.get(dataset)))
+
+        return self._private_stream_chunks(chunks, dataset)
+
+    def _private_stream_chunks(self, chunks: iter, dataset: str) -> pd.DataFrame:
+        """
+            write each chunk (with the configured dtype) in an arrow file and read it back memory-mapped,
+            only one chunk at a time is kept in memory during the extraction (categories are stored as string)
+            :param chunks: iterable of DataFrame
+            :param dataset: name of the dataset extracted
+            :return: DataFrame
+        """
 
-        if len(self.ndg_list) < 1: exit(0)
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError('>> pyarrow is required for the streaming extraction')
 
-        ndg_chunk = [self.ndg_list[i:i + self.chunk_size] for i in range(0, len(self.ndg_list), self.chunk_size)]
+        os.makedirs(self.streaming_directory, exist_ok=True)
+        path = self.get_snapshot_path(dataset)
+        dtype = self.schemas.get(dataset, streaming_dtypes[dataset])
 
-        dfs = []
-        for ndgs in ndg_chunk:
-            ndgs_str = "(" + ", ".join(f"'{item}'" for item in ndgs) + ")"
-            dfs.append(pd.read_sql_query(query % (self.intermediary_code, ndgs_str), self.engine_dwa))
+        writer = None
+        try:
+            for chunk in chunks:
+                chunk = cast_columns(chunk, get_storage_dtypes(chunk.columns, dtype))
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pa.ipc.new_file(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        log.debug(f'>> Extraction of {dataset} saved in {path}')
+
+        with pa.memory_map(path) as source:
+            table = pa.ipc.open_file(source).read_all()
+        dataframe = table.to_pandas(split_blocks=True, self_destruct=True,
+                                    types_mapper={pa.string(): pd.StringDtype()}.get)
+        return cast_columns(dataframe, get_categorical_columns(dataframe.columns, dtype))
+
+    def _private_get_cached_operations(self) -> pd.DataFrame:
+        """
+            get the operations of the previous months from the cache and extract only the missing months
+            (all the months for the ndg not present in the cache)
+            :return: DataFrame
+        """
 
-        return pd.concat(dfs)
+        cached, covered_ndgs, new_ndgs, start_date = self.operations_cache.get_cached(self._private_get_ndg_list())
+
+        # define the date filter (with or without date, for solving the problem of the different date format in Oracle)
+        date = f"DATE '{start_date}'" if self.engine_dwa.name == oracle_name else f"'{start_date}'"
+        query = self.operations_query.strip().rstrip(';')
+        date_query = operations_date_filter_query.format(query=query, column=date_operation_name, date=date)
+
+        extracted = []
+        if len(covered_ndgs) > 0:
+            extracted.append(self._private_common_function_extraction(date_query, operations_dataset, covered_ndgs,
+                                                                      streaming=False))
+        if len(new_ndgs) > 0:
+            extracted.append(self._private_common_function_extraction(self.operations_query, operations_dataset,
+                                                                      new_ndgs, streaming=False))
+        # the operations are cast as in the cache (categories as string) with or without cached operations
+        operations = self.operations_cache.cast(pd.concat(extracted))
+
+        self.operations_cache.update(self.ndg_list, new_ndgs, operations, start_date)
+
+        if cached is not None: operations = pd.concat([cached, operations], ignore_index=True)
+        return cast_columns(operations, get_categorical_columns(operations.columns, self.schemas.get(operations_dataset)))
+
+    def get_snapshot_path(self, dataset: str) -> str:
+        """
+            get the path of the file with the streaming extraction of the dataset
+            :param dataset: name of the dataset (e.g. operations)
+            :return: path of the file
+        """
+
+        file_name = f'{self.intermediary_code}_{self.ref_month_start[:7]}_{dataset}{streaming_file_extension}'
+        return os.path.join(self.streaming_directory, file_name)
 
     def get_ndgs(self) -> list:
         """
@@ -249,7 +569,8 @@ class ExtractData:
             :return: pandas dataframe
         """
 
-        self.operations_subject_df = self._private_common_function_extraction(self.operations_subject_query)
+        self.operations_subject_df = self._private_common_function_extraction(self.operations_subject_query,
+                                                                              operations_subject_dataset)
         return self.operations_subject_df
 
     def get_subjects(self) -> pd.DataFrame:
@@ -258,7 +579,7 @@ class ExtractData:
             :return: pandas dataframe
         """
 
-        self.subjects_df = self._private_common_function_extraction(self.subjects_query)
+        self.subjects_df = self._private_common_function_extraction(self.subjects_query, subjects_dataset)
         return self.subjects_df
 
     def get_operations(self) -> pd.DataFrame:
@@ -267,16 +588,36 @@ class ExtractData:
             :return: pandas dataframe
         """
 
-        self.operations_df = self._private_common_function_extraction(self.operations_query)
+        if self.operations_cache is not None:
+            self.operations_df = self._private_get_cached_operations()
+        else:
+            self.operations_df = self._private_common_function_extraction(self.operations_query, operations_dataset)
         return self.operations_df
 
+    def get_dwa_data(self) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
+        """
+            get operations, operations subjects and subjects data (extracted at the same time if max_workers > 1)
+            :return: operations, operations subjects and subjects pandas dataframes
+        """
+
+        if self.max_workers == 1 or self.operations_cache is not None:
+            return self.get_operations(), self.get_operations_subjects(), self.get_subjects()
+
+        queries = [self.operations_query, self.operations_subject_query, self.subjects_query]
+        datasets = [operations_dataset, operations_subject_dataset, subjects_dataset]
+        self.operations_df, self.operations_subject_df, self.subjects_df = self._private_parallel_extraction(queries,
+                                                                                                            datasets)
+        return self.operations_df, self.operations_subject_df, self.subjects_df
+
     def get_target(self) -> pd.DataFrame:
         """
             get target data
             :return: pandas dataframe
         """
 
-        if self.target_df is None: self._private_get_ndg_from_other_systems()
+        if self.target_df is None:
+            self._private_get_ndg_from_other_systems()
+            if self.prune_excluded: self.target_df = self.exclusion_index.filter_df(self.target_df, ndg_name)
         return self.target_df
 
     def get_anomaly_processed(self) -> pd.DataFrame:
@@ -307,4 +648,12 @@ class ExtractData:
             :return: list of ndg
         """
 
-        return self.ndgs_from_other_systems
\ No newline at end of file
+        return self.ndgs_from_other_systems
+
+    def get_exclusion_index(self) -> ExclusionIndex:
+        """
+            get the index of the ndg to exclude (registry and other systems)
+            :return: exclusion index
+        """
+
+        return self.exclusion_index
\ No newline at end of file
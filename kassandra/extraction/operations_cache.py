@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: local cache of the operations extracted from dwa (partitioned by intermediary code and month)
+@TODO:
+"""
+
+import os
+import json
+import pandas as pd
+import logging as log
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from kassandra.config_module.extraction_config import ndg_name, date_operation_name, format_date, \
+    operations_cache_index, operations_cache_extension, operations_cache_month_format
+from kassandra.config_module.feature_creation_config import operations_dtype
+from kassandra.extraction.schema import cast_columns, get_storage_dtypes
+
+
+class OperationsCache:
+    def __init__(self, cache_directory: str, intermediary_code: str, ref_month_start: str, retention_months: int):
+        """
+            init
+            :param cache_directory: directory of the cache (a sub folder for each intermediary code)
+            :param intermediary_code: intermediary code
+            :param ref_month_start: first day of the reference month (e.g. 2023-06-01)
+            :param retention_months: number of months kept in the cache (months of the bank in the database)
+        """
+
+        self.directory = os.path.join(cache_directory, str(intermediary_code))
+        self.months = self._private_get_window(ref_month_start, int(retention_months))
+        self.index = None
+
+    @staticmethod
+    def _private_get_window(ref_month_start: str, retention_months: int) -> list:
+        """
+            get the months of the window kept in the cache (the last one is the reference month)
+            :param ref_month_start: first day of the reference month
+            :param retention_months: number of months kept in the cache
+            :return: list of months (e.g. 2023-06)
+        """
+
+        ref_date = datetime.strptime(ref_month_start, format_date)
+        return [(ref_date - relativedelta(months=i)).strftime(operations_cache_month_format)
+                for i in range(max(1, retention_months) - 1, -1, -1)]
+
+    def _private_get_partition_path(self, month: str) -> str:
+        """
+            get the path of the partition of the month
+            :param month: month of the partition (e.g. 2023-06)
+            :return: path of the partition
+        """
+
+        return os.path.join(self.directory, month + operations_cache_extension)
+
+    def _private_load_index(self) -> dict:
+        """
+            load the index of the partitions ({month: {'ndgs': ndg covered, 'closed': month complete}})
+            :return: index
+        """
+
+        if self.index is not None: return self.index
+
+        index_path = os.path.join(self.directory, operations_cache_index)
+        if not os.path.exists(index_path):
+            self.index = {}
+            return self.index
+
+        try:
+            with open(index_path, 'r') as file:
+                self.index = json.load(file)
+        except (ValueError, OSError) as e:
+            log.warning(f'>> Invalid operations cache index {index_path}, the cache is rebuilt ({e})')
+            self.index = {}
+        return self.index
+
+    def _private_save_index(self):
+        """
+            save the index of the partitions
+        """
+
+        with open(os.path.join(self.directory, operations_cache_index), 'w') as file:
+            json.dump(self.index, file)
+
+    def _private_evict(self):
+        """
+            remove the partitions older than the retention window
+        """
+
+        for month in [month for month in self.index if month < self.months[0]]:
+            path = self._private_get_partition_path(month)
+            if os.path.exists(path): os.remove(path)
+            del self.index[month]
+            log.debug(f'>> Operations cache partition {month} evicted')
+
+    @staticmethod
+    def _private_get_column(operations: pd.DataFrame, column: str) -> str:
+        """
+            get the name of the column in the operations (the names are case-insensitive in dwa)
+            :param operations: operations dataframe
+            :param column: name of the column
+            :return: name of the column in the dataframe
+        """
+
+        for name in operations.columns:
+            if str(name).upper() == column: return name
+        raise ValueError(f'>> Column {column} not found in the operations')
+
+    @staticmethod
+    def cast(operations: pd.DataFrame) -> pd.DataFrame:
+        """
+            cast the operations to the dtypes stored in the cache (categories and other columns as string), the dates
+            and amounts that can not be cast are replaced with missing values (warning with their number)
+            :param operations: operations dataframe
+            :return: operations dataframe cast
+        """
+
+        dtypes = get_storage_dtypes(operations.columns, operations_dtype)
+        return cast_columns(operations.copy(), dtypes, errors='coerce')
+
+    def get_cached(self, ndgs: list) -> (pd.DataFrame, list, list, str):
+        """
+            split the ndg in ndg covered by the cache (only the missing months are extracted) and new ndg
+            :param ndgs: ndg to process
+            :return: cached operations, covered ndg, new ndg, first day of the first month to extract
+        """
+
+        index = self._private_load_index()
+
+        # closed partitions at the beginning of the window (the reference month is always extracted)
+        cached_months = []
+        for month in self.months[:-1]:
+            if month not in index or not index[month]['closed'] or \
+                    not os.path.exists(self._private_get_partition_path(month)):
+                break
+            cached_months.append(month)
+
+        start_date = datetime.strptime(self.months[len(cached_months)], operations_cache_month_format)
+        if len(cached_months) == 0:
+            return None, [], list(ndgs), start_date.strftime(format_date)
+
+        covered = set(ndgs)
+        for month in cached_months:
+            covered &= set(index[month]['ndgs'])
+
+        covered_ndgs = [ndg for ndg in ndgs if ndg in covered]
+        new_ndgs = [ndg for ndg in ndgs if ndg not in covered]
+
+        cached = pd.concat([pd.read_parquet(self._private_get_partition_path(month)) for month in cached_months])
+        cached = cached[cached[self._private_get_column(cached, ndg_name)].isin(covered)]
+
+        log.info(f'>> Operations cache: {len(cached_months)} months cached, {len(covered_ndgs)} ndg covered, '
+                 f'{len(new_ndgs)} new ndg')
+        return cached, covered_ndgs, new_ndgs, start_date.strftime(format_date)
+
+    def update(self, ndgs: list, new_ndgs: list, operations: pd.DataFrame, start_date: str):
+        """
+            save the operations extracted from dwa in the partitions and evict the old partitions
+            :param ndgs: ndg processed
+            :param new_ndgs: ndg extracted for all the months
+            :param operations: operations extracted from dwa (missing months of the covered ndg and new ndg)
+            :param start_date: first day of the first month extracted for the covered ndg
+        """
+
+        index = self._private_load_index()
+        os.makedirs(self.directory, exist_ok=True)
+
+        operations = self.cast(operations)
+        dates = pd.to_datetime(operations[self._private_get_column(operations, date_operation_name)], errors='coerce')
+        months = dates.dt.strftime(operations_cache_month_format)
+        start_month = start_date[:7]
+
+        # a partition is complete only if it is written after the end of the month
+        current_month = datetime.now().strftime(operations_cache_month_format)
+
+        for month in self.months:
+            month_operations = operations[months == month]
+
+            # extracted months are rewritten, the operations of the new ndg are added to the previous months
+            if month < start_month:
+                previous = pd.read_parquet(self._private_get_partition_path(month))
+                previous = previous[~previous[self._private_get_column(previous, ndg_name)].isin(new_ndgs)]
+                month_operations = pd.concat([previous, month_operations])
+                coverage = set(index[month]['ndgs']) | set(new_ndgs)
+            else:
+                coverage = set(ndgs)
+
+            month_operations.reset_index(drop=True).to_parquet(self._private_get_partition_path(month), index=False)
+            index[month] = {'ndgs': sorted(coverage), 'closed': month < current_month}
+
+        self._private_evict()
+        self._private_save_index()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: schema (columns and dtypes) of the datasets read from dwa
+@TODO:
+"""
+
+import pandas as pd
+import logging as log
+from kassandra.config_module.extraction_config import datetime_dtype, float_dtype, category_dtype, storage_dtype
+
+
+def project_query(query: str, schema: dict) -> str:
+    """
+        select only the columns of the schema in the query
+        :param query: query to execute
+        :param schema: schema of the dataset (column: dtype)
+        :return: query with the projection of the columns
+    """
+
+    columns = ', '.join(f'SRC.{column}' for column in schema)
+    return f"SELECT {columns} FROM ({query.strip().rstrip(';')}) SRC"
+
+
+def cast_columns(dataframe: pd.DataFrame, dtypes: dict, errors: str = 'raise') -> pd.DataFrame:
+    """
+        cast the columns of the dataframe (None keeps the dtype read from the database)
+        :param dataframe: dataframe to cast
+        :param dtypes: dtypes of the columns (column: dtype)
+        :param errors: raise (ValueError if a value can not be cast) or coerce (missing value and warning with the
+                       number of values coerced) for the dates and the amounts
+        :return: dataframe with the columns cast
+    """
+
+    if errors not in ['raise', 'coerce']:
+        raise ValueError(f'>> Invalid errors option {errors}, options: raise, coerce')
+
+    for column, dtype in dtypes.items():
+        if dtype is None or dataframe[column].dtype == dtype: continue
+
+        if dtype in [datetime_dtype, float_dtype]:
+            if dtype == datetime_dtype:
+                values = pd.to_datetime(dataframe[column], errors='coerce')
+            else:
+                values = pd.to_numeric(dataframe[column], errors='coerce').astype(float_dtype)
+
+            # values not missing in the database (empty strings are missing) and missing after the cast
+            original = dataframe[column]
+            coerced = values.isna() & original.notna()
+            if not pd.api.types.is_numeric_dtype(original):
+                coerced &= original.astype('string').str.strip().ne('').fillna(False).astype(bool)
+            if coerced.any():
+                message = f'>> {coerced.sum()} values of {column} can not be cast to {dtype} ' \
+                          f'(e.g. {dataframe.loc[coerced, column].iloc[:3].tolist()})'
+                if errors == 'raise': raise ValueError(message)
+                log.warning(f'{message}, replaced with missing values')
+            dataframe[column] = values
+        else:
+            dataframe[column] = dataframe[column].astype(dtype)
+    return dataframe
+
+
+def apply_schema(dataframe: pd.DataFrame, schema: dict, errors: str = 'raise') -> pd.DataFrame:
+    """
+        keep only the columns of the schema (upper case) and cast them to the dtype of the schema
+        :param dataframe: dataframe read from dwa
+        :param schema: schema of the dataset (column: dtype)
+        :param errors: raise or coerce the values that can not be cast (see cast_columns)
+        :return: dataframe with the schema applied
+    """
+
+    dataframe.columns = dataframe.columns.str.upper()
+
+    missing_columns = [column for column in schema if column not in dataframe.columns]
+    if len(missing_columns) > 0:
+        raise ValueError(f'>> Columns not found in the dataset: {missing_columns}')
+
+    return cast_columns(dataframe[list(schema)].copy(), schema, errors)
+
+
+def get_storage_dtypes(columns: list, dtype: any) -> dict:
+    """
+        get the dtypes to store a dataset on disk (categories and columns without a dtype are stored as string)
+        :param columns: columns of the dataset
+        :param dtype: dtype of the dataset (a dtype for all the columns or a dict column: dtype)
+        :return: dtypes of the columns (column: dtype)
+    """
+
+    if not isinstance(dtype, dict):
+        return {column: dtype for column in columns}
+
+    dtypes = {column: dtype.get(str(column).upper()) for column in columns}
+    return {column: storage_dtype if value in [None, category_dtype] else value for column, value in dtypes.items()}
+
+
+def get_categorical_columns(columns: list, dtype: any) -> dict:
+    """
+        get the categorical columns of a dataset (to restore them after the storage on disk)
+        :param columns: columns of the dataset
+        :param dtype: dtype of the dataset (a dtype for all the columns or a dict column: dtype)
+        :return: dtypes of the categorical columns (column: category)
+    """
+
+    if not isinstance(dtype, dict): return {}
+    return {column: category_dtype for column in columns if dtype.get(str(column).upper()) == category_dtype}
@@ -9,6 +9,7 @@
 """
 
 import os
+import numpy as np
 import pandas as pd
 import logging as log
 from kassandra.config_module import app_config as apc
@@ -17,13 +18,16 @@ from kassandra.features_creation.features_objects.subject_features import Subjec
 from kassandra.features_creation.features_objects.categorization_data import ListValues
 from kassandra.features_creation.features_objects.operation_features import OperationsSubjectsFeatures, OperationsFeatures
 from kassandra.features_creation.features_objects.target_features import TargetFeatures
+from kassandra.features_creation.features_objects.ndg_encoder import NdgEncoder
+from kassandra.features_creation.features_objects.reference_data import ReferenceDataRegistry
 from kassandra.config_module import feature_creation_config as cfg
 
 
 class BuildFeatures:
     def __init__(self, subjects: pd.DataFrame, operations: pd.DataFrame,
                  operations_subjects: pd.DataFrame, target_information: pd.DataFrame,
-                 months_operations: int, given_date: str = None, bank_months: int = None) -> None:
+                 months_operations: int, given_date: str = None, bank_months: int = None,
+                 partitions: int = 1) -> None:
         """
             :param subjects: subject information (NDG, ...)
             :param operations: operations information (COD_OPERATION, ...)
@@ -32,23 +36,67 @@ class BuildFeatures:
             :param months_operations: number of months for operations features
             :param given_date: date of the report
             :param bank_months: number of months of the bank in the database
+            :param partitions: number of ndg partitions built one at a time (1 means all the subjects together)
         """
 
         log.debug('>> Initializing BuildFeatures object')
         log.debug(f'>> Given date: {given_date}')
         log.debug(f'>> Bank months: {bank_months}')
         log.debug(f'>> Months operations: {months_operations}')
+        log.debug(f'>> Partitions: {partitions}')
+
+        self._private_column_trans_file = cfg.column_trans_file
+        self._private_column_names_file = cfg.column_names_file
+
+        self._private_partitions = max(int(partitions), 1)
+        self._private_arguments = {'months_operations': months_operations, 'given_date': given_date,
+                                   'bank_months': bank_months}
+
+        if self._private_partitions > 1:
+            # the objects of each partition are created by iter_features, the target of all the subjects is kept
+            # for the status of the training (the target is small compared to the operations)
+            self._private_split_inputs(subjects, operations, operations_subjects, target_information)
+            self._private_target = TargetFeatures(self._private_inputs['target_information'], given_date,
+                                                  self._private_get_n_months())
+            self._private_ndg_encoder = None
+        else:
+            self._private_create_objects(subjects, operations, operations_subjects, target_information)
+
+    def _private_get_n_months(self) -> int:
+        """
+            :return: months of the target before the operations features (None if the bank months are not given)
+        """
+
+        if self._private_arguments['bank_months'] is None: return None
+        return self._private_arguments['bank_months'] - self._private_arguments['months_operations']
+
+    def _private_create_objects(self, subjects: pd.DataFrame, operations: pd.DataFrame,
+                                operations_subjects: pd.DataFrame, target_information: pd.DataFrame) -> None:
+        """
+            create the features objects of all the subjects
+            :param subjects: subject information (NDG, ...)
+            :param operations: operations information (COD_OPERATION, ...)
+            :param operations_subjects: operations subjects information (NDG, COD_OPERATION, ...)
+            :param target_information: target information (STATUS, DATE_REPORT, ...)
+        """
+
+        months_operations = self._private_arguments['months_operations']
+        given_date = self._private_arguments['given_date']
+
+        # reference data shared by the registry (loaded again only when the files change)
+        self._private_registry = ReferenceDataRegistry() if cfg.reference_data_registry else None
+        if self._private_registry is not None:
+            list_values = self._private_registry.get_list_values()
+            analytical_causal = self._private_registry.get_analytical_causal()
+        else:
+            list_values, analytical_causal = ListValues(), AnalyticalCausal()
 
-        list_values = ListValues()
         self._private_subjects = SubjectFeatures(subjects, list_values)
 
-        n_months = None
-        if bank_months is not None:
-            n_months = bank_months - months_operations
-        self._private_target = TargetFeatures(target_information, given_date, n_months)
+        self._private_target = TargetFeatures(target_information, given_date, self._private_get_n_months())
 
         self._private_operations = OperationsFeatures(dataframe=operations, columns=cfg.operations_columns, dtype=cfg.operations_dtype,
-                                                      analytical_causal=AnalyticalCausal(), country_risk=list_values,
+                                                      analytical_causal=analytical_causal, country_risk=list_values,
                                                       months_operations=months_operations, target_object=self._private_target,
                                                       last_anomaly_date=given_date)
 
@@ -56,10 +104,71 @@ class BuildFeatures:
                                                                        cfg.operations_subject_columns,
                                                                        cfg.operations_subject_dtype)
 
-        self._private_province_country_cat = ProvinceCategorization()
+        # shared integer encoding of the ndg of subjects, operations subjects and target
+        self._private_ndg_encoder = None
+        if cfg.encode_ndg:
+            ndg_objects = [self._private_subjects, self._private_operations_subjects, self._private_target]
+            self._private_ndg_encoder = NdgEncoder([ndg_object.get_ndgs() for ndg_object in ndg_objects])
+            for ndg_object in ndg_objects:
+                ndg_object.encode_ndg(self._private_ndg_encoder)
+
+    def _private_split_inputs(self, subjects: pd.DataFrame, operations: pd.DataFrame,
+                              operations_subjects: pd.DataFrame, target_information: pd.DataFrame) -> None:
+        """
+            assign each row to the partition of its ndg (the rows are copied only when the partition is built)
+            :param subjects: subject information (NDG, ...)
+            :param operations: operations information (COD_OPERATION, ...)
+            :param operations_subjects: operations subjects information (NDG, COD_OPERATION, ...)
+            :param target_information: target information (STATUS, DATE_REPORT, ...)
+        """
+
+        # columns renamed on shallow copies (the data is not copied and the columns of the caller are not changed)
+        inputs = {'subjects': subjects, 'operations': operations, 'operations_subjects': operations_subjects,
+                  'target_information': target_information}
+        self._private_inputs = {name: dataframe.rename(columns=str.upper, copy=False)
+                                for name, dataframe in inputs.items()}
 
-        self._private_column_trans_file = 'encoder.joblib'
-        self._private_column_names_file = 'column_names.joblib'
+        self._private_inputs_partitions = {name: get_ndg_partitions(self._private_inputs[name][cfg.ndg_name],
+                                                                    self._private_partitions)
+                                           for name in ['subjects', 'operations_subjects', 'target_information']}
+
+        # the operations are assigned to the partitions of their subjects (an operation can be in more partitions)
+        code_column = cfg.merge_operation_subject_columns
+        self._private_operations_codes = self._private_inputs['operations'][code_column]
+        self._private_operations_codes = self._private_operations_codes.astype(cfg.operations_dtype[code_column],
+                                                                               copy=False)
+
+    def _private_get_partition(self, partition: int) -> dict:
+        """
+            :param partition: partition of the ndg (0, ..., partitions - 1)
+            :return: inputs of the subjects of the partition (subjects, operations, operations subjects, target)
+        """
+
+        inputs = {name: self._private_inputs[name][ndg_partitions == partition]
+                  for name, ndg_partitions in self._private_inputs_partitions.items()}
+
+        codes = inputs['operations_subjects'][cfg.merge_operation_subject_columns]
+        codes = codes.astype(cfg.operations_subject_dtype, copy=False).unique()
+        inputs['operations'] = self._private_inputs['operations'][self._private_operations_codes.isin(codes).to_numpy()]
+        return inputs
+
+    def iter_features(self) -> iter:
+        """
+            build the features one ndg partition at a time (the peak memory depends on the size of the partition and
+            not on the size of the bank), the partitions without subjects are skipped
+            :return: generator of the features of each partition (same rows and columns of the monolithic path)
+        """
+
+        if self._private_partitions == 1:
+            yield self()
+            return
+
+        for partition in range(self._private_partitions):
+            inputs = self._private_get_partition(partition)
+            if inputs['operations_subjects'].empty: continue
+
+            log.info(f'>> Building features of the partition {partition + 1}/{self._private_partitions}...')
+            yield BuildFeatures(**inputs, **self._private_arguments)()
 
     def __call__(self) -> pd.DataFrame:
         """
@@ -67,6 +176,16 @@ class BuildFeatures:
             :return: dataframe with all the features for the model
         """
 
+        if self._private_partitions > 1:
+            features = list(self.iter_features())
+
+            # no subjects in the partitions (empty output of the monolithic path)
+            if len(features) == 0:
+                return BuildFeatures(**self._private_inputs, **self._private_arguments)()
+
+            # the monolithic path returns the ndg sorted (grouped by ndg)
+            return pd.concat(features).sort_index(kind='mergesort')
+
         log.info('>> Building features...')
 
         # operation features
@@ -77,7 +196,10 @@ class BuildFeatures:
         matching_column_name_province = 'SIGLA'
 
         log.info(">> Processing province features...")
-        provinces_processed = self._private_province_country_cat()
+        if self._private_registry is not None:
+            provinces_processed = self._private_registry.get_province_categorization(apc.cache_directory)
+        else:
+            provinces_processed = ProvinceCategorization(apc.cache_directory)()
 
         log.info('>> Processing subject features...')
         subjects_processed = self._private_subjects(self._private_operations, matching_column_name_province)
@@ -104,9 +226,32 @@ class BuildFeatures:
             else:
                 inputs[col].fillna('other'.upper(), inplace=True)
 
-        return inputs
+        return self._private_decode_index(inputs)
+
+    def _private_decode_index(self, dataframe: any) -> any:
+        """
+            decode the integer codes of the ndg in the index
+            :param dataframe: dataframe or series with the ndg codes as index
+            :return: dataframe or series with the ndg as index
+        """
+
+        if self._private_ndg_encoder is not None:
+            dataframe.index = self._private_ndg_encoder.decode(dataframe.index)
+        return dataframe
 
     @staticmethod
     def _check_encoders_folder():
         if not os.path.exists(apc.encoders_directory):
-            os.mkdir(apc.encoders_directory)
\ No newline at end of file
+            os.mkdir(apc.encoders_directory)
+
+
+def get_ndg_partitions(ndgs: pd.Series, partitions: int) -> np.ndarray:
+    """
+        stable hash partition of the ndg (the same ndg is in the same partition in every run and process)
+        :param ndgs: ndg column
+        :param partitions: number of partitions
+        :return: partition of each ndg (0, ..., partitions - 1)
+    """
+
+    hashes = pd.util.hash_pandas_object(ndgs.astype(cfg.ndg_dtype), index=False).to_numpy()
+    return (hashes % np.uint64(partitions)).astype(np.int64)
\ No newline at end of file
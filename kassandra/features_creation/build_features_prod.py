@@ -8,29 +8,32 @@
 @TODO:
 """
 
+import os
 import logging as log
 import pandas as pd
 import joblib
 import shap
 import kassandra.config_module.feature_creation_config as cfg
 from kassandra.features_creation.build_features import BuildFeatures
+from kassandra.features_creation.shap_explainer import create_explainer, load_explainer_bundle, get_explainer_path
 from kassandra.config_module import app_config as apc
 
 
 class BuildFeaturesProd(BuildFeatures):
     def __init__(self, operations: pd.DataFrame, operation_subjects: pd.DataFrame, subjects: pd.DataFrame,
-                 target_information: pd.DataFrame, bank_months: int = None) -> None:
+                 target_information: pd.DataFrame, bank_months: int = None, partitions: int = 1) -> None:
         """
             :param operations: operations information (COD_OPERATION, ...)
             :param operation_subjects: operations subjects information (NDG, COD_OPERATION, ...)
             :param subjects: subject information (NDG, ...)
             :param target_information: target information (STATUS, DATE_REPORT, ...)
             :param bank_months: number of months (operations) saved in the bank's database
+            :param partitions: number of ndg partitions built one at a time (1 means all the subjects together)
         """
 
         super().__init__(subjects=subjects, operations=operations, operations_subjects=operation_subjects,
                          target_information=target_information, months_operations=cfg.operations_months_features,
-                         bank_months=bank_months)
+                         bank_months=bank_months, partitions=partitions)
         self._private_dataset = super().__call__()
 
     def get_transformed_prod(self) -> pd.DataFrame:
@@ -70,20 +73,49 @@ class BuildFeaturesProd(BuildFeatures):
         return self._private_dataset
 
     @staticmethod
-    def get_shap_explainer(model_object: any, explainer: shap = shap.Explainer) -> any:
+    def get_shap_explainer(model_object: any, explainer: shap = shap.Explainer, mode: str = None,
+                           background_size: int = None, model_name_date: str = None, columns: list = None) -> any:
         """
-            method for creating the shap explainer
+            method for creating the shap explainer (loaded from the bundle saved with the model if present)
             :param model_object: model to explain its predictions (must have a predict method)
-            :param explainer: shap object (default: shap.Explainer)
+            :param explainer: shap object of the background modes (default: shap.Explainer)
+            :param mode: explainer mode (auto, tree, sampled, kmeans, full), default from the configuration
+            :param background_size: number of rows of the summarised background, default from the configuration
+            :param model_name_date: name of the model (e.g. 20230701.joblib) to load its explainer bundle
+            :param columns: features of the model in order (default: column names saved with the encoder), a bundle
+                            with different columns is rebuilt
             :return: shap explainer object for the given model
         """
 
+        mode = mode if mode is not None else apc.shap_explainer_mode
+        if model_name_date is not None:
+            explainer_path = get_explainer_path(apc.models_directory, model_name_date, cfg.explainer_extension)
+            if os.path.exists(explainer_path):
+                try:
+                    if columns is None:
+                        columns = joblib.load(f'{apc.encoders_directory}/' + cfg.column_names_file)
+                    shap_explainer, bundle = load_explainer_bundle(explainer_path, model_object, explainer=explainer,
+                                                                   columns=columns)
+                    probability = bundle['mode'] != 'full' or apc.shap_full_probability
+                    if mode in ['auto', bundle['mode']] and bundle.get('probability', True) == probability:
+                        log.info(f'>> Shap explainer loaded from {explainer_path} ({bundle["mode"]} mode)')
+                        return shap_explainer
+                    log.info(f'>> Shap explainer bundle in {bundle["mode"]} mode, {mode} mode requested '
+                             f'(probability {bundle.get("probability", True)})')
+                except Exception as e:
+                    log.warning(f'>> Error while loading the explainer bundle {explainer_path}: {e}')
+
         try:
             shap_df = pd.read_csv(apc.data_directory + cfg.x_train_name, sep=',', dtype=float)
         except Exception as e:
             raise FileNotFoundError(f'>> Error while loading the test csv for the explainer: {e}')
 
         try:
-            return explainer(model_object.predict, shap_df)
+            background_size = background_size if background_size is not None else apc.shap_background_size
+            shap_explainer, mode = create_explainer(model_object, shap_df, mode=mode, background_size=background_size,
+                                                    fallback_mode=apc.shap_fallback_mode, explainer=explainer,
+                                                    full_probability=apc.shap_full_probability)
+            log.info(f'>> Shap explainer created ({mode} mode)')
+            return shap_explainer
         except Exception as e:
             raise ValueError(f'>> Error while creating the explainer: {e}')
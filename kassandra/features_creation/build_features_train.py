@@ -14,6 +14,8 @@ import joblib
 import kassandra.config_module.feature_creation_config as cfg
 from kassandra.features_creation.build_features import BuildFeatures
 from kassandra.config_module import app_config as apc
+from kassandra.features_creation.shap_explainer import create_explainer_bundle, save_explainer_bundle, \
+    get_explainer_path
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.compose import make_column_transformer
@@ -22,7 +24,7 @@ from sklearn.compose import make_column_transformer
 class BuildFeaturesTrain(BuildFeatures):
     def __init__(self, operations: pd.DataFrame, operation_subjects: pd.DataFrame, subjects: pd.DataFrame,
                  target_information: pd.DataFrame, given_date: str, test_size: float, shuffle: bool,
-                 random_state: int, stratify: any = None) -> None:
+                 random_state: int, stratify: any = None, partitions: int = 1) -> None:
         """
             :param operations: operations information (COD_OPERATION, ...)
             :param operation_subjects: operations subjects information (NDG, COD_OPERATION, ...)
@@ -33,11 +35,12 @@ class BuildFeaturesTrain(BuildFeatures):
             :param shuffle: shuffle for the split
             :param random_state: random state for reproducibility
             :param stratify: stratify for the split
+            :param partitions: number of ndg partitions built one at a time (1 means all the subjects together)
         """
 
         super().__init__(subjects=subjects, operations=operations, operations_subjects=operation_subjects,
                          target_information=target_information, months_operations=cfg.operations_months_features,
-                         given_date=given_date)
+                         given_date=given_date, partitions=partitions)
 
         self._test_size = test_size
         self._shuffle = shuffle
@@ -48,6 +51,7 @@ class BuildFeaturesTrain(BuildFeatures):
         self._x_test = None
         self._y_train = None
         self._y_test = None
+        self._x_train_trans = None
 
     def _get_split_data_inputs(self) -> None:
         """
@@ -56,7 +60,7 @@ class BuildFeaturesTrain(BuildFeatures):
         """
 
         x = super().__call__()
-        y = self._private_target.get_status()
+        y = self._private_decode_index(self._private_target.get_status().copy())
 
         # for each ndg present in x and not in y create a new row with status 0
         x = pd.merge(x, y, how='left', left_index=True, right_index=True)
@@ -139,6 +143,8 @@ class BuildFeaturesTrain(BuildFeatures):
         except Exception as e:
             raise ValueError(f'>> Error while transforming the data: {e}')
 
+        self._x_train_trans = x_train_trans_df
+
         # save the transformed test for production use
         if apc.save_model:
             try:
@@ -149,6 +155,56 @@ class BuildFeaturesTrain(BuildFeatures):
 
         return x_train_trans_df, x_test_trans_df, self._y_train, self._y_test
 
+    def save_explainer(self, model_object: any, model_name_date: str, mode: str = None,
+                       background_size: int = None) -> str:
+        """
+            save the explainer bundle of the trained model next to the model (loaded by the production)
+            :param model_object: trained model
+            :param model_name_date: name of the model (e.g. 20230701)
+            :param mode: explainer mode (auto, tree, sampled, kmeans, full), default from the configuration
+            :param background_size: number of rows of the summarised background, default from the configuration
+            :return: path of the explainer bundle
+        """
+
+        if self._x_train_trans is None:
+            raise ValueError('>> Transform the train data before saving the explainer')
+
+        try:
+            bundle = create_explainer_bundle(model_object, self._x_train_trans,
+                                             mode=mode if mode is not None else apc.shap_explainer_mode,
+                                             background_size=background_size if background_size is not None
+                                             else apc.shap_background_size,
+                                             fallback_mode=apc.shap_fallback_mode,
+                                             full_probability=apc.shap_full_probability)
+            os.makedirs(apc.models_directory, exist_ok=True)
+            explainer_path = get_explainer_path(apc.models_directory, model_name_date, cfg.explainer_extension)
+            save_explainer_bundle(bundle, explainer_path)
+        except Exception as e:
+            raise ValueError(f'>> Error while saving the explainer: {e}')
+
+        return explainer_path
+
+    def save_model(self, model_object: any, model_name_date: str) -> str:
+        """
+            save the trained model in the models directory with its explainer bundle (last step of the training)
+            :param model_object: trained model
+            :param model_name_date: name of the model (e.g. 20230701)
+            :return: path of the model, None if the models are not saved
+        """
+
+        if not apc.save_model:
+            return None
+
+        try:
+            os.makedirs(apc.models_directory, exist_ok=True)
+            model_path = os.path.join(apc.models_directory, os.path.splitext(model_name_date)[0] + cfg.model_extension)
+            joblib.dump(model_object, model_path)
+        except Exception as e:
+            raise ValueError(f'>> Error while saving the model: {e}')
+
+        self.save_explainer(model_object, model_name_date)
+        return model_path
+
 
 def _check_ml_models_folder():
     if not os.path.exists(apc.data_directory):
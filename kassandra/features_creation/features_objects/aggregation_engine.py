@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: AggregationEngine object (operations statistics for each subject and sign in a single grouped pass)
+@TODO:
+"""
+
+import numpy as np
+import pandas as pd
+from kassandra.config_module import feature_creation_config as cfg
+
+
+class AggregationEngine:
+    def __init__(self, analytical_causal: pd.DataFrame, country_risk: list):
+        """
+            :param analytical_causal: analytical causal dataframe (a column of causal codes for each group)
+            :param country_risk: list of high risk countries
+        """
+
+        self.analytical_causal = analytical_causal
+        self.country_risk = country_risk
+        self.signs = [cfg.sign_options_in, cfg.sign_options_out]
+
+    @staticmethod
+    def _private_membership(column: pd.Series, values: any) -> np.ndarray:
+        """
+            compute the isin of the column on the unique values only (integer code of each operation)
+            :param column: column of the operations
+            :param values: values to match (same semantic of Series.isin, missing values included)
+            :return: boolean array (one element for each operation)
+        """
+
+        codes, uniques = pd.factorize(column, use_na_sentinel=False)
+        return pd.Series(uniques).isin(values).to_numpy()[codes]
+
+    def _private_causal_matrix(self, causal: pd.Series) -> np.ndarray:
+        """
+            compute the causal category membership of each operation
+            :param causal: causal column of the operations
+            :return: boolean matrix (operations x analytical causal columns)
+        """
+
+        codes, uniques = pd.factorize(causal, use_na_sentinel=False)
+        uniques = pd.Series(uniques)
+        categories = np.column_stack([uniques.isin(self.analytical_causal[name]).to_numpy()
+                                      for name in self.analytical_causal.columns])
+        return categories.reshape(len(uniques), len(self.analytical_causal.columns))[codes]
+
+    def _private_unstack(self, statistics: pd.DataFrame, rows: pd.DataFrame, name: str) -> pd.DataFrame:
+        """
+            one column for each sign, missing when there is no operation for the subject and the sign
+            :param statistics: statistics grouped by subject and sign
+            :param rows: number of operations grouped by subject and sign
+            :param name: prefix of the output columns
+            :return: statistics for each subject (e.g. name_A, name_D)
+        """
+
+        statistics = statistics.where(rows > 0).unstack()
+        statistics = statistics.reindex(columns=self.signs)
+        statistics.columns = [name + '_' + sign for sign in self.signs]
+        return statistics
+
+    def __call__(self, operations_processed: pd.DataFrame) -> pd.DataFrame:
+        """
+            compute the mean and analytical causal features for each subject and sign
+            :param operations_processed: operations processed (NDG, SIGN, AMOUNT, MONTH_YEAR, CAUSAL, ...)
+            :return: df with the features (NDG, AVG_FREQ_A, ..., AVG_RISCHIO_PAESE_D)
+        """
+
+        causal_names = [name.upper() for name in self.analytical_causal.columns]
+        output_columns = [column for column in cfg.output_features_columns if column != cfg.not_to_alert_freq_column]
+
+        if operations_processed is None or operations_processed.empty:
+            return pd.DataFrame([], columns=output_columns)
+
+        amount = operations_processed[cfg.amount_column]
+        amount_notnull = amount.notna().to_numpy()
+        country_risk = self._private_membership(operations_processed[cfg.counterpart_column], self.country_risk)
+        causal = self._private_causal_matrix(operations_processed[cfg.causal_column])
+
+        # columns aggregated together (number of operations for the missing values of each statistic)
+        frame = pd.DataFrame({cfg.ndg_name: operations_processed[cfg.ndg_name],
+                              cfg.sign_column: operations_processed[cfg.sign_column],
+                              cfg.amount_column: amount,
+                              cfg.month_year_column: operations_processed[cfg.month_year_column],
+                              'ROWS': 1,
+                              'RISK_AMOUNT': amount.where(country_risk),
+                              'RISK_ROWS': country_risk.astype(np.int64)})
+        causal_freq = pd.DataFrame(causal & amount_notnull[:, None], columns=causal_names, index=frame.index)
+        causal_rows = pd.DataFrame(causal, columns=[name + '_ROWS' for name in causal_names], index=frame.index)
+        frame = pd.concat([frame, causal_freq.astype(np.int64), causal_rows.astype(np.int64)], axis=1)
+
+        # single grouped pass on subject and sign
+        grouped = frame.groupby([cfg.ndg_name, cfg.sign_column], observed=True)
+        sums = grouped[[cfg.amount_column, 'ROWS', 'RISK_AMOUNT', 'RISK_ROWS'] + causal_names +
+                       list(causal_rows.columns)].sum()
+        months = grouped[cfg.month_year_column].nunique()
+        freq = grouped[cfg.amount_column].count()
+
+        features = pd.concat([self._private_unstack(sums[cfg.amount_column], sums['ROWS'], 'TOT_AMOUNT'),
+                              self._private_unstack(months, sums['ROWS'], 'TOT_MONTHS'),
+                              self._private_unstack(freq, sums['ROWS'], 'TOT_FREQ'),
+                              self._private_unstack(sums['RISK_AMOUNT'], sums['RISK_ROWS'], 'RISCHIO_PAESE_TOT')] +
+                             [self._private_unstack(sums[name], sums[name + '_ROWS'], name + '_FREQ')
+                              for name in causal_names], axis=1)
+
+        # compute the mean features for each sign and subject
+        for sign in self.signs:
+            features['AVG_AMOUNT_' + sign] = features['TOT_AMOUNT_' + sign] / features['TOT_MONTHS_' + sign]
+            features['AVG_FREQ_' + sign] = features['TOT_FREQ_' + sign] / features['TOT_MONTHS_' + sign]
+            for name in causal_names:
+                features['AVG_' + name + '_FREQ_' + sign] = features[name + '_FREQ_' + sign] / features['TOT_MONTHS_' + sign]
+            features['AVG_RISCHIO_PAESE_' + sign] = features['RISCHIO_PAESE_TOT_' + sign] / features['TOT_AMOUNT_' + sign]
+
+        return features.reset_index()[output_columns]
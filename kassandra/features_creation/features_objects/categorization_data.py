@@ -8,21 +8,37 @@
 @TODO:
 """
 
+import os
+import joblib
+import logging as log
+import numpy as np
 import pandas as pd
 from kassandra.config_module import feature_creation_config as cfg
 
 
 class ProvinceCategorization:
-    def __init__(self):
+    def __init__(self, cache_directory: str = None):
+        """
+            :param cache_directory: directory of the precomputed province features (None means no cache)
+        """
+
         self._private_province = None
         self._private_province_processed = pd.DataFrame()
+        self._private_cache_directory = cache_directory
 
     def __call__(self) -> (pd.DataFrame, pd.DataFrame):
         """
-            load and process country/province categorization
+            load and process country/province categorization (precomputed table if the cache is valid)
             :return: province and country categorization
         """
 
+        cache_key = self.get_cache_key() if self._private_cache_directory is not None else None
+        if cache_key is not None:
+            province_processed = self._private_load_cache(cache_key)
+            if province_processed is not None:
+                self._private_province_processed = province_processed
+                return self._private_province_processed
+
         try:
             # load province/country categorization
             self._private_load_province_list()
@@ -37,8 +53,58 @@ class ProvinceCategorization:
         except Exception as e:
             raise ValueError(f'>> Error loading and processing province/country categorization: {e}')
 
+        if cache_key is not None:
+            self._private_save_cache(cache_key)
+
         return self._private_province_processed
 
+    @staticmethod
+    def get_cache_key() -> str:
+        """
+            :return: key of the province features (xlsx modification time and size, categorization configuration)
+        """
+
+        try:
+            stat = os.stat(cfg.country_province_path)
+        except OSError:
+            return None
+
+        return joblib.hash([stat.st_mtime_ns, stat.st_size, cfg.province_sheet_name, cfg.province_columns,
+                            cfg.province_categorization_dict, cfg.province_features_to_not_process])
+
+    def _private_load_cache(self, cache_key: str) -> pd.DataFrame:
+        """
+            :param cache_key: key of the province features
+            :return: precomputed province features (None if missing or invalid)
+        """
+
+        cache_path = os.path.join(self._private_cache_directory, cfg.province_cache_file)
+        if not os.path.exists(cache_path): return None
+
+        try:
+            cache = joblib.load(cache_path)
+        except Exception as e:
+            log.warning(f'>> Invalid province features cache {cache_path} ({e})')
+            return None
+
+        if cache.get('key') != cache_key: return None
+        return cache['province_processed'].copy()
+
+    def _private_save_cache(self, cache_key: str) -> None:
+        """
+            save the province features (written on a temporary file and renamed for concurrent runs)
+            :param cache_key: key of the province features
+        """
+
+        cache_path = os.path.join(self._private_cache_directory, cfg.province_cache_file)
+        try:
+            os.makedirs(self._private_cache_directory, exist_ok=True)
+            joblib.dump({'key': cache_key, 'province_processed': self._private_province_processed},
+                        f'{cache_path}.{os.getpid()}')
+            os.replace(f'{cache_path}.{os.getpid()}', cache_path)
+        except OSError as e:
+            log.warning(f'>> Province features cache not saved ({e})')
+
     def _private_load_province_list(self) -> None:
         """
             :return: Province/Country categorization dataframe
@@ -59,24 +125,23 @@ class ProvinceCategorization:
             :return: None
         """
 
-        # sort the dictionary by value
-        sorted_dict = dict(sorted(dict_value_category.items(), key=lambda x: x[1], reverse=True))
+        # sort the dictionary by value (the first category is kept in case of equal values)
+        sorted_dict = sorted(dict_value_category.items(), key=lambda x: x[1], reverse=True)
+        categories = np.array([key for key, _ in sorted_dict] + [default_category], dtype=object)
+        thresholds = np.array([value for _, value in sorted_dict], dtype=float)
 
-        category_list = []
-        for province_value in self._private_province[column]:
-            category = default_category
-            for key, value in sorted_dict.items():
-                if province_value >= value:
-                    category = key
-                    break
-            category_list.append(category)
+        # the category is the first threshold lower or equal to the value (number of thresholds greater than the value)
+        values = self._private_province[column].to_numpy(dtype=float)
+        index = len(thresholds) - np.searchsorted(thresholds[::-1], values, side='right')
+        index[np.isnan(values)] = len(thresholds)
 
-        self._private_province_processed[column.upper() + ' ' + infix_feature_name] = category_list
+        self._private_province_processed[column.upper() + ' ' + infix_feature_name] = categories[index].tolist()
 
 
 class ListValues:
     def __init__(self):
         self._private_list_values = self._private_load_list_values()
+        self._private_categories_lookup = {}
 
     @staticmethod
     def _private_load_list_values() -> pd.DataFrame:
@@ -90,10 +155,20 @@ class ListValues:
 
     def get_list_values(self) -> pd.DataFrame:
         """
-            :return: list values dataframe
+            :return: list values dataframe (copy, the object can be shared by the reference data registry)
+        """
+
+        return self._private_list_values.copy()
+
+    def get_categories_lookup(self, prefix_name: str) -> dict:
+        """
+            :param prefix_name: prefix of the category columns (e.g. PRV)
+            :return: value -> category dictionary (built once for each prefix)
         """
 
-        return self._private_list_values
+        if prefix_name not in self._private_categories_lookup:
+            self._private_categories_lookup[prefix_name] = build_categories_lookup(self._private_list_values, prefix_name)
+        return self._private_categories_lookup[prefix_name]
 
     def get_country_risk(self, highest_risk_name: str = 'RISCHIO_PAESE_ALTISSIMO',
                          high_risk_name: str = 'RISCHIO_PAESE_ALTO') -> list:
@@ -108,6 +183,21 @@ class ListValues:
         return highest_risk + high_risk
 
 
+def build_categories_lookup(list_values: pd.DataFrame, prefix_name: str) -> dict:
+    """
+        invert the category columns of the list values (the first category of a value is kept)
+        :param list_values: list values dataframe
+        :param prefix_name: prefix of the category columns (e.g. PRV)
+        :return: value -> category dictionary
+    """
+
+    lookup = {}
+    for column in [col for col in list_values.columns if col.startswith(prefix_name)]:
+        for value in list_values[column].dropna().unique().tolist():
+            lookup.setdefault(value, column)
+    return lookup
+
+
 class AnalyticalCausal:
     def __init__(self):
         self._private_analytical_causal = self._private_load_analytical_causal()
@@ -123,7 +213,7 @@ class AnalyticalCausal:
 
     def get_analytical_causal(self) -> pd.DataFrame:
         """
-            :return: analytical causal dataframe
+            :return: analytical causal dataframe (copy, the object can be shared by the reference data registry)
         """
 
-        return self._private_analytical_causal
\ No newline at end of file
+        return self._private_analytical_causal.copy()
\ No newline at end of file
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: NdgEncoder object (shared dictionary encoding of the ndg to integer codes)
+@TODO:
+"""
+
+import numpy as np
+import pandas as pd
+from kassandra.config_module import feature_creation_config as cfg
+
+
+class NdgEncoder:
+    def __init__(self, ndgs: list):
+        """
+            :param ndgs: list of ndg columns (pd.Series) to encode, the codes follow the order of the sorted ndg
+                         (sorting and grouping by code give the same order of the strings)
+        """
+
+        values = pd.concat([pd.Series(ndg, dtype=cfg.ndg_dtype) for ndg in ndgs], ignore_index=True)
+        self._private_ndgs = pd.Index(values.dropna().unique(), dtype=cfg.ndg_dtype).sort_values()
+
+        if len(self._private_ndgs) > np.iinfo(np.int32).max:
+            raise ValueError(f'>> Too many ndg to encode: {len(self._private_ndgs)}')
+
+    def encode(self, ndgs: pd.Series) -> pd.Series:
+        """
+            encode the ndg (missing or unknown ndg are encoded as missing values)
+            :param ndgs: ndg column
+            :return: integer codes of the ndg (nullable Int32)
+        """
+
+        codes = self._private_ndgs.get_indexer(ndgs.astype(cfg.ndg_dtype))
+        return pd.Series(pd.arrays.IntegerArray(codes.astype(np.int32), codes < 0), index=ndgs.index,
+                         name=ndgs.name, dtype=cfg.ndg_code_dtype)
+
+    def decode(self, codes: any) -> pd.Index:
+        """
+            decode the integer codes to the ndg
+            :param codes: integer codes (Series or Index)
+            :return: ndg index
+        """
+
+        codes = pd.array(codes, dtype=cfg.ndg_code_dtype)
+        values = self._private_ndgs.array.take(codes.to_numpy(dtype=np.int64, na_value=-1), allow_fill=True)
+        return pd.Index(values, dtype=cfg.ndg_dtype, name=cfg.ndg_name)
+
+    def __len__(self) -> int:
+        """
+            :return: number of ndg encoded
+        """
+
+        return len(self._private_ndgs)
@@ -9,6 +9,8 @@
 """
 
 import pandas as pd
+from kassandra.config_module import feature_creation_config as cfg
+from kassandra.extraction.schema import cast_columns
 
 
 class ObjectFeatures:
@@ -36,9 +38,26 @@ class ObjectFeatures:
             if not isinstance(dtype, dict):
                 dataframe = dataframe.astype(dtype)
             else:
-                for key, value in dtype.items():
-                    dataframe.loc[:, key] = dataframe[key].astype(value)
+                # columns already cast during the extraction are kept, the values of the dates and amounts that can
+                # not be cast are replaced with missing values (warning with their number)
+                dataframe = cast_columns(dataframe.copy(), dtype, errors='coerce')
         except Exception as e:
             raise AttributeError(f'>> Error in _private_preprocess: {e}')
 
-        return dataframe
\ No newline at end of file
+        return dataframe
+
+    def encode_ndg(self, ndg_encoder: any) -> None:
+        """
+            replace the ndg with the integer codes of the encoder (merges, sorts and groupbys on integer keys)
+            :param ndg_encoder: NdgEncoder object
+        """
+
+        self._private_dataframe = self._private_dataframe.assign(**{cfg.ndg_name: ndg_encoder.encode(
+            self._private_dataframe[cfg.ndg_name])})
+
+    def get_ndgs(self) -> pd.Series:
+        """
+            :return: ndg column of the preprocessed dataframe
+        """
+
+        return self._private_dataframe[cfg.ndg_name]
@@ -13,6 +13,7 @@ import numpy as np
 import pandas as pd
 from kassandra.config_module import feature_creation_config as cfg
 from kassandra.features_creation.features_objects.object_features import ObjectFeatures
+from kassandra.features_creation.features_objects.aggregation_engine import AggregationEngine
 from kassandra.features_creation.features_objects.categorization_data import ListValues, AnalyticalCausal
 from kassandra.features_creation.features_objects.target_features import TargetFeatures
 
@@ -53,7 +54,7 @@ class OperationsSubjectsFeatures(ObjectFeatures):
 class OperationsFeatures(ObjectFeatures):
     def __init__(self, dataframe: pd.DataFrame, columns: list, dtype: any, analytical_causal: AnalyticalCausal,
                  target_object: TargetFeatures, country_risk: ListValues, months_operations: int = 12,
-                 last_anomaly_date: str = None):
+                 last_anomaly_date: str = None, vectorised_aggregation: bool = cfg.vectorised_aggregation):
         """
             :param dataframe: Operations dataframe
             :param columns: columns to keep
@@ -63,6 +64,7 @@ class OperationsFeatures(ObjectFeatures):
             :param country_risk: country risk object
             :param months_operations: number of months to consider for the operations (default: 12)
             :param last_anomaly_date: last date of the anomaly only for the training phase (default: None)
+            :param vectorised_aggregation: compute all the statistics with the AggregationEngine (single grouped pass)
         """
 
         super().__init__(dataframe, columns, dtype)
@@ -72,6 +74,7 @@ class OperationsFeatures(ObjectFeatures):
         self.analytics_causals = analytical_causal.get_analytical_causal()
         self.country_risk = country_risk.get_country_risk()
         self.target = target_object
+        self.vectorised_aggregation = vectorised_aggregation
 
         self._private_processed_operations = None
         self._private_operations_subjects_merged = None
@@ -297,13 +300,19 @@ class OperationsFeatures(ObjectFeatures):
         log.debug(">> Postprocessing merge of operations and subjects")
         operations_processed = self._private_post_processing_merge(operations_subjects_merged)
 
-        # compute mean features
-        log.debug(">> Computing mean features")
-        mean_features = self._private_compute_mean_features(operations_processed)
+        if self.vectorised_aggregation:
+            # compute mean and analytical causal features in a single grouped pass
+            log.debug(">> Computing mean and analytical causal features")
+            engine = AggregationEngine(self.analytics_causals, self.country_risk)
+            analytical_causal_features = engine(operations_processed)
+        else:
+            # compute mean features
+            log.debug(">> Computing mean features")
+            mean_features = self._private_compute_mean_features(operations_processed)
 
-        # compute analytical causal features
-        log.debug(">> Computing analytical causal features")
-        analytical_causal_features = self._private_compute_analytical_causal_features(operations_processed, mean_features)
+            # compute analytical causal features
+            log.debug(">> Computing analytical causal features")
+            analytical_causal_features = self._private_compute_analytical_causal_features(operations_processed, mean_features)
 
         # add target features
         log.debug(">> Adding target features")
@@ -336,7 +345,7 @@ def group_and_aggregate(df: pd.DataFrame, group_cols: list, count_col: str, oper
         return pd.DataFrame([], columns=[cfg.ndg_name, rename_cols[cfg.sign_options_in],
                                          rename_cols[cfg.sign_options_out]])
 
-    df = df.copy().groupby(group_cols)[count_col]
+    df = df.copy().groupby(group_cols, observed=True)[count_col]
 
     if operation_type == 'sum':
         result = df.sum()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: ReferenceDataRegistry object (static reference data loaded once for each process)
+@TODO:
+"""
+
+import os
+import time
+import threading
+import pandas as pd
+import logging as log
+from kassandra.config_module import feature_creation_config as cfg
+from kassandra.features_creation.features_objects.categorization_data import ProvinceCategorization, \
+    AnalyticalCausal, ListValues
+
+
+def get_file_stamp(path: str) -> tuple:
+    """
+        :param path: path of the file
+        :return: path, modification time and size of the file (None if the file does not exist)
+    """
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return path, None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+class ReferenceDataRegistry:
+    _instance = None
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls, *args, **kwargs)
+        return cls._instance
+
+    def __init__(self):
+        """
+            process-wide registry of the reference data, the objects are shared between the callers (they are reloaded
+            only when the source file changes) and their getters return copies of the tables
+        """
+
+        if not self._initialized:
+            self._private_lock = threading.RLock()
+            self._private_entries = {}
+            self._private_statistics = {}
+            self._initialized = True
+
+    def get(self, name: str, loader: callable, stamp: any) -> any:
+        """
+            get a reference data, loaded again only if the stamp is changed
+            :param name: name of the reference data
+            :param loader: function to load the reference data
+            :param stamp: stamp of the source (e.g. modification time and size of the file)
+            :return: reference data
+        """
+
+        with self._private_lock:
+            statistics = self._private_statistics.setdefault(name, {'hits': 0, 'misses': 0, 'loads': 0,
+                                                                    'load_time': 0.0})
+            entry = self._private_entries.get(name)
+            if entry is not None and entry[0] == stamp:
+                statistics['hits'] += 1
+                return entry[1]
+
+            statistics['misses'] += 1
+            start = time.perf_counter()
+            value = loader()
+            elapsed = time.perf_counter() - start
+
+            statistics['loads'] += 1
+            statistics['load_time'] += elapsed
+            self._private_entries[name] = (stamp, value)
+            log.debug(f'>> Reference data {name} loaded in {elapsed:.3f} s')
+            return value
+
+    def get_list_values(self) -> ListValues:
+        """
+            :return: list values object
+        """
+
+        return self.get('list_values', ListValues, get_file_stamp(cfg.list_values_path))
+
+    def get_analytical_causal(self) -> AnalyticalCausal:
+        """
+            :return: analytical causal object
+        """
+
+        return self.get('analytical_causal', AnalyticalCausal, get_file_stamp(cfg.analytical_causal_path))
+
+    def get_province_categorization(self, cache_directory: str = None) -> pd.DataFrame:
+        """
+            :param cache_directory: directory of the precomputed province features (None means no cache)
+            :return: province and country categorization (copy of the shared table)
+        """
+
+        province_processed = self.get('province_categorization', lambda: ProvinceCategorization(cache_directory)(),
+                                      ProvinceCategorization.get_cache_key())
+        return province_processed.copy()
+
+    def get_statistics(self) -> dict:
+        """
+            :return: hits, misses, loads and load time (seconds) of each reference data
+        """
+
+        with self._private_lock:
+            return {name: dict(statistics) for name, statistics in self._private_statistics.items()}
+
+    def clear(self) -> None:
+        """
+            remove the reference data and the statistics (the next calls load the data again)
+        """
+
+        with self._private_lock:
+            self._private_entries.clear()
+            self._private_statistics.clear()
@@ -9,11 +9,12 @@
 """
 
 import logging as log
+import numpy as np
 import pandas as pd
 from kassandra.config_module import feature_creation_config as cfg
 from datetime import datetime
 from kassandra.features_creation.features_objects.object_features import ObjectFeatures
-from kassandra.features_creation.features_objects.categorization_data import ListValues
+from kassandra.features_creation.features_objects.categorization_data import ListValues, build_categories_lookup
 
 
 class SubjectFeatures(ObjectFeatures):
@@ -25,6 +26,7 @@ class SubjectFeatures(ObjectFeatures):
 
         super().__init__(subjects, cfg.subjects_columns, cfg.subjects_dtypes)
         self._private_list_values = list_values.get_list_values()
+        self._private_list_values_object = list_values
 
     def __call__(self, operation_object: ObjectFeatures, matching_column_name: str = 'SIGLA') -> pd.DataFrame:
         """
@@ -64,24 +66,22 @@ class SubjectFeatures(ObjectFeatures):
             :return: None
         """
 
-        cat_columns = [col for col in self._private_list_values.columns if col.startswith(prefix_name)]
-        categories_df = self._private_list_values[cat_columns]
-        categories_dict = {}
-        for column in categories_df.columns:
-            categories_dict[column] = categories_df[column].dropna().unique().tolist()
-
-        # function for categorize the value
-        def categorize_value(value):
-            for category, values in categories_dict.items():
-                if str(value) in values:
-                    return category
-            if str(value) in cfg.na_values_list or pd.isna(str(value)):
-                return f'{prefix_name.upper()}_{none_suffix}'
-            else:
-                return f'{prefix_name.upper()}_{other_suffix}'
-
-        # apply the function to the column
-        self._private_dataframe[row_name] = self._private_dataframe[row_name].map(categorize_value)
+        # value -> category dictionary (cached by the list values object)
+        if isinstance(self._private_list_values_object, ListValues):
+            lookup = self._private_list_values_object.get_categories_lookup(prefix_name)
+        else:
+            lookup = build_categories_lookup(self._private_list_values, prefix_name)
+
+        none_category, other_category = f'{prefix_name.upper()}_{none_suffix}', f'{prefix_name.upper()}_{other_suffix}'
+        na_values = set(cfg.na_values_list)
+
+        # categorize only the unique values of the column (the values are compared as strings)
+        codes, uniques = pd.factorize(self._private_dataframe[row_name], use_na_sentinel=False)
+        categories = [lookup.get(str(value), none_category if str(value) in na_values else other_category)
+                      for value in uniques]
+        categories = np.array(categories, dtype=object)[codes]
+
+        self._private_dataframe[row_name] = pd.Series(categories, index=self._private_dataframe.index, dtype=object)
 
     def _private_categorize_age(self, operation_object: ObjectFeatures, default_name: str = 'NOT_FOUND') -> None:
         """
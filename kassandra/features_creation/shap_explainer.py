@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: factory of the shap explainers (exact tree explainer or permutation explainer on a summarised background)
+@TODO:
+"""
+
+import os
+import time
+import shap
+import joblib
+import numpy as np
+import pandas as pd
+import logging as log
+
+explainer_modes = ['auto', 'tree', 'sampled', 'kmeans', 'full']
+
+
+def get_predict_function(model_object: any, probability: bool = True) -> callable:
+    """
+        function explained by the background explainers (probability of the positive class, the score of the subject)
+        :param model_object: model to explain (predict_proba or predict method)
+        :param probability: False to explain the output of predict (full mode of the previous versions)
+        :return: function from the features to the score
+    """
+
+    if probability and hasattr(model_object, 'predict_proba'):
+        return lambda x: model_object.predict_proba(x)[:, -1]
+    return model_object.predict
+
+
+def get_background(data: pd.DataFrame, mode: str, background_size: int, random_state: int = 0) -> pd.DataFrame:
+    """
+        summarise the background of the explainer
+        :param data: background data (e.g. x_train)
+        :param mode: sampled (random rows), kmeans (centroids rounded to the values of the data) or full (all the rows)
+        :param background_size: number of rows of the summarised background
+        :param random_state: seed of the sampling and of the k-means
+        :return: background data
+    """
+
+    if mode == 'full' or data.shape[0] <= background_size:
+        return data
+    if mode == 'sampled':
+        return data.sample(n=background_size, random_state=random_state)
+    if mode == 'kmeans':
+        np.random.seed(random_state)
+        return pd.DataFrame(shap.kmeans(data, background_size).data, columns=data.columns)
+    raise ValueError(f'>> Invalid background mode {mode}')
+
+
+def create_explainer(model_object: any, data: pd.DataFrame, mode: str = 'auto', background_size: int = 100,
+                     fallback_mode: str = 'kmeans', explainer: any = shap.Explainer, random_state: int = 0,
+                     full_probability: bool = False) -> (any, str):
+    """
+        create the shap explainer of the model
+        :param model_object: model to explain
+        :param data: background data (e.g. x_train)
+        :param mode: auto (tree if the model is supported, fallback mode otherwise), tree, sampled, kmeans or full
+        :param background_size: number of rows of the summarised background
+        :param fallback_mode: mode used by auto for the models not supported by the tree explainer
+        :param explainer: shap object of the background modes (default: shap.Explainer)
+        :param random_state: seed of the summarised background
+        :param full_probability: True to explain the probability in the full mode too (default: output of predict,
+                                 as the explainer of the previous versions)
+        :return: explainer, mode used
+    """
+
+    if mode not in explainer_modes or fallback_mode not in explainer_modes[2:]:
+        raise ValueError(f'>> Invalid explainer mode {mode} (fallback {fallback_mode}), options: {explainer_modes}')
+
+    if mode in ['auto', 'tree']:
+        background = get_background(data, 'sampled', background_size, random_state)
+        try:
+            # exact shap values of the probability (interventional on the background)
+            return shap.TreeExplainer(model_object, data=background, feature_perturbation='interventional',
+                                      model_output='probability'), 'tree'
+        except Exception as e:
+            if mode == 'tree':
+                raise ValueError(f'>> Model not supported by the tree explainer: {e}')
+            log.debug(f'>> Model not supported by the tree explainer, {fallback_mode} background used ({e})')
+            mode = fallback_mode
+
+    background = get_background(data, mode, background_size, random_state)
+    if mode == 'full' and not full_probability:
+        return explainer(get_predict_function(model_object, probability=False), background), mode
+
+    masker = shap.maskers.Independent(background, max_samples=background.shape[0])
+    return explainer(get_predict_function(model_object), masker), mode
+
+
+def create_explainer_bundle(model_object: any, data: pd.DataFrame, mode: str = 'auto', background_size: int = 100,
+                            fallback_mode: str = 'kmeans', random_state: int = 0,
+                            full_probability: bool = False) -> dict:
+    """
+        create the explainer bundle saved next to the model (the explainer is stored only for the tree mode, the
+        background explainers are rebuilt on the summarised background)
+        :param model_object: model to explain
+        :param data: background data (e.g. x_train)
+        :param mode: explainer mode (auto, tree, sampled, kmeans, full)
+        :param background_size: number of rows of the summarised background
+        :param fallback_mode: mode used by auto for the models not supported by the tree explainer
+        :param random_state: seed of the summarised background
+        :param full_probability: True to explain the probability in the full mode too (default: output of predict)
+        :return: bundle (mode, columns, background, expected value, probability, explainer)
+    """
+
+    explainer, mode = create_explainer(model_object, data, mode=mode, background_size=background_size,
+                                       fallback_mode=fallback_mode, random_state=random_state,
+                                       full_probability=full_probability)
+    probability = mode != 'full' or full_probability
+
+    if mode == 'tree':
+        background = get_background(data, 'sampled', background_size, random_state)
+        expected_value = np.asarray(explainer.expected_value).reshape(-1)[-1]
+    else:
+        background = get_background(data, mode, background_size, random_state)
+        expected_value = np.mean(get_predict_function(model_object, probability)(background))
+        explainer = None
+
+    return {'mode': mode, 'columns': list(data.columns), 'background': background.to_numpy(dtype=float),
+            'expected_value': float(expected_value), 'probability': probability, 'explainer': explainer}
+
+
+def get_explainer_path(models_directory: str, model_name_date: str, extension: str = '.explainer') -> str:
+    """
+        :param models_directory: directory of the models
+        :param model_name_date: name of the model (e.g. 20230701 or 20230701.joblib)
+        :param extension: extension of the explainer bundle
+        :return: path of the explainer bundle of the model
+    """
+
+    return os.path.join(models_directory, os.path.splitext(model_name_date)[0] + extension)
+
+
+def save_explainer_bundle(bundle: dict, path: str) -> None:
+    """
+        save the explainer bundle (not compressed, the arrays can be memory-mapped)
+        :param bundle: explainer bundle
+        :param path: path of the bundle
+    """
+
+    joblib.dump(bundle, path)
+
+
+def load_explainer_bundle(path: str, model_object: any, explainer: any = shap.Explainer,
+                          columns: list = None) -> (any, dict):
+    """
+        load the explainer bundle with the arrays memory-mapped
+        :param path: path of the bundle
+        :param model_object: model to explain (used by the background explainers)
+        :param explainer: shap object of the background modes (default: shap.Explainer)
+        :param columns: features of the model in order (None means not validated)
+        :return: explainer, bundle
+    """
+
+    bundle = joblib.load(path, mmap_mode='r')
+    if columns is not None and list(bundle['columns']) != list(columns):
+        raise ValueError(f'>> Columns of the explainer bundle {path} do not match the features of the model')
+    if bundle['explainer'] is not None:
+        return bundle['explainer'], bundle
+
+    background = pd.DataFrame(bundle['background'], columns=bundle['columns'])
+    if not bundle.get('probability', True):
+        return explainer(get_predict_function(model_object, probability=False), background), bundle
+
+    masker = shap.maskers.Independent(background, max_samples=background.shape[0])
+    return explainer(get_predict_function(model_object), masker), bundle
+
+
+def get_shap_values(explanation: any) -> np.ndarray:
+    """
+        get the shap values (subjects x features) of the positive class
+        :param explanation: output of the explainer
+        :return: shap values
+    """
+
+    values = np.asarray(explanation.values)
+    return values[..., -1] if values.ndim == 3 else values
+
+
+def compare_explainers(model_object: any, data: pd.DataFrame, samples: pd.DataFrame, modes: list = None,
+                       background_size: int = 100, reference_mode: str = 'full', random_state: int = 0) -> pd.DataFrame:
+    """
+        compare time and approximation error of the explainer modes
+        :param model_object: model to explain
+        :param data: background data (e.g. x_train)
+        :param samples: subjects to explain
+        :param modes: modes to compare (default: tree, sampled, kmeans)
+        :param background_size: number of rows of the summarised background
+        :param reference_mode: mode of the reference shap values
+        :param random_state: seed of the summarised background
+        :return: df with seconds, mean and max absolute error with respect to the reference for each mode (all the
+                 modes explain the probability)
+    """
+
+    modes = modes if modes is not None else ['tree', 'sampled', 'kmeans']
+
+    results, values = [], {}
+    for mode in [reference_mode] + [mode for mode in modes if mode != reference_mode]:
+        start = time.perf_counter()
+        explainer, _ = create_explainer(model_object, data, mode=mode, background_size=background_size,
+                                        random_state=random_state, full_probability=True)
+        values[mode] = get_shap_values(explainer(samples))
+        seconds = time.perf_counter() - start
+
+        error = np.abs(values[mode] - values[reference_mode])
+        results.append({'MODE': mode, 'SECONDS': seconds, 'MEAN_ABS_ERROR': error.mean(),
+                        'MAX_ABS_ERROR': error.max()})
+        log.info(f'>> Explainer {mode}: {seconds:.3f} s, mean absolute error {error.mean():.6f}')
+
+    return pd.DataFrame(results)
@@ -8,10 +8,21 @@
 @TODO:
 """
 
+import re
 import xml.etree.ElementTree as et
 import numpy as np
 import pandas as pd
 import datetime
+import logging as log
+
+# refmonth attribute of the XML (YYYYMM or MM/YYYY), a simple element of the attributes block as in parse_xml_date
+# (the tags are case-sensitive, the id is not)
+refmonth_pattern = re.compile(r'<attributes>(?:\s*<simple>(?:(?!</simple>).)*</simple>)*?\s*'
+                              r'<simple>\s*<id>(?i:refmonth)</id>\s*<value>(?:(?P<YEAR>\d{4})(?P<MONTH>\d{2})|'
+                              r'(?P<MONTH_SLASH>\d{1,2})/(?P<YEAR_SLASH>\d{4}))</value>\s*</simple>', re.DOTALL)
+
+# rows of the regex compared with the XML parsing (the regex is not used if a date is different)
+refmonth_check_size = 100
 
 
 def clear_dataset_from_db(df: pd.DataFrame) -> pd.DataFrame:
@@ -58,24 +69,97 @@ def parse_date(date_str: str) -> (int, int):
         raise ValueError(f'>> Invalid date format: {date_str}') from e
 
 
-def update_date(input_df: pd.DataFrame, software: str = 'COMPORTAMENT'):
+def get_anomaly_date(month: int, year: int) -> str:
+    """
+        :param month: month of the anomaly
+        :param year: year of the anomaly
+        :return: date of the anomaly (first day of the month at 01:00, e.g. 2021-10-01 01:00:00.000)
+    """
+
+    data = datetime.datetime(year=year, month=month, day=1, hour=1, minute=0, second=0, microsecond=0)
+    return data.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+
+def parse_xml_date(xml: str) -> str:
+    """
+        parse the XML of the anomaly and extract the date of the refmonth attribute
+        :param xml: XML of the anomaly
+        :return: date of the anomaly (None if the refmonth attribute is not present)
+    """
+
+    for simple in et.fromstring(xml).findall('attributes/simple'):
+        simple_id = simple.find('id')
+        if simple_id is not None and simple_id.text.lower() == 'refmonth':
+            month, year = parse_date(simple.find('value').text)
+            return get_anomaly_date(month, year)
+    return None
+
+
+def extract_refmonth(xml: pd.Series) -> (pd.Series, pd.Series):
+    """
+        extract the refmonth of the XML column with a regex (only the XML with a single refmonth attribute and a value
+        in the format YYYYMM or MM/YYYY in the valid range, the other rows must be parsed as XML)
+        :param xml: XML column
+        :return: dates of the parsed rows, boolean mask of the parsed rows
+    """
+
+    values = xml.where(xml.map(type) == str)
+    parts = values.str.extract(refmonth_pattern)
+    year = pd.to_numeric(parts['YEAR'].fillna(parts['YEAR_SLASH']))
+    month = pd.to_numeric(parts['MONTH'].fillna(parts['MONTH_SLASH']))
+
+    parsed = (values.str.lower().str.count('refmonth') == 1) & (values.str.count('<attributes') == 1) & \
+        month.between(1, 12) & year.between(1900, 2100)
+    if not parsed.any(): return pd.Series([], dtype=object), parsed
+
+    # the anomalies share few months, only the distinct dates are formatted
+    dates = pd.to_datetime(pd.DataFrame({'year': year[parsed], 'month': month[parsed], 'day': 1, 'hour': 1}))
+    codes, uniques = pd.factorize(dates)
+    formatted = uniques.strftime('%Y-%m-%d %H:%M:%S.%f').str[:-3].to_numpy(dtype=object)
+    return pd.Series(formatted[codes], index=dates.index), parsed
+
+
+def check_refmonth(xml: pd.Series, dates: pd.Series, sample_size: int = refmonth_check_size) -> bool:
+    """
+        compare the dates extracted with the regex with the XML parsing on a sample of the rows
+        :param xml: XML column
+        :param dates: dates of the rows parsed with the regex
+        :param sample_size: number of rows compared
+        :return: True if the dates of the sample are the same, False otherwise
+    """
+
+    sample = dates.sample(n=min(sample_size, dates.shape[0]), random_state=0)
+    try:
+        return all(parse_xml_date(xml[i]) == date for i, date in sample.items())
+    except Exception:
+        return False
+
+
+def update_date(input_df: pd.DataFrame, software: str = 'COMPORTAMENT', fast_path: bool = True):
     """
         update the date column of the input dataframe with the date extracted from the XML column.
         :param input_df: input dataframe, it must contain the columns 'XML' and 'DATA'
         :param software: software name, default is 'COMPORTAMENT'
+        :param fast_path: if True, the refmonth is extracted with a regex and only the other rows are parsed as XML
         :return: None
     """
 
     try:
-        comp_df = input_df[input_df['SOFTWARE'] == software]
-        for i, row in comp_df.iterrows():
-            for simple in et.fromstring(row['XML']).findall('attributes/simple'):
-                simple_id = simple.find('id')
-                if simple_id is not None and simple_id.text.lower() == 'refmonth':
-                    month, year = parse_date(simple.find('value').text)
-                    data = datetime.datetime(year=year, month=month, day=1, hour=1, minute=0, second=0, microsecond=0)
-                    input_df.at[i, 'DATA'] = data.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-                    break
+        comp_xml = input_df.loc[input_df['SOFTWARE'] == software, 'XML']
+        if comp_xml.empty: return
+
+        parsed = pd.Series(False, index=comp_xml.index)
+        if fast_path:
+            dates, parsed = extract_refmonth(comp_xml)
+            if not check_refmonth(comp_xml, dates):
+                log.warning('>> Refmonth of the regex different from the XML parsing, all the rows parsed as XML')
+                dates, parsed = pd.Series([], dtype=object), pd.Series(False, index=comp_xml.index)
+            if not dates.empty: input_df.loc[dates.index, 'DATA'] = dates
+
+        # full XML parsing of the rows not handled by the regex
+        for i, xml in comp_xml[~parsed].items():
+            data = parse_xml_date(xml)
+            if data is not None: input_df.at[i, 'DATA'] = data
     except Exception as e:
         raise ValueError(f'>> Error while updating date: {e}')
 
@@ -1,3 +1,3 @@
-from .features import Features, FeatureCategories, Feature
+from .features import Features, FeatureCategories, Feature, FeaturesBatch
 from .subject import Subject
 from .subject_management import SubjectManagement, date_transformation
\ No newline at end of file
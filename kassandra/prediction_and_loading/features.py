@@ -8,6 +8,7 @@
 @TODO:
 """
 
+import numpy as np
 import pandas as pd
 from kassandra.config_module.prediction_and_loading_config import boolean_features_values, currency_features_values, \
     risk_profile_values, round_percentage, round_contributions
@@ -93,21 +94,7 @@ class Features:
             :return: string that will be used for printing in the xml
         """
 
-        if name in self.features_name.boolean_features:
-            if int(self.features_values[name].iloc[0]) == 0: return None
-            return boolean_features_values[int(self.features_values[name].iloc[0])]
-        elif name in self.features_name.binary_features:
-            return str(self.features_values[name].iloc[0].round(1))
-        elif name in self.features_name.numerical_features:
-            if int(self.features_values[name].iloc[0]) == 0: return None
-            return str(int(self.features_values[name].iloc[0]))
-        elif name in self.features_name.currency_features:
-            if int(self.features_values[name].iloc[0]) == 0: return None
-            return currency_features_values + f"{self.features_values[name].iloc[0]:.2f}"
-        elif name == self.features_name.risk_profile_name:
-            return risk_profile_values[int(self.features_values[name].iloc[0])]
-        else:
-            raise ValueError(f">> Feature {name} not found")
+        return get_features_contribution_str(name, self.features_values[name].iloc[0], self.features_name)
 
     def _private_sort_features_by_percentage(self) -> None:
         """
@@ -117,6 +104,135 @@ class Features:
         self.list_features = sorted(self.list_features, key=lambda f: f.percentage_contribution, reverse=True)
 
 
+class FeaturesBatch:
+    def __init__(self, features_values: pd.DataFrame, features_contribution: pd.DataFrame,
+                 features_name: FeatureCategories, max_features: int, min_contribution: float = 0.0):
+        """
+            :param features_values: features value of the subjects (one row for each subject)
+            :param features_contribution: features contribution to the prediction (same index and columns)
+            :param features_name: object that contains the names of the features
+            :param max_features: max number of features to show
+            :param min_contribution: min contribution of the features to show
+        """
+
+        self.features_values = features_values[features_contribution.columns]
+        self.features_contribution = features_contribution
+        self.features_name = features_name
+        self.max_features = max_features
+        self.min_contribution = min_contribution
+
+        # top features of each subject (column position, -1 when the subject has less features to show)
+        self.indices = None
+        self.contributions = None
+        self.percentages = None
+
+    def __call__(self):
+        self._private_process_features()
+
+    def _private_get_eligible(self, contributions: np.ndarray) -> np.ndarray:
+        """
+            features to show (contribution greater than the min and value to print in the xml)
+            :param contributions: absolute contributions rounded
+            :return: boolean matrix (subjects x features)
+        """
+
+        eligible = contributions > self.min_contribution
+
+        # features not printed when their value is zero
+        zero_features = set(self.features_name.boolean_features) | set(self.features_name.numerical_features) | \
+            set(self.features_name.currency_features)
+        zero_columns = [position for position, name in enumerate(self.features_contribution.columns)
+                        if name in zero_features]
+        if len(zero_columns) > 0:
+            values = self.features_values[self.features_contribution.columns[zero_columns]].to_numpy(dtype=float)
+            eligible[:, zero_columns] &= np.trunc(values) != 0
+
+        return eligible
+
+    def _private_process_features(self) -> None:
+        """
+            select the top features of each subject on the whole contribution matrix
+        """
+
+        contributions = np.abs(self.features_contribution.to_numpy(dtype=float))
+        totals = contributions.sum(axis=1, keepdims=True)
+        contributions = np.round(contributions, round_contributions)
+
+        eligible = self._private_get_eligible(contributions)
+        scores = np.where(eligible, contributions, -np.inf)
+
+        # top k features of each subject (not sorted)
+        k = min(self.max_features, scores.shape[1])
+        if k <= 0:
+            self.indices = np.empty((scores.shape[0], 0), dtype=np.int64)
+        elif k < scores.shape[1]:
+            self.indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            self.indices = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+
+        rows = np.arange(scores.shape[0])[:, None]
+        self.contributions = contributions[rows, self.indices]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.percentages = np.round(self.contributions / totals * 100, round_percentage)
+
+        # sort by percentage (and by column position for equal percentages)
+        top_scores = scores[rows, self.indices]
+        order = np.lexsort((self.indices, -np.where(np.isfinite(top_scores), self.percentages, -np.inf)), axis=1)
+        self.indices = np.where(np.isfinite(top_scores[rows, order]), self.indices[rows, order], -1)
+        self.contributions = self.contributions[rows, order]
+        self.percentages = self.percentages[rows, order]
+
+    def get_features(self, position: int) -> Features:
+        """
+            get the features of a subject (list of Feature objects used by the xml)
+            :param position: position of the subject in the batch
+            :return: features of the subject
+        """
+
+        features = Features(features_values=self.features_values.iloc[[position]],
+                            features_contribution=self.features_contribution.iloc[position],
+                            features_name=self.features_name,
+                            max_features=self.max_features,
+                            min_contribution=self.min_contribution)
+
+        for index, contribution, percentage in zip(self.indices[position], self.contributions[position],
+                                                   self.percentages[position]):
+            if index < 0: break
+
+            name = self.features_contribution.columns[index]
+            contribution_str = get_features_contribution_str(name, self.features_values.iat[position, index],
+                                                             self.features_name)
+            features.list_features.append(Feature(name, float(contribution), float(percentage), contribution_str))
+
+        return features
+
+
+def get_features_contribution_str(name: str, value: any, features_name: FeatureCategories) -> any:
+    """
+        define the string that will be used for printing in the xml
+        :param name: feature name
+        :param value: feature value
+        :param features_name: object that contains the names of the features
+        :return: string that will be used for printing in the xml
+    """
+
+    if name in features_name.boolean_features:
+        if int(value) == 0: return None
+        return boolean_features_values[int(value)]
+    elif name in features_name.binary_features:
+        return str(value.round(1))
+    elif name in features_name.numerical_features:
+        if int(value) == 0: return None
+        return str(int(value))
+    elif name in features_name.currency_features:
+        if int(value) == 0: return None
+        return currency_features_values + f"{value:.2f}"
+    elif name == features_name.risk_profile_name:
+        return risk_profile_values[int(value)]
+    else:
+        raise ValueError(f">> Feature {name} not found")
+
+
 class Feature:
     def __init__(self, name: str, contribution: float, percentage_contribution: float, contribution_str: str):
         """
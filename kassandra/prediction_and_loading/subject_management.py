@@ -13,10 +13,13 @@ import pandas as pd
 import sqlalchemy
 import logging as log
 from ml_anomaly_gate import AnomalyGate
-from kassandra.prediction_and_loading.features import Features, FeatureCategories
+from kassandra.prediction_and_loading.features import Features, FeatureCategories, FeaturesBatch
 from kassandra.config_module import prediction_and_loading_config as cfg
 from kassandra.prediction_and_loading.subject import Subject
+from kassandra.features_creation.shap_explainer import get_shap_values
 from kassandra.registry_management import Registry, RegistryLastPrediction
+from kassandra.extraction.exclusion_index import ExclusionIndex, registry_source, other_systems_source
+from kassandra.profiling import StageProfiler
 
 
 class SubjectManagement:
@@ -24,7 +27,9 @@ class SubjectManagement:
                  registry_object: Registry, registry_last_prediction_object: RegistryLastPrediction,
                  evaluation_connection: sqlalchemy, subjects_info: pd.DataFrame,
                  features_categories: FeatureCategories, anomaly_gate: AnomalyGate,
-                 ref_month_anomaly: str, max_features: int = 10, threshold: float = 0.4):
+                 ref_month_anomaly: str, max_features: int = 10, threshold: float = 0.4,
+                 registry_batch_loading: bool = False, batch_size: int = cfg.registry_batch_size,
+                 profiler: StageProfiler = None):
         """
             :param model_object: model object (e.g. sklearn)
             :param model_date_name: name of the model (e.g. 20210101)
@@ -38,6 +43,10 @@ class SubjectManagement:
             :param ref_month_anomaly: reference month
             :param max_features: max number of features to show
             :param threshold: threshold for the prediction
+            :param registry_batch_loading: load the registry rows in batches (one transaction for each batch, the
+            failures are raised at the end of the loading)
+            :param batch_size: number of subjects for each registry transaction
+            :param profiler: profiler of the prediction, shap, subjects and load stages (None means not recorded)
         """
 
         self.list_subjects = []
@@ -55,16 +64,21 @@ class SubjectManagement:
         self.threshold = float(threshold)
         self.max_features = max_features
         self.features_name = features_categories
+        self.registry_batch_loading = registry_batch_loading
+        self.batch_size = max(1, int(batch_size))
+        self.loading_failures = []
+        self.profiler = profiler if profiler is not None else StageProfiler('subject_management', enabled=False)
 
         self.system_id = next(iter(self.anomaly_gate.basic_information.system_name.values()))
         self.control_code = next(iter(self.anomaly_gate.basic_information.code.values()))
         self.intermediary_code = next(iter(self.anomaly_gate.basic_information.bank_code.values()))
 
     def __call__(self, input_to_predict: pd.DataFrame, ndgs_from_registry: list = [],
-                 ndgs_from_other_systems: list = []) -> None:
+                 ndgs_from_other_systems: list = [], exclusion_index: ExclusionIndex = None) -> None:
         """
             predict the probability of default for the input_to_predict
             :param input_to_predict: input to predict (pandas DataFrame)
+            :param exclusion_index: index of the ndg to exclude (if None, built from the registry and other systems)
             :return: predicted probability
         """
 
@@ -79,38 +93,37 @@ class SubjectManagement:
 
             df_predictions, shap_values_df = self._private_predict_and_process(input_to_predict=input_to_predict,
                                                                                ndgs_from_registry=ndgs_from_registry,
-                                                                               ndgs_from_other_systems=ndgs_from_other_systems)
+                                                                               ndgs_from_other_systems=ndgs_from_other_systems,
+                                                                               exclusion_index=exclusion_index)
 
             if df_predictions.empty: return
 
-            for ndg, row in shap_values_df.iterrows():
-                score = round(df_predictions.loc[ndg].values[0], cfg.round_prediction_score)
-                self._private_feature_subject_creation(ndg, row, score, input_to_predict)
+            # top features of all the subjects on the whole shap matrix
+            with self.profiler.stage('subjects', rows=shap_values_df.shape[0]):
+                features_batch = FeaturesBatch(features_values=input_to_predict.loc[shap_values_df.index],
+                                               features_contribution=shap_values_df,
+                                               features_name=self.features_name,
+                                               max_features=self.max_features)
+                features_batch()
+
+                for position, ndg in enumerate(shap_values_df.index):
+                    score = round(df_predictions.loc[ndg].values[0], cfg.round_prediction_score)
+                    self._private_feature_subject_creation(ndg, features_batch.get_features(position), score)
         except Exception as e:
             raise ValueError(f">> Error in prediction/shap implementation. Error: {e}")
 
-        self.create_xml_and_load()
+        with self.profiler.stage('load', rows=len(self.list_subjects)):
+            self.create_xml_and_load()
 
-    def _private_feature_subject_creation(self, ndg: str, row: pd.Series, score: float,
-                                          input_to_predict: pd.DataFrame) -> None:
+    def _private_feature_subject_creation(self, ndg: str, features: Features, score: float) -> None:
         """
             create a Subject object and append it to the list of subjects
             :param ndg: NDG of the subject
+            :param features: features of the subject (processed)
             :param score: score of the subject
-            :param row: row of the shap values
-            :param input_to_predict: input to predict (pandas DataFrame)
             :return: None
         """
 
-        # define the features of the subject
-        features = Features(features_values=input_to_predict.loc[ndg],
-                            features_contribution=row,
-                            features_name=self.features_name,
-                            max_features=self.max_features)
-
-        # process the features
-        features()
-
         # create the subject and append it to the list of subjects
         self.list_subjects.append(Subject(ndg=str(ndg),
                                           name=self.subjects_info.loc[ndg, cfg.name_subject_col],
@@ -126,25 +139,30 @@ class SubjectManagement:
                                           features_values=features))
 
     def _private_predict_and_process(self, input_to_predict: pd.DataFrame, ndgs_from_registry: list,
-                                     ndgs_from_other_systems: list) -> (pd.DataFrame, pd.DataFrame):
+                                     ndgs_from_other_systems: list,
+                                     exclusion_index: ExclusionIndex = None) -> (pd.DataFrame, pd.DataFrame):
         """
             predict and process the results
             :param input_to_predict: input to predict (pandas DataFrame)
             :return: predicted probability, shap values
         """
 
-        predictions = self.model.predict_proba(input_to_predict)[:, 1]
-        df_predictions = pd.DataFrame(predictions, columns=["prediction"], index=input_to_predict.index)
+        if exclusion_index is None: exclusion_index = ExclusionIndex(ndgs_from_registry, ndgs_from_other_systems)
+
+        with self.profiler.stage('prediction', rows=input_to_predict.shape[0]):
+            predictions = self.model.predict_proba(input_to_predict)[:, 1]
+            df_predictions = pd.DataFrame(predictions, columns=["prediction"], index=input_to_predict.index)
 
         log.info(f">> Number of subjects to predict: {df_predictions.shape[0]}")
         log.info(">> Loading predictions on the registry last prediction table...")
 
         # load the predictions to the registry last prediction table
-        self.registry_last_prediction.load(system_id=self.system_id,
-                                           control_code=self.control_code,
-                                           intermediary_code=self.intermediary_code,
-                                           prediction=df_predictions.copy(),
-                                           model_name_date=self.model_date_name)
+        with self.profiler.stage('last_prediction_load', rows=df_predictions.shape[0]):
+            self.registry_last_prediction.load(system_id=self.system_id,
+                                               control_code=self.control_code,
+                                               intermediary_code=self.intermediary_code,
+                                               prediction=df_predictions.copy(),
+                                               model_name_date=self.model_date_name)
 
         # remove subjects with prediction below the threshold
         df_predictions = df_predictions[df_predictions["prediction"] >= self.threshold]
@@ -152,19 +170,21 @@ class SubjectManagement:
         log.info(f">> Number of subjects to predict after threshold: {df_predictions.shape[0]}")
 
         # remove ndg that are in the registry
-        df_predictions = df_predictions[~df_predictions.index.isin(ndgs_from_registry)]
+        df_predictions = df_predictions[~exclusion_index.mask(df_predictions.index, registry_source)]
         log.info(f">> Number of subjects to predict after registry: {df_predictions.shape[0]}")
 
         # remove ndg that are in other systems
-        df_predictions = df_predictions[~df_predictions.index.isin(ndgs_from_other_systems)]
+        df_predictions = df_predictions[~exclusion_index.mask(df_predictions.index, other_systems_source)]
         log.info(f">> Number of subjects to predict after other systems: {df_predictions.shape[0]}")
 
         if df_predictions.empty: return df_predictions, None
 
         input_to_predict = input_to_predict.loc[df_predictions.index]
 
-        shap_values = self.explainer(input_to_predict)
-        shap_values_df = pd.DataFrame(shap_values.values, columns=input_to_predict.columns, index=input_to_predict.index)
+        with self.profiler.stage('shap', rows=input_to_predict.shape[0]):
+            shap_values = self.explainer(input_to_predict)
+            shap_values_df = pd.DataFrame(get_shap_values(shap_values), columns=input_to_predict.columns,
+                                          index=input_to_predict.index)
 
         log.info(">> Shap explanation completed")
 
@@ -175,6 +195,10 @@ class SubjectManagement:
             create the xml file and load the subjects in the evaluation database
         """
 
+        if self.registry_batch_loading:
+            self._private_batch_create_xml_and_load()
+            return
+
         log.info(">> Creating xml for each ndg and loading on db")
 
         for subject in self.list_subjects:
@@ -200,6 +224,82 @@ class SubjectManagement:
 
         log.info(">> Registry loading completed")
 
+    def _private_batch_create_xml_and_load(self) -> None:
+        """
+            create the xml and load the subjects in the evaluation database one at a time (the gate renders and
+            loads a single anomaly), the registry rows in one transaction for each batch; the failures do not stop
+            the loading and are raised at the end
+        """
+
+        log.info(f">> Creating xml for each ndg and loading on db, registry in batches of {self.batch_size} subjects")
+        self.loading_failures = []
+
+        # attributes and tables of all the subjects
+        contents = []
+        for subject in self.list_subjects:
+            try:
+                contents.append((subject, self._private_define_attribute(subject),
+                                 self._private_define_table(subject.features_values)))
+            except Exception as e:
+                self.loading_failures.append({'NDG': subject.ndg, 'STEP': 'xml', 'ERROR': str(e)})
+
+        for start in range(0, len(contents), self.batch_size):
+            batch = contents[start:start + self.batch_size]
+            loaded = self._private_load_batch(batch)
+            self._private_load_registry_batch([subject for subject, _, _ in batch if subject.ndg in loaded])
+
+        if len(self.loading_failures) > 0:
+            log.error(f">> {len(self.loading_failures)} subjects not loaded out of {len(self.list_subjects)}: "
+                      f"{self.loading_failures}")
+            failed = [f"{failure['NDG']}/{failure['STEP']}" for failure in self.loading_failures]
+            raise ValueError(f">> Error in xml creation/loading of {len(failed)} subjects (NDG/STEP): {failed}")
+
+        log.info(">> Registry loading completed")
+
+    def _private_load_batch(self, batch: list) -> set:
+        """
+            load the xml of the batch one subject at a time (the gate loads on the evaluation engine), the failing
+            subjects are reported and not loaded in the registry
+            :param batch: list of (subject, attributes, tables)
+            :return: ndg of the subjects loaded
+        """
+
+        loaded = set()
+        for subject, attributes, tables in batch:
+            try:
+                self.anomaly_gate.define_attribute_list(attribute_list=attributes, table_list=tables)
+                self.anomaly_gate.create_xml()
+                self.anomaly_gate.load_on_db(engine=self.engine)
+                loaded.add(subject.ndg)
+            except Exception as e:
+                self.loading_failures.append({'NDG': subject.ndg, 'STEP': 'evaluation', 'ERROR': str(e)})
+        return loaded
+
+    def _private_load_registry_batch(self, subjects: list) -> None:
+        """
+            load the subjects of the batch in the registry (executemany, one row at a time if the batch fails)
+            :param subjects: subjects loaded in the evaluation database
+        """
+
+        data = [self.registry.get_registry_data(system_id=self.system_id,
+                                                control_code=self.control_code,
+                                                intermediary_code=self.intermediary_code,
+                                                client_id=subject.ndg,
+                                                prediction=subject.score,
+                                                model_name_date=self.model_date_name) for subject in subjects]
+
+        try:
+            self.registry.load_batch_on_db(data)
+            return
+        except Exception as e:
+            if len(subjects) == 1:
+                self.loading_failures.append({'NDG': subjects[0].ndg, 'STEP': 'registry', 'ERROR': str(e)})
+                return
+            log.warning(f">> Registry batch of {len(subjects)} subjects not loaded, loading one row at a time ({e})")
+
+        for subject in subjects:
+            self._private_load_registry_batch([subject])
+
     def _private_define_table(self, features: Features) -> list:
         """
             define the table of the anomaly
@@ -0,0 +1 @@
+from .stage_profiler import StageProfiler, get_peak_rss
\ No newline at end of file
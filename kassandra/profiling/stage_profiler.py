@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: StageProfiler object (wall time, cpu time, peak memory and rows of each stage of a run)
+@TODO:
+"""
+
+import os
+import sys
+import json
+import time
+import logging as log
+from datetime import datetime
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # not available on windows, the peak memory is not recorded
+    resource = None
+
+
+def get_peak_rss() -> float:
+    """
+        :return: peak resident memory of the process in MB (None if not available)
+    """
+
+    if resource is None: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+class StageProfiler:
+    def __init__(self, name: str, enabled: bool = True, log_stages: bool = False, **information):
+        """
+            record the stages of a run
+            :param name: name of the run (e.g. subject_prioritization_oneshot)
+            :param enabled: if False, the stages are executed without being recorded
+            :param log_stages: if True, each stage is also logged when it ends
+            :param information: information of the run saved in the record (e.g. intermediary_code, ref_month)
+        """
+
+        self.name = name
+        self.enabled = enabled
+        self.log_stages = log_stages
+        self.information = information
+        self.stages = []
+
+        self._private_start = time.perf_counter()
+        self._private_start_cpu = time.process_time()
+        self._private_start_date = datetime.now()
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        """
+            record a stage (the rows can be set on the yielded record, e.g. record['rows'] = df.shape[0])
+            :param name: name of the stage
+            :param rows: number of rows processed by the stage
+            :return: record of the stage
+        """
+
+        record = {'stage': name, 'rows': rows}
+        if not self.enabled:
+            yield record
+            return
+
+        peak_rss = get_peak_rss()
+        start, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['seconds'] = round(time.perf_counter() - start, 6)
+            record['cpu_seconds'] = round(time.process_time() - start_cpu, 6)
+            record['peak_rss_delta_mb'] = None if peak_rss is None else round(get_peak_rss() - peak_rss, 3)
+            record['rows_per_second'] = None
+            if record['rows'] is not None and record['seconds'] > 0:
+                record['rows_per_second'] = round(record['rows'] / record['seconds'], 3)
+            self.stages.append(record)
+
+            if self.log_stages:
+                log.info(f'>> Stage {name}: {record["seconds"]:.3f} s, cpu {record["cpu_seconds"]:.3f} s, '
+                         f'peak rss +{record["peak_rss_delta_mb"]} MB, rows {record["rows"]}')
+
+    def to_dict(self) -> dict:
+        """
+            :return: record of the run (information, totals and stages)
+        """
+
+        return {'name': self.name, **self.information,
+                'start': self._private_start_date.isoformat(timespec='seconds'),
+                'seconds': round(time.perf_counter() - self._private_start, 6),
+                'cpu_seconds': round(time.process_time() - self._private_start_cpu, 6),
+                'peak_rss_mb': get_peak_rss(), 'pid': os.getpid(), 'stages': list(self.stages)}
+
+    def save(self, directory: str) -> str:
+        """
+            save the record of the run as json (a file for each run)
+            :param directory: directory of the records
+            :return: path of the record (None if the profiler is disabled)
+        """
+
+        if not self.enabled: return None
+
+        os.makedirs(directory, exist_ok=True)
+        suffix = '_'.join(str(value) for value in self.information.values())
+        file_name = '_'.join(filter(None, [self.name, suffix, self._private_start_date.strftime('%Y%m%d%H%M%S'),
+                                           str(os.getpid())])) + '.json'
+        path = os.path.join(directory, file_name)
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2, default=str)
+        return path
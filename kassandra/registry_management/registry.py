@@ -8,28 +8,35 @@
 @TODO:
 """
 
+import time
 import pandas as pd
 import sqlalchemy
 import logging as log
 from kassandra.config_module import registry_config as rc
-from datetime import datetime
-from sqlalchemy import Index, Table, MetaData, exc, insert, Column, String, Date, Float
+from datetime import datetime, date
+from sqlalchemy import Index, Table, MetaData, exc, insert, delete, select, and_, bindparam, func, Column, String, Date, \
+    Float, Text, LargeBinary
 
 
 class Registry:
     def __init__(self, engine: sqlalchemy, table_name: str = rc.registry_kassandra_name,
-                 index_name: str = rc.registry_kassandra_index_name):
+                 index_name: str = rc.registry_kassandra_index_name, table_ttl: float = rc.table_reflection_ttl):
         """
             init class
             :param engine: db engine
             :param table_name: table name
             :param index_name: index name
+            :param table_ttl: seconds before the table is reflected again (None means until invalidated)
         """
 
         self._private_engine = engine
         self._private_metadata = MetaData()
         self._private_table_name = table_name.lower()
         self._private_index_name = index_name.lower()
+        self._private_table = None
+        self._private_table_time = None
+        self._private_table_ttl = table_ttl
+        self._private_reflections = 0
         self._private_columns_registry = [Column(rc.id_system_name, String(15), primary_key=True),
                                           Column(rc.control_code_name, String(10), nullable=False, primary_key=True),
                                           Column(rc.intermediary_code_name, String(11), nullable=False, primary_key=True),
@@ -83,12 +90,14 @@ class Registry:
 
         return [row[rc.client_id_name] for row in result]
 
-    def get_last_prediction(self, system_id: str, control_code: str, intermediary_code: str) -> pd.DataFrame:
+    def get_last_prediction(self, system_id: str, control_code: str, intermediary_code: str,
+                            server_side: bool = rc.last_prediction_server_side) -> pd.DataFrame:
         """
             get last prediction
             :param system_id: system id to search
             :param control_code: control code to search
             :param intermediary_code: intermediary code to search
+            :param server_side: True to select the latest prediction of each client and model on the db
             :return: last prediction
         """
 
@@ -96,6 +105,9 @@ class Registry:
 
         log.debug(f'>> get_last_prediction: {system_id}, {control_code}, {intermediary_code}')
 
+        if server_side:
+            return self._private_get_last_prediction_server_side(table, system_id, control_code, intermediary_code)
+
         try:
             query = table.select()\
                     .where(table.c[rc.id_system_name] == system_id) \
@@ -115,6 +127,43 @@ class Registry:
         last_predictions_df = last_predictions_df.rename(columns={rc.client_id_name: rc.ndg_name})
         return last_predictions_df
 
+    def _private_get_last_prediction_server_side(self, table: Table, system_id: str, control_code: str,
+                                                 intermediary_code: str) -> pd.DataFrame:
+        """
+            get the latest prediction of each client and model with a window function (only the needed rows and
+            columns are transferred)
+            :param table: table object
+            :param system_id: system id to search
+            :param control_code: control code to search
+            :param intermediary_code: intermediary code to search
+            :return: last prediction
+        """
+
+        try:
+            row_number = func.row_number().over(partition_by=[table.c[rc.client_id_name],
+                                                              table.c[rc.model_name_date_name]],
+                                                order_by=table.c[rc.report_date_name].desc()).label('ROW_NUMBER')
+            ranked = select(table.c[rc.client_id_name], table.c[rc.report_date_name], table.c[rc.prediction_name],
+                            table.c[rc.model_name_date_name], row_number) \
+                .where(table.c[rc.id_system_name] == system_id) \
+                .where(table.c[rc.control_code_name] == control_code) \
+                .where(table.c[rc.intermediary_code_name] == intermediary_code) \
+                .subquery()
+            query = select(ranked.c[rc.client_id_name], ranked.c[rc.prediction_name],
+                           ranked.c[rc.model_name_date_name]) \
+                .where(ranked.c['ROW_NUMBER'] == 1) \
+                .order_by(ranked.c[rc.client_id_name], ranked.c[rc.report_date_name],
+                          ranked.c[rc.model_name_date_name])
+            result = self._private_engine.execute(query)
+        except Exception as e:
+            raise sqlalchemy.exc.SQLAlchemyError(e)
+
+        last_predictions_df = pd.DataFrame(result.fetchall(),
+                                           columns=[rc.client_id_name, rc.prediction_name, rc.model_name_date_name])
+        last_predictions_df = last_predictions_df.astype({rc.client_id_name: str, rc.prediction_name: float,
+                                                          rc.model_name_date_name: str})
+        return last_predictions_df.rename(columns={rc.client_id_name: rc.ndg_name})
+
     def delete_registry(self) -> bool:
         """
             delete registry table
@@ -130,6 +179,7 @@ class Registry:
                 index = Index(self._private_index_name, *table.c)
                 index.drop(self._private_engine)
             table.drop(self._private_engine)
+            self._private_invalidate_table()
             log.info(f">> Table: {self._private_table_name} deleted successfully.")
             return True
         else:
@@ -142,8 +192,11 @@ class Registry:
             :return: True if the table is created, False otherwise
         """
 
-        # create table
-        registry_table = Table(self._private_table_name, self._private_metadata, *self.get_columns_registry())
+        # create table (new column objects, the columns can be assigned to a table invalidated)
+        self._private_invalidate_table()
+        columns = [Column(column.name, column.type, nullable=column.nullable, primary_key=column.primary_key)
+                   for column in self.get_columns_registry()]
+        registry_table = Table(self._private_table_name, self._private_metadata, *columns)
 
         try:
             self._private_metadata.create_all(self._private_engine)
@@ -199,10 +252,32 @@ class Registry:
             :return: True if the data is loaded, False otherwise
         """
 
+        data = self.get_registry_data(system_id=system_id, control_code=control_code,
+                                      intermediary_code=intermediary_code, client_id=client_id,
+                                      prediction=prediction, model_name_date=model_name_date,
+                                      current_date=current_date)
+
+        return self.load_on_db(data)
+
+    @staticmethod
+    def get_registry_data(system_id: str, control_code: str, intermediary_code: str, client_id: str,
+                          prediction: float, model_name_date: str, current_date: datetime = None) -> dict:
+        """
+            get the row of the registry
+            :param system_id: system id
+            :param control_code: control code
+            :param intermediary_code: intermediary code
+            :param client_id: client id
+            :param prediction: prediction value to load
+            :param model_name_date: model name date to load on registry
+            :param current_date: current date to load
+            :return: dict with the data to load
+        """
+
         if current_date is None:
             current_date = datetime.today().date()
 
-        data = {rc.id_system_name: system_id,
+        return {rc.id_system_name: system_id,
                 rc.control_code_name: control_code,
                 rc.intermediary_code_name: intermediary_code,
                 rc.client_id_name: client_id,
@@ -210,8 +285,6 @@ class Registry:
                 rc.prediction_name: prediction,
                 rc.model_name_date_name: model_name_date}
 
-        return self.load_on_db(data)
-
     def load_on_db(self, data: dict, print_error: bool = True) -> bool:
         """
             load data on db
@@ -235,16 +308,229 @@ class Registry:
                 log.warning(f">> Data not loaded ({str(e)})")
             return False
 
+    def load_batch_on_db(self, data: list) -> None:
+        """
+            load the rows on db in a single transaction (executemany)
+            :param data: list of dict with the data to load
+        """
+
+        self.load_many(data, batch_size=max(1, len(data)))
+
+    def _private_get_records(self, records: any, columns: list) -> list:
+        """
+            convert the records to a list of dict with the columns of the table
+            :param records: DataFrame, iterable of dict or iterable of tuples (in the order of the columns)
+            :param columns: columns of the table
+            :return: list of dict
+        """
+
+        if isinstance(records, pd.DataFrame):
+            missing_columns = [column for column in columns if column not in records.columns]
+            if len(missing_columns) > 0:
+                raise ValueError(f">> Columns {missing_columns} not found in the records")
+            records = records[columns].astype(object).where(records[columns].notna(), None)
+            return records.to_dict(orient='records')
+
+        rows = []
+        for record in records:
+            if isinstance(record, dict):
+                rows.append(record)
+            elif len(record) == len(columns):
+                rows.append(dict(zip(columns, record)))
+            else:
+                raise ValueError(f">> Record {record} does not match the columns of {self._private_table_name}")
+        return rows
+
+    def _private_get_existing_keys(self, connection: any, table: Table, rows: list, keys: list) -> set:
+        """
+            get the primary keys of the rows already in the table
+            :param connection: connection of the transaction
+            :param table: table object
+            :param rows: rows to load
+            :param keys: primary key columns
+            :return: set of primary keys (tuples)
+        """
+
+        # filter on the values of each key column, the exact keys are matched in memory
+        condition = and_(*[table.c[key].in_({row[key] for row in rows}) for key in keys])
+        result = connection.execute(select(*[table.c[key] for key in keys]).where(condition))
+        return {self._private_get_key(row) for row in result}
+
+    def _private_has_lob_keys(self, table: Table) -> bool:
+        """
+            verify if the primary key columns are stored as LOB (tables written by to_sql have CLOB/TEXT columns, on
+            oracle they can not be compared with = or IN)
+            :param table: table object
+            :return: True if at least one primary key column is a LOB, False otherwise
+        """
+
+        keys = [column.name for column in self.get_columns_registry() if column.primary_key]
+        return any(isinstance(table.c[key].type, (Text, LargeBinary)) for key in keys if key in table.c)
+
+    @staticmethod
+    def _private_get_key(values: any) -> tuple:
+        """
+            primary key comparable between the records and the rows of the db (dates as timestamps)
+            :param values: values of the primary key columns
+            :return: primary key
+        """
+
+        return tuple(pd.Timestamp(value) if isinstance(value, date) else value for value in values)
+
+    def load_many(self, records: any, batch_size: int = rc.load_many_batch_size, on_conflict: str = 'error') -> int:
+        """
+            load the records on db in batches (executemany, one transaction for each batch), skip and overwrite rely on
+            the primary key of the table against concurrent loads (a rejected batch is loaded row by row)
+            :param records: DataFrame, iterable of dict or iterable of tuples (in the order of the columns)
+            :param batch_size: number of rows for each transaction
+            :param on_conflict: rows with a primary key already in the table, error (raise), skip or overwrite
+            :return: number of rows loaded
+        """
+
+        if on_conflict not in rc.on_conflict_options:
+            raise ValueError(f">> Invalid on conflict policy {on_conflict}, options: {rc.on_conflict_options}")
+
+        table = self.get_table()
+        if table is None:
+            raise exc.SQLAlchemyError(f">> Table: {self._private_table_name} does not exists.")
+        if on_conflict != 'error' and self._private_has_lob_keys(table):
+            raise exc.SQLAlchemyError(f">> Table: {self._private_table_name} has LOB key columns, the existing rows "
+                                      f"can not be compared (recreate the table with the registry columns)")
+
+        rows = self._private_get_records(records, table.columns.keys())
+        keys = [column.name for column in self.get_columns_registry() if column.primary_key]
+
+        # datetime values of the date columns are stored (and compared) as dates
+        date_columns = [column.name for column in table.columns if isinstance(column.type, Date)]
+        for row in rows:
+            for column in date_columns:
+                if isinstance(row.get(column), datetime): row[column] = row[column].date()
+
+        if on_conflict != 'error':
+            # one row for each primary key (the last one is kept for overwrite)
+            unique_rows = {}
+            for row in rows:
+                key = self._private_get_key(row[k] for k in keys)
+                if on_conflict == 'overwrite' or key not in unique_rows:
+                    unique_rows[key] = row
+            rows = list(unique_rows.values())
+
+        if on_conflict != 'error' and len(table.primary_key.columns) == 0 and \
+                not any(index.unique for index in table.indexes):
+            log.warning(f">> Table: {self._private_table_name} has no primary key or unique index, concurrent loads "
+                        f"can write the same key twice")
+
+        loaded = 0
+        batch_size = max(1, int(batch_size))
+        try:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                try:
+                    loaded += self._private_load_batch(table, batch, keys, on_conflict)
+                except exc.IntegrityError:
+                    if on_conflict == 'error':
+                        raise
+                    # keys written by a concurrent load after the read (unique key of the table), loaded row by row
+                    log.debug(f">> Batch rejected by the unique key of {self._private_table_name}, loaded row by row")
+                    loaded += self._private_load_rows(table, batch, keys, on_conflict)
+        except Exception as e:
+            raise exc.SQLAlchemyError(f">> Data not loaded after {loaded} rows ({str(e)})")
+
+        log.debug(f">> {loaded} rows loaded successfully on {self._private_table_name}.")
+        return loaded
+
+    def _private_load_batch(self, table: Table, batch: list, keys: list, on_conflict: str) -> int:
+        """
+            load a batch in one transaction (the existing keys are skipped or deleted before the insert)
+            :param table: table object
+            :param batch: rows to load
+            :param keys: primary key columns
+            :param on_conflict: rows with a primary key already in the table, error (raise), skip or overwrite
+            :return: number of rows loaded
+        """
+
+        with self._private_engine.begin() as connection:
+            if on_conflict != 'error':
+                existing = self._private_get_existing_keys(connection, table, batch, keys)
+                batch_existing = [row for row in batch if self._private_get_key(row[k] for k in keys) in existing]
+
+                if on_conflict == 'skip':
+                    batch = [row for row in batch if self._private_get_key(row[k] for k in keys) not in existing]
+                elif len(batch_existing) > 0:
+                    condition = and_(*[table.c[key] == bindparam('key_' + key) for key in keys])
+                    connection.execute(delete(table).where(condition),
+                                       [{'key_' + key: row[key] for key in keys} for row in batch_existing])
+
+            if len(batch) > 0:
+                connection.execute(insert(table), batch)
+        return len(batch)
+
+    def _private_load_rows(self, table: Table, rows: list, keys: list, on_conflict: str) -> int:
+        """
+            load the rows one by one, each one in its own transaction (a row already written by a concurrent load is
+            skipped or deleted and inserted again)
+            :param table: table object
+            :param rows: rows to load
+            :param keys: primary key columns
+            :param on_conflict: skip or overwrite
+            :return: number of rows loaded
+        """
+
+        loaded = 0
+        condition = and_(*[table.c[key] == bindparam('key_' + key) for key in keys])
+        for row in rows:
+            for attempt in range(rc.load_many_retries):
+                try:
+                    with self._private_engine.begin() as connection:
+                        if on_conflict == 'overwrite':
+                            connection.execute(delete(table).where(condition), {'key_' + key: row[key] for key in keys})
+                        connection.execute(insert(table), row)
+                    loaded += 1
+                    break
+                except exc.IntegrityError:
+                    if on_conflict == 'skip':
+                        break
+                    if attempt == rc.load_many_retries - 1:
+                        raise
+        return loaded
+
     def get_table(self):
         """
-            get table object
+            get table object (reflected once and cached until invalidated or expired)
             :return: table's object or None
         """
 
+        if self._private_table is not None:
+            if self._private_table_ttl is None or \
+                    time.monotonic() - self._private_table_time < self._private_table_ttl:
+                return self._private_table
+            self._private_invalidate_table()
+
         try:
+            self._private_reflections += 1
             self._private_metadata.reflect(bind=self._private_engine, only=[self._private_table_name])
             table = Table(self._private_table_name, self._private_metadata, autoload=True)
         except exc.InvalidRequestError:
             return None
 
+        log.debug(f">> Table: {self._private_table_name} reflected ({self._private_reflections} reflections)")
+        self._private_table = table
+        self._private_table_time = time.monotonic()
         return table
+
+    def get_reflection_count(self) -> int:
+        """
+            get the number of reflections of the table from the db
+            :return: number of reflections
+        """
+
+        return self._private_reflections
+
+    def _private_invalidate_table(self) -> None:
+        """
+            remove the cached table (the next get_table reflects the table from the db)
+        """
+
+        self._private_table = None
+        self._private_table_time = None
+        self._private_metadata = MetaData()
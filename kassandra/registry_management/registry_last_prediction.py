@@ -15,17 +15,18 @@ from datetime import datetime
 from kassandra.registry_management.registry import Registry
 from kassandra.config_module import prediction_and_loading_config as cfg
 from kassandra.config_module import registry_config as rc
-from sqlalchemy import Column, String, Date, Float
+from sqlalchemy import Table, Column, String, Date, Float
 
 
 class RegistryLastPrediction(Registry):
-    def __init__(self,  engine: sqlalchemy):
+    def __init__(self,  engine: sqlalchemy, table_ttl: float = rc.table_reflection_ttl):
         """
         :param engine: db engine
+        :param table_ttl: seconds before the table is reflected again (None means until invalidated)
         """
 
         super().__init__(engine=engine, table_name=rc.registry_last_prediction_name,
-                         index_name=rc.registry_last_prediction_index_name)
+                         index_name=rc.registry_last_prediction_index_name, table_ttl=table_ttl)
         self._private_columns_registry = [Column(rc.id_system_name, String(15), primary_key=True),
                                           Column(rc.control_code_name, String(10), nullable=False, primary_key=True),
                                           Column(rc.intermediary_code_name, String(11), nullable=False, primary_key=True),
@@ -71,30 +72,44 @@ class RegistryLastPrediction(Registry):
         # remove index
         prediction.reset_index(inplace=True)
         prediction.rename(columns={prediction.columns[0]: rc.client_id_name}, inplace=True)
-
-        primary_key_columns = [rc.id_system_name, rc.control_code_name, rc.intermediary_code_name,
-                               rc.client_id_name, rc.model_name_date_name]
-
-        # order columns according to the table
-        prediction = prediction[table.columns.keys()]
+        prediction[rc.client_id_name] = prediction[rc.client_id_name].astype(str)
 
         try:
-            last_predictions = self._private_engine.execute(table.select())
-            last_predictions = pd.DataFrame(last_predictions, columns=table.columns.keys())
-
-            # vertically concatenate the two dataframes
-            prediction = pd.concat([prediction, last_predictions], ignore_index=True, axis=0)
-            prediction.sort_values(by=[rc.client_id_name, rc.report_date_name], inplace=True)
-
-            prediction.drop_duplicates(subset=primary_key_columns, keep='last', inplace=True)
-            prediction.reset_index(inplace=True, drop=True)
-
-            # update the table
-            prediction.to_sql(self._private_table_name, self._private_engine, if_exists='replace', index=False)
+            if self._private_has_lob_keys(table):
+                # table written by to_sql in the previous versions, recreated once with the registry columns
+                self._private_migrate_table(table, prediction)
+            else:
+                # only the rows of the new predictions are replaced (primary key of the table)
+                self.load_many(prediction, on_conflict='overwrite')
 
             log.debug(">> Data from DataFrame loaded successfully.")
             return True
         except Exception as e:
             if print_error:
                 log.error(f">> Data not loaded ({str(e)})")
-            return False
\ No newline at end of file
+            return False
+
+    def _private_migrate_table(self, table: Table, prediction: pd.DataFrame) -> None:
+        """
+            recreate a table written by to_sql (LOB key columns and no primary key) with the registry columns, the
+            new predictions replace the stored rows with the same primary key
+            :param table: table object
+            :param prediction: new predictions
+        """
+
+        log.warning(f">> Table: {self._private_table_name} has LOB key columns, recreated with the registry columns")
+
+        columns = [column.name for column in self.get_columns_registry()]
+        keys = [column.name for column in self.get_columns_registry() if column.primary_key]
+
+        last_predictions = pd.DataFrame(self._private_engine.execute(table.select()).fetchall(),
+                                        columns=table.columns.keys())
+        last_predictions = pd.concat([last_predictions[columns], prediction[columns]], ignore_index=True)
+        last_predictions = last_predictions.astype({key: str for key in keys})
+        last_predictions[rc.report_date_name] = pd.to_datetime(last_predictions[rc.report_date_name]).dt.date
+        last_predictions.drop_duplicates(subset=keys, keep='last', inplace=True)
+
+        table.drop(self._private_engine)
+        if not self.create_registry_table_index():
+            raise sqlalchemy.exc.SQLAlchemyError(f">> Table: {self._private_table_name} not recreated")
+        self.load_many(last_predictions)
@@ -101,4 +101,19 @@ def logging_config() -> logging.Logger:
     return logger
 
 
-log = logging_config()
+def setup_logging() -> logging.Logger:
+    """
+    Configure logging file once (called by the entry points, not at import time)
+    :return: logger
+    """
+    global _configured
+
+    if not _configured:
+        logging_config()
+        _configured = True
+    return log
+
+
+# root logger, the handlers are added by setup_logging
+log = logging.getLogger()
+_configured = False
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: subject prioritization batch starter (several intermediaries with the shared artefacts loaded once)
+@TODO:
+"""
+
+import os
+import sys
+import time
+import pandas as pd
+from datetime import datetime
+from multiprocessing import util
+from concurrent.futures import ProcessPoolExecutor
+from kassandra.config_module import app_config as apc
+from kassandra.profiling import StageProfiler
+from kassandra.starter.log import log, notify_with_email, setup_logging
+from kassandra.starter.subject_prioritization_oneshot import setup_service_folder, get_shared_artefacts, _execute
+
+status_ok = 'OK'
+status_empty = 'EMPTY'
+status_error = 'ERROR'
+summary_columns = ['INTERMEDIARY_CODE', 'REF_MONTH', 'STATUS', 'SECONDS', 'PID', 'ERROR']
+
+# database manager and shared artefacts of the process (one for each worker)
+_worker_state = {}
+
+
+def read_intermediary_codes(value: str) -> list:
+    """
+        Read the intermediaries to process
+        :param value: file with an intermediary code for each line or codes separated by comma (e.g. 123456,654321)
+        :return: list of intermediary codes (without duplicates, same order)
+    """
+
+    if os.path.isfile(value):
+        with open(value, 'r') as file:
+            codes = [line.strip() for line in file if line.strip() and not line.strip().startswith('#')]
+    else:
+        codes = [code.strip() for code in value.split(',') if code.strip()]
+
+    if len(codes) == 0:
+        raise ValueError(f'>> No intermediary code found in {value}')
+    return list(dict.fromkeys(codes))
+
+
+def parse_args():
+    arguments = sys.argv
+    if len(arguments) != 3:
+        raise ValueError("Submit intermediary codes (file or comma separated) and reference month")
+
+    return read_intermediary_codes(arguments[1]), arguments[2]
+
+
+def init_worker(close_at_exit: bool = True) -> None:
+    """
+        Connect to the databases and load the shared artefacts once for the process
+        :param close_at_exit: if True, the connections are closed when the worker process exits
+        :return: None
+    """
+
+    # the spawned workers (e.g. windows) do not inherit the logging configuration of the parent process
+    setup_logging()
+
+    profiler = StageProfiler('subject_prioritization_batch', enabled=apc.profiling, log_stages=apc.profiling_log)
+
+    try:
+        from kassandra.starter.database_manager import DatabaseManager
+        with profiler.stage('connections'):
+            dbm = DatabaseManager()
+        _worker_state['dbm'] = dbm
+        if close_at_exit and 'TEST_ENV' not in os.environ:
+            util.Finalize(None, dbm.close_connection, exitpriority=10)
+        _worker_state['artefacts'] = get_shared_artefacts(dbm, profiler)
+    except Exception as e:
+        # the error is reported for each intermediary of the worker
+        log.error(f'>> Error while loading the shared artefacts: {str(e)}', exc_info=True)
+        _worker_state['error'] = e
+    finally:
+        profiler.save(apc.profiling_directory)
+
+
+def run_intermediary(intermediary_code: str, ref_month: str) -> dict:
+    """
+        Execute Kassandra for an intermediary with the shared artefacts of the process
+        :param intermediary_code: intermediary code
+        :param ref_month: reference month (e.g. 062023)
+        :return: timing and outcome of the intermediary
+    """
+
+    start = time.perf_counter()
+    status, error = status_ok, ''
+
+    try:
+        if 'error' in _worker_state:
+            raise _worker_state['error']
+        _execute(_worker_state['dbm'], intermediary_code, ref_month, _worker_state['artefacts'])
+    except SystemExit:
+        # the execution exits when there is no ndg to process
+        status = status_empty
+    except Exception as e:
+        log.error(f'>> subject_prioritization_batch error for {intermediary_code}: {str(e)}', exc_info=True)
+        status, error = status_error, str(e)
+
+    seconds = round(time.perf_counter() - start, 3)
+    log.info(f'>> Intermediary {intermediary_code} completed in {seconds} s ({status})')
+    return dict(zip(summary_columns, [intermediary_code, ref_month, status, seconds, os.getpid(), error]))
+
+
+def run_batch(intermediary_codes: list, ref_month: str, max_workers: int = 1) -> pd.DataFrame:
+    """
+        Execute Kassandra for each intermediary
+        :param intermediary_codes: list of intermediary codes
+        :param ref_month: reference month (e.g. 062023)
+        :param max_workers: number of worker processes (1 means serial in the current process)
+        :return: df with the timing and the outcome of each intermediary
+    """
+
+    max_workers = max(1, min(int(max_workers), len(intermediary_codes)))
+    log.info(f'>> Starting Kassandra batch for {len(intermediary_codes)} intermediaries and {ref_month} '
+             f'({max_workers} processes)')
+
+    if max_workers == 1:
+        if 'dbm' not in _worker_state and 'error' not in _worker_state:
+            init_worker(close_at_exit=False)
+        results = [run_intermediary(code, ref_month) for code in intermediary_codes]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker) as executor:
+            results = list(executor.map(run_intermediary, intermediary_codes, [ref_month] * len(intermediary_codes)))
+
+    return pd.DataFrame(results, columns=summary_columns)
+
+
+def save_summary(summary: pd.DataFrame, ref_month: str, directory: str = None) -> str:
+    """
+        Save the summary of the batch
+        :param summary: df with the timing and the outcome of each intermediary
+        :param ref_month: reference month (e.g. 062023)
+        :param directory: directory of the summary (default: batch directory of the configuration)
+        :return: path of the summary
+    """
+
+    directory = directory if directory is not None else apc.batch_directory
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, f'batch_{ref_month}_{datetime.now().strftime("%Y%m%d%H%M%S")}.csv')
+    summary.to_csv(path, index=False)
+    return path
+
+
+def main() -> None:
+    """
+    Main function to start the subject prioritization batch
+    :return: None
+    """
+
+    setup_logging()
+
+    try:
+        intermediary_codes, ref_month = parse_args()
+        setup_service_folder()
+
+        start = time.perf_counter()
+        summary = run_batch(intermediary_codes, ref_month, apc.batch_max_workers)
+        path = save_summary(summary, ref_month)
+        log.info(f'>> Kassandra batch completed in {time.perf_counter() - start:.3f} s, summary saved in {path}\n'
+                 f'{summary.to_string(index=False)}')
+
+        if 'dbm' in _worker_state and 'TEST_ENV' not in os.environ:
+            _worker_state['dbm'].close_connection()
+
+        failed = summary[summary['STATUS'] == status_error]
+        if not failed.empty:
+            notify_with_email(f'>> subject_prioritization_batch errors for {failed["INTERMEDIARY_CODE"].tolist()}:\n'
+                              f'{failed.to_string(index=False)}')
+
+    except Exception as e:
+        log.error(f'>> subject_prioritization_batch error: {str(e)}', exc_info=True)
+        notify_with_email(f'>> subject_prioritization_batch error: {str(e)}')
+
+
+if __name__ == '__main__':
+    setup_logging()
+    log.info(f'>> *** STARTING SUBJECT PRIORITIZATION BATCH ***')
+    main()
+    exit(0)
@@ -10,21 +10,17 @@
 
 import os
 import sys
-import joblib
 import warnings
 warnings.filterwarnings("ignore")
 from datetime import datetime
-from ml_anomaly_gate import AnomalyGate
 from kassandra.config_module import app_config as apc
-from kassandra.features_creation import BuildFeaturesProd
-from kassandra.extraction import ExtractData
-from kassandra.prediction_and_loading import SubjectManagement, FeatureCategories
 from kassandra.config_module import prediction_and_loading_config as cfg
-from kassandra.parametrization import ParameterManagement
-from kassandra.registry_management import Registry, RegistryLastPrediction
-from kassandra.self_census import SelfCensus
-from kassandra.starter.database_manager import DatabaseManager
-from kassandra.starter.log import log, notify_with_email
+from kassandra.config_module import feature_creation_config as fcc
+from kassandra.config_module.extraction_config import dataset_schemas
+from kassandra.profiling import StageProfiler
+from kassandra.starter.log import log, notify_with_email, setup_logging
+
+# the packages of each stage (shap, sklearn, database drivers, anomaly gate) are imported when the stage runs
 
 
 def parse_args():
@@ -68,6 +64,8 @@ def get_model(endswith: str = ".joblib"):
 
 
 def get_registries(dbm):
+    from kassandra.registry_management import Registry, RegistryLastPrediction
+
     # create a registry
     log.info(f'>> Loading Registry, system_id={apc.system_id_name}, control_code={apc.control_code}')
     registry = Registry(engine=dbm.engine_kassandra)
@@ -84,6 +82,8 @@ def get_registries(dbm):
 
 
 def get_parameters():
+    from kassandra.parametrization import ParameterManagement
+
     # create a parameter management
     log.info(f'>> Requesting parameters from {apc.url_discovery_api}')
     parameter_management = ParameterManagement(system_id=apc.system_id_name,
@@ -106,9 +106,13 @@ def main() -> None:
     :return: None
     """
 
+    setup_logging()
+
     try:
         intermediary_code, ref_month = parse_args()
         setup_service_folder()
+
+        from kassandra.starter.database_manager import DatabaseManager
         dbm = DatabaseManager()
         _execute(dbm, intermediary_code, ref_month)
 
@@ -120,20 +124,79 @@ def main() -> None:
         notify_with_email(f'>> subject_prioritization_oneshot error: {str(e)}')
 
 
-def _execute(dbm, intermediary_code, ref_month):
-    log.info(f'>> Starting Kassandra for {intermediary_code} and {ref_month}')
-    log.info(f'>> Starting Self Census for {apc.url_census}')
+def get_shared_artefacts(dbm, profiler: StageProfiler = None) -> dict:
+    """
+        Load the artefacts shared by all the intermediaries (census, registries, parameters, model and explainer)
+        :param dbm: database manager
+        :param profiler: profiler of the stages (None means not recorded)
+        :return: dict of the shared artefacts
+    """
+
+    import joblib
+    from kassandra.features_creation import BuildFeaturesProd
+    from kassandra.prediction_and_loading import FeatureCategories
+    from kassandra.self_census import SelfCensus
+
+    profiler = profiler if profiler is not None else StageProfiler('shared_artefacts', enabled=False)
+
+    with profiler.stage('census'):
+        log.info(f'>> Starting Self Census for {apc.url_census}')
+        SelfCensus(url_link=apc.url_census,
+                   system_id_name=apc.system_id_name,
+                   system_id_description=apc.system_id_description)()
+
+    with profiler.stage('registries'):
+        registry, registry_last_prediction = get_registries(dbm)
+
+    with profiler.stage('parameters'):
+        months_to_skip, systems, threshold = get_parameters()
+
+    with profiler.stage('model_load'):
+        model_name_date = get_model()
+        log.info(f'>> Loading model from {apc.models_directory + "/" + model_name_date}')
+        model = joblib.load(apc.models_directory + "/" + model_name_date)
+
+    with profiler.stage('explainer'):
+        log.info('>> Creating shap explainer')
+        shap_explainer = BuildFeaturesProd.get_shap_explainer(model_object=model, model_name_date=model_name_date)
+
+    log.info('>> Creating feature categories')
+    features_name = FeatureCategories(description_features=cfg.features_dict,
+                                      boolean_features=cfg.boolean_features_name,
+                                      numerical_features=cfg.numerical_features_name,
+                                      currency_features=cfg.currency_features_name,
+                                      binary_features=cfg.to_round_features)
+
+    return {'registry': registry, 'registry_last_prediction': registry_last_prediction,
+            'months_to_skip': months_to_skip, 'systems': systems, 'threshold': threshold,
+            'model_name_date': model_name_date, 'model': model, 'shap_explainer': shap_explainer,
+            'features_name': features_name}
+
+
+def _execute(dbm, intermediary_code, ref_month, artefacts: dict = None):
+    profiler = StageProfiler('subject_prioritization_oneshot', enabled=apc.profiling, log_stages=apc.profiling_log,
+                             intermediary_code=intermediary_code, ref_month=ref_month)
+    try:
+        _run_stages(dbm, intermediary_code, ref_month, artefacts, profiler)
+    finally:
+        # the record is saved also for the failed runs (stages completed and the failed one)
+        path = profiler.save(apc.profiling_directory)
+        if path is not None: log.info(f'>> Stage profile saved in {path}')
+
 
-    SelfCensus(url_link=apc.url_census,
-               system_id_name=apc.system_id_name,
-               system_id_description=apc.system_id_description)()
+def _run_stages(dbm, intermediary_code, ref_month, artefacts: dict, profiler: StageProfiler):
+    from ml_anomaly_gate import AnomalyGate
+    from kassandra.extraction import ExtractData
+    from kassandra.features_creation import BuildFeaturesProd
+    from kassandra.prediction_and_loading import SubjectManagement
 
-    registry, registry_last_prediction = get_registries(dbm)
-    months_to_skip, systems, threshold = get_parameters()
+    log.info(f'>> Starting Kassandra for {intermediary_code} and {ref_month}')
 
-    model_name_date = get_model()
-    log.info(f'>> Loading model from {apc.models_directory + "/" + model_name_date}')
-    model = joblib.load(apc.models_directory + "/" + model_name_date)
+    if artefacts is None:
+        artefacts = get_shared_artefacts(dbm, profiler)
+
+    registry = artefacts['registry']
+    model_name_date = artefacts['model_name_date']
 
     # create a extraction
     log.info('>> Loading data from dwa and evaluation')
@@ -144,47 +207,53 @@ def _execute(dbm, intermediary_code, ref_month):
                                control_code=apc.control_code,
                                intermediary_code=intermediary_code,
                                ref_month=ref_month,
-                               registry_month_to_skip=months_to_skip,
-                               reported_other_systems=systems)
-
-    # get operations from dwa
-    operations = extract_data.get_operations()
+                               registry_month_to_skip=artefacts['months_to_skip'],
+                               reported_other_systems=artefacts['systems'],
+                               max_workers=apc.extraction_max_workers,
+                               ndg_filter=apc.extraction_ndg_filter,
+                               streaming_directory=apc.extraction_directory if apc.extraction_streaming else None,
+                               operations_cache_directory=apc.operations_cache_directory if apc.operations_cache else None,
+                               operations_cache_months=fcc.operations_months_features,
+                               schemas=dataset_schemas if apc.extraction_schema else None,
+                               prune_excluded=apc.exclusion_pruning)
+
+    # no ndg to process for the intermediary (the batch records the intermediary as empty)
+    if len(extract_data.get_ndgs()) < 1:
+        log.info(f'>> No ndg to process for the intermediary {intermediary_code}')
+        exit(0)
+
+    # get operations, operation subjects and subjects information from dwa
+    with profiler.stage('extraction') as stage:
+        operations, operation_subjects, subjects_information = extract_data.get_dwa_data()
+        stage['rows'] = operations.shape[0] + operation_subjects.shape[0] + subjects_information.shape[0]
     log.info(f'>> Extracting operations from dwa completed, {operations.shape[0]} operations extracted')
-
-    # get operation subjects from dwa
-    operation_subjects = extract_data.get_operations_subjects()
     log.info(f'>> Extracting operation subjects from dwa completed, {operation_subjects.shape[0]} operation subjects extracted')
-
-    # get subjects information from dwa
-    subjects_information = extract_data.get_subjects()
     log.info(f'>> Extracting subjects information from dwa completed, {subjects_information.shape[0]} subjects extracted')
 
     # get target from evaluation
-    target = extract_data.get_target()
+    with profiler.stage('target') as stage:
+        target = extract_data.get_target()
+        stage['rows'] = target.shape[0]
     log.info(f'>> Extracting target from evaluation completed, {target.shape[0]} target extracted')
 
     # ndg from registry and other systems
     ndg_registry = extract_data.get_ndgs_from_registry()
     ndg_other_systems = extract_data.get_ndgs_from_other_systems()
+    exclusion_index = extract_data.get_exclusion_index()
 
     # features creation and selection for production
-    build_features_prod = BuildFeaturesProd(operations=operations,
-                                            operation_subjects=operation_subjects,
-                                            subjects=subjects_information,
-                                            target_information=target,
-                                            bank_months=apc.bank_months)
-    log.info('>> Building features transformed for production')
-    dataset_categorized = build_features_prod.get_transformed_prod()
-
-    log.info('>> Creating shap explainer')
-    shap_explainer = build_features_prod.get_shap_explainer(model_object=model)
-
-    log.info('>> Creating feature categories')
-    features_name = FeatureCategories(description_features=cfg.features_dict,
-                                      boolean_features=cfg.boolean_features_name,
-                                      numerical_features=cfg.numerical_features_name,
-                                      currency_features=cfg.currency_features_name,
-                                      binary_features=cfg.to_round_features)
+    with profiler.stage('features', rows=subjects_information.shape[0]):
+        build_features_prod = BuildFeaturesProd(operations=operations,
+                                                operation_subjects=operation_subjects,
+                                                subjects=subjects_information,
+                                                target_information=target,
+                                                bank_months=apc.bank_months,
+                                                partitions=apc.features_partitions)
+
+    with profiler.stage('encoding') as stage:
+        log.info('>> Building features transformed for production')
+        dataset_categorized = build_features_prod.get_transformed_prod()
+        stage['rows'] = dataset_categorized.shape[0]
 
     # create a new anomaly gate
     log.info(f'>> Creating anomaly gate object, system_id={apc.system_id_name}, id_transition={apc.id_transition}')
@@ -193,24 +262,27 @@ def _execute(dbm, intermediary_code, ref_month):
     gate.define_basic_information(code=apc.control_code, bank_code=intermediary_code,
                                   description=apc.system_id_description)
 
-    # predict and load results in evaluation
+    # predict and load results in evaluation (prediction, shap and load stages)
     log.info('>> Predicting and loading results in evaluation')
-    subject_management = SubjectManagement(model_object=model,
+    subject_management = SubjectManagement(model_object=artefacts['model'],
                                            model_date_name=model_name_date,
-                                           shap_explainer=shap_explainer,
+                                           shap_explainer=artefacts['shap_explainer'],
                                            registry_object=registry,
-                                           registry_last_prediction_object=registry_last_prediction,
+                                           registry_last_prediction_object=artefacts['registry_last_prediction'],
                                            evaluation_connection=dbm.engine_evaluation,
                                            anomaly_gate=gate,
-                                           features_categories=features_name,
+                                           features_categories=artefacts['features_name'],
                                            subjects_info=subjects_information,
                                            ref_month_anomaly=ref_month,
-                                           threshold=threshold)
+                                           threshold=artefacts['threshold'],
+                                           registry_batch_loading=apc.registry_batch_loading,
+                                           profiler=profiler)
 
     # predict the anomaly and postprocessing the results
     subject_management(input_to_predict=dataset_categorized,
                        ndgs_from_registry=ndg_registry,
-                       ndgs_from_other_systems=ndg_other_systems)
+                       ndgs_from_other_systems=ndg_other_systems,
+                       exclusion_index=exclusion_index)
 
 
 if __name__ == '__main__':
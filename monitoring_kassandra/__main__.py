@@ -1,4 +1,5 @@
-from kassandra.starter.log import log
+from kassandra.starter.log import log, setup_logging
+setup_logging()
 log.info('>> *** STARTING MONITORING KASSANDRA ***')
 
 from monitoring_kassandra.monitoring_service import main
@@ -12,18 +12,14 @@ import os
 import sys
 import time
 import warnings
-import pandas as pd
 import monitoring_kassandra as ms
 warnings.filterwarnings("ignore")
-from monitoring import MonitoringKassandra
 from kassandra.config_module import app_config as apc
-from kassandra.extraction import ExtractData
 from kassandra.config_module import prediction_and_loading_config as cfg
 from kassandra.config_module import feature_creation_config as fcc
 from kassandra.config_module import registry_config as rc
 from kassandra.config_module import extraction_config as ec
-from kassandra.starter.database_manager import DatabaseManager
-from kassandra.starter.log import log, notify_with_email
+from kassandra.starter.log import log, notify_with_email, setup_logging
 from kassandra.config_module.extraction_config import default_software
 from kassandra.starter.subject_prioritization_oneshot import setup_service_folder, get_model, \
     get_registries, get_parameters
@@ -42,9 +38,13 @@ def main() -> None:
     :return: None
     """
 
+    setup_logging()
+
     try:
         intermediary_code = parse_args()
         setup_service_folder()
+
+        from kassandra.starter.database_manager import DatabaseManager
         log.info(f'>> Starting Monitoring Kassandra for {intermediary_code}')
         while True:
             dbm = DatabaseManager()
@@ -64,6 +64,11 @@ def main() -> None:
 
 
 def _execute(dbm, intermediary_code):
+    # imported when the monitoring runs (pandas, plots, database drivers)
+    import pandas as pd
+    from monitoring import MonitoringKassandra
+    from kassandra.extraction import ExtractData
+
     log.info('>> *** NEW MONITORING KASSANDRA EXECUTION ***')
 
     registry, registry_last_prediction = get_registries(dbm)
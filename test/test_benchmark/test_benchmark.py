@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test class for the synthetic data benchmark
+@TODO:
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from kassandra.config_module import feature_creation_config as fcc
+from benchmark.synthetic_data import generate_subjects, generate_operations, generate_anomalies
+from benchmark.database import create_engines, load_synthetic_data, operations_table, operations_subjects_table, \
+    subjects_table
+from benchmark.run_benchmark import Benchmark, save_results, compare_results, main
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_data(self):
+        """
+            test the shape and the columns of the synthetic data
+            :return: None
+        """
+
+        subjects = generate_subjects(100, random_state=0)
+        chunks = list(generate_operations(100, 1000, '062023', chunk_size=400, random_state=0))
+        operations = pd.concat([chunk[0] for chunk in chunks])
+        operations_subjects = pd.concat([chunk[1] for chunk in chunks])
+        anomalies = generate_anomalies(100, '062023', ratio=0.1, random_state=0)
+
+        # assert
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(subjects.shape[0], 100)
+        self.assertEqual(subjects[fcc.ndg_name].nunique(), 100)
+        self.assertEqual(operations.shape[0], 1000)
+        self.assertTrue(operations['CODE_OPERATION'].is_unique)
+        self.assertTrue(operations_subjects['CODE_OPERATION'].isin(operations['CODE_OPERATION']).all())
+        self.assertGreater(anomalies.shape[0], 0)
+
+        # same data with the same seed
+        pd.testing.assert_frame_equal(subjects, generate_subjects(100, random_state=0))
+
+    def test_load_synthetic_data(self):
+        """
+            test the synthetic data is loaded on the sqlite databases
+            :return: None
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            engines = create_engines(directory)
+            rows = load_synthetic_data(engines, 100, 1000, '123456', '062023', chunk_size=300, random_state=0)
+            for engine in engines.values():
+                engine.dispose()
+
+        # assert
+        self.assertEqual(rows[subjects_table], 100)
+        self.assertEqual(rows[operations_table], 1000)
+        self.assertGreaterEqual(rows[operations_subjects_table], 1000)
+
+    def test_run_benchmark(self):
+        """
+            test the stages of the benchmark (subject management needs the anomaly gate, not used in the tests)
+            :return: None
+        """
+
+        stages = ['generate_load', 'registry_load_many', 'extraction', 'target', 'features', 'last_prediction_load',
+                  'last_prediction_read']
+        with tempfile.TemporaryDirectory() as directory:
+            record = Benchmark(n_subjects=200, n_operations=2000, directory=directory, scale='test',
+                               stages=stages, chunk_size=50)()
+            path = save_results(record, os.path.join(directory, 'results'))
+            save_results(record, os.path.join(directory, 'results'))
+            results = pd.read_csv(path)
+            comparison = compare_results(path, str(record['commit']))
+
+        # assert
+        self.assertEqual([stage['stage'] for stage in record['stages']], stages)
+        self.assertTrue(all('error' not in stage for stage in record['stages']))
+        self.assertEqual(record['stages'][-1]['rows'], record['stages'][-2]['rows'])
+        self.assertGreater(record['stages'][stages.index('features')]['rows'], 0)
+        self.assertEqual(results.shape[0], 2 * len(stages))
+        self.assertEqual(sorted(comparison['STAGE']), sorted(stages))
+        self.assertTrue((comparison['RATIO'] == 1).all())
+
+    def test_failed_stage(self):
+        """
+            test the skipped stages are recorded with their error and the command line fails
+            :return: None
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            record = Benchmark(n_subjects=10, n_operations=100, directory=directory, scale='test',
+                               stages=['extraction', 'target'])()
+            with self.assertRaises(SystemExit):
+                main(['--subjects', '10', '--operations', '100', '--stages', 'extraction',
+                      '--results', os.path.join(directory, 'results')])
+
+        # assert
+        self.assertEqual([stage['stage'] for stage in record['stages']], ['extraction', 'target'])
+        self.assertTrue(all(stage['error'].startswith('skipped') for stage in record['stages']))
+
+
+if __name__ == '__main__':
+    unittest.main()
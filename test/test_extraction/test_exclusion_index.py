@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test class for the exclusion index
+@TODO:
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from kassandra.extraction.exclusion_index import ExclusionIndex, registry_source, other_systems_source
+
+
+class TestExclusionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ExclusionIndex(ndgs_from_registry=['1', '2', 6], ndgs_from_other_systems=['2', '3'])
+
+    def test_lookup(self):
+        """
+            test the ndg are compared as string for each source
+            :return: None
+        """
+
+        self.assertEqual(len(self.index), 4)
+        self.assertIn('6', self.index)
+        self.assertIn(3, self.index)
+        self.assertNotIn('4', self.index)
+        self.assertEqual(self.index.get_ndgs(registry_source), frozenset(['1', '2', '6']))
+        self.assertEqual(self.index.get_ndgs(other_systems_source), frozenset(['2', '3']))
+
+        with self.assertRaises(ValueError):
+            self.index.get_ndgs('wrong_source')
+
+    def test_mask_and_filter(self):
+        """
+            test the mask is the same of the isin on the lists
+            :return: None
+        """
+
+        ndgs = pd.Index(['1', '4', '2', '3', '1', '7'])
+
+        # assert
+        np.testing.assert_array_equal(self.index.mask(ndgs, registry_source), ndgs.isin(['1', '2', '6']))
+        np.testing.assert_array_equal(self.index.mask(ndgs, other_systems_source), ndgs.isin(['2', '3']))
+        self.assertEqual(self.index.filter(list(ndgs)), ['4', '7'])
+        self.assertEqual(ExclusionIndex().filter(list(ndgs)), list(ndgs))
+        self.assertEqual(self.index.mask([]).shape, (0,))
+
+        df = pd.DataFrame({'NDG': ['1', '4', '3'], 'VALUE': [1, 2, 3]})
+        self.assertEqual(self.index.filter_df(df, 'NDG')['VALUE'].tolist(), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
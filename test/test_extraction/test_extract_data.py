@@ -8,10 +8,13 @@
 @TODO:
 """
 
+import os
+import tempfile
 import unittest
 import pandas as pd
 import sqlalchemy
 from unittest.mock import patch
+from kassandra.config_module import feature_creation_config as fcc
 from sqlalchemy.exc import SQLAlchemyError
 from kassandra.config_module.extraction_config import operations_subject_query_path, operations_query_path, \
     subjects_query_path, ndg_list_path, anomalies_other_systems_path, ndg_name, cols_names_evaluation_csv
@@ -132,6 +135,17 @@ class TestExtractData(unittest.TestCase):
         self.assertEqual(extract_data_obj.get_ndgs_from_registry(), registry_list)
         self.assertEqual(extract_data_obj.get_ndgs_from_other_systems(), other_system_ndg)
 
+        # the excluded ndg are removed before the extraction
+        extract_data_obj = ExtractData(engine_evaluation=self.engine, engine_dwa=self.engine, registry=Registry(None),
+                                       system_id='1', control_code='1', intermediary_code='1', ref_month='062023',
+                                       registry_month_to_skip=1, reported_other_systems=['SYSTEM1'],
+                                       prune_excluded=True)
+        extract_data_obj.target_df = pd.DataFrame({ndg_name: ['3', '7'], 'STATUS': ['1', '1']})
+        extract_data_obj()
+        self.assertEqual(extract_data_obj.get_ndgs(), ['7', '8'])
+        self.assertEqual(extract_data_obj.get_target()[ndg_name].tolist(), ['7'])
+        self.assertIn('6', extract_data_obj.get_exclusion_index())
+
     @patch('kassandra.extraction.extract_data.ExtractData._private_get_ndg_from_registry')
     @patch('kassandra.extraction.extract_data.ExtractData._private_get_ndg_from_other_systems')
     def test_common_function_extraction(self, mock_get_ndg_from_other_systems, mock_get_ndg_from_registry):
@@ -157,3 +171,328 @@ class TestExtractData(unittest.TestCase):
             mock_read_sql_query.return_value = expected_value
             query = extract_data_obj._private_read_query(operations_subject_query_path)
             self.assertTrue(expected_value.equals(extract_data_obj._private_common_function_extraction(query)))
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_parallel_extraction(self, mock_read_query):
+        """
+            test parallel extraction of the chunks (same result of the serial extraction)
+        """
+
+        mock_read_query.return_value = "SELECT * FROM TABLE WHERE CODE = '%s' AND NDG IN %s"
+
+        def read_chunk(query, _):
+            ndgs = query.split('IN (')[1].rstrip(')').replace("'", '').split(', ')
+            return pd.DataFrame({ndg_name: ndgs, 'QUERY': [query[:8]] * len(ndgs)})
+
+        extract_data_obj = ExtractData(engine_evaluation=self.engine, engine_dwa=self.engine, registry=Registry(None),
+                                       system_id='1', control_code='1', intermediary_code='060459', ref_month='062022',
+                                       registry_month_to_skip=1, chunk_size=2, max_workers=3)
+        extract_data_obj.ndg_list = [str(i) for i in range(7)]
+
+        with patch('pandas.read_sql_query', side_effect=read_chunk):
+            operations, operations_subjects, subjects = extract_data_obj.get_dwa_data()
+            extract_data_obj.max_workers = 1
+            serial_operations = extract_data_obj.get_operations()
+
+        self.assertEqual(operations[ndg_name].tolist(), extract_data_obj.ndg_list)
+        self.assertEqual(subjects[ndg_name].tolist(), extract_data_obj.ndg_list)
+        self.assertTrue(serial_operations.equals(operations))
+        self.assertTrue(operations_subjects.equals(operations))
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_ndg_filter_strategies(self, mock_read_query):
+        """
+            test chunk, bind and temporary table strategies (same result for each strategy)
+        """
+
+        mock_read_query.return_value = "SELECT * FROM OPERATIONS WHERE CODE = '%s' AND NDG IN %s ORDER BY NDG"
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            operations = pd.DataFrame({'CODE': ['060459'] * 6 + ['000000'],
+                                       ndg_name: ['1', '2', '3', '4', '5', '6', '1'],
+                                       'AMOUNT': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]})
+            operations.to_sql('OPERATIONS', engine, index=False)
+
+            results = []
+            for ndg_filter, max_workers in [('chunk', 1), ('bind', 1), ('temp_table', 1), ('temp_table', 2)]:
+                extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                               system_id='1', control_code='1', intermediary_code='060459',
+                                               ref_month='062022', registry_month_to_skip=1, chunk_size=2,
+                                               max_workers=max_workers, ndg_filter=ndg_filter)
+                extract_data_obj.ndg_list = ['1', '3', '4', '6', '7']
+                results.append(extract_data_obj.get_operations().reset_index(drop=True))
+                self.assertEqual(extract_data_obj.ndg_filter, ndg_filter)
+
+            engine.dispose()
+
+        self.assertEqual(results[0][ndg_name].tolist(), ['1', '3', '4', '6'])
+        for result in results[1:]:
+            pd.testing.assert_frame_equal(results[0], result)
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_temp_table_fallback(self, mock_read_query):
+        """
+            test the temporary table strategy is chosen once before the parallel reads and the fallback to the chunks
+            does not change the strategy of the object
+        """
+
+        mock_read_query.return_value = "SELECT * FROM OPERATIONS WHERE CODE = '%s' AND NDG IN %s ORDER BY NDG"
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            pd.DataFrame({'CODE': '060459', ndg_name: ['1', '2', '3'], 'AMOUNT': [1.0, 2.0, 3.0]}).to_sql(
+                'OPERATIONS', engine, index=False)
+
+            results = []
+            for side_effect in [None, SQLAlchemyError('not available')]:
+                extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                               system_id='1', control_code='1', intermediary_code='060459',
+                                               ref_month='062022', registry_month_to_skip=1, chunk_size=2,
+                                               max_workers=2, ndg_filter='temp_table')
+                extract_data_obj.ndg_list = ['1', '3']
+                with patch.object(ExtractData, '_private_create_temp_table', side_effect=side_effect,
+                                  wraps=ExtractData._private_create_temp_table) as mock_create, \
+                        patch.object(ExtractData, '_private_read_temp_table',
+                                     wraps=extract_data_obj._private_read_temp_table) as mock_read:
+                    results.append(extract_data_obj.get_dwa_data()[0].reset_index(drop=True))
+
+                # a probe and a creation for each read of the session-scoped table, no read after the fallback
+                self.assertEqual(mock_create.call_count, 4 if side_effect is None else 1)
+                self.assertEqual(mock_read.call_count, 3 if side_effect is None else 0)
+                self.assertEqual(extract_data_obj.ndg_filter, 'temp_table')
+
+            engine.dispose()
+
+        pd.testing.assert_frame_equal(results[0], results[1])
+        self.assertEqual(results[0][ndg_name].tolist(), ['1', '3'])
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_no_ndg_to_process(self, mock_read_query):
+        """
+            test an error is raised when there is no ndg to process and the explicit ndg are extracted
+        """
+
+        mock_read_query.return_value = "SELECT * FROM OPERATIONS WHERE CODE = '%s' AND NDG IN %s ORDER BY NDG"
+        pd.DataFrame({'CODE': '060459', ndg_name: ['1', '2'], 'AMOUNT': [1.0, 2.0]}).to_sql('OPERATIONS', self.engine,
+                                                                                           index=False)
+
+        for ndg_filter in ['chunk', 'temp_table']:
+            extract_data_obj = ExtractData(engine_evaluation=self.engine, engine_dwa=self.engine,
+                                           registry=Registry(None), system_id='1', control_code='1',
+                                           intermediary_code='060459', ref_month='062022', registry_month_to_skip=1,
+                                           ndg_filter=ndg_filter)
+            extract_data_obj.ndg_list = []
+
+            with self.assertRaises(ValueError):
+                extract_data_obj.get_operations()
+
+            operations = extract_data_obj._private_common_function_extraction(extract_data_obj.operations_query,
+                                                                              ndgs=['2'])
+            self.assertEqual(operations[ndg_name].tolist(), ['2'])
+
+        with self.assertRaises(ValueError):
+            ExtractData(engine_evaluation=self.engine, engine_dwa=self.engine, registry=Registry(None),
+                        system_id='1', control_code='1', intermediary_code='060459', ref_month='062022',
+                        registry_month_to_skip=1, ndg_filter='wrong_filter')
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_streaming_extraction(self, mock_read_query):
+        """
+            test streaming extraction in arrow files (same values of the extraction in memory)
+        """
+
+        mock_read_query.return_value = "SELECT * FROM TABLE WHERE CODE = '%s' AND NDG IN %s"
+
+        def read_chunk(query, _):
+            ndgs = query.split('IN (')[1].rstrip(')').replace("'", '').split(', ')
+            return pd.DataFrame({ndg_name: ndgs, 'AMOUNT': [float(ndg) for ndg in ndgs]})
+
+        with tempfile.TemporaryDirectory() as directory:
+            results = []
+            for streaming_directory, max_workers in [(None, 1), (directory, 1), (directory, 2)]:
+                extract_data_obj = ExtractData(engine_evaluation=self.engine, engine_dwa=self.engine,
+                                               registry=Registry(None), system_id='1', control_code='1',
+                                               intermediary_code='060459', ref_month='062022',
+                                               registry_month_to_skip=1, chunk_size=2, max_workers=max_workers,
+                                               streaming_directory=streaming_directory)
+                extract_data_obj.ndg_list = [str(i) for i in range(5)]
+                with patch('pandas.read_sql_query', side_effect=read_chunk):
+                    results.append(extract_data_obj.get_dwa_data())
+
+            self.assertTrue(os.path.exists(extract_data_obj.get_snapshot_path('operations')))
+            self.assertFalse(os.path.exists(extract_data_obj.get_snapshot_path('subjects')))
+
+        for operations, operations_subjects, subjects in results[1:]:
+            self.assertEqual(operations[ndg_name].tolist(), results[0][0][ndg_name].tolist())
+            self.assertEqual(operations['AMOUNT'].tolist(), results[0][0]['AMOUNT'].tolist())
+            self.assertEqual(str(operations_subjects[ndg_name].dtype), 'string')
+            pd.testing.assert_frame_equal(subjects, results[0][2])
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_operations_cache_window(self, mock_read_query):
+        """
+            test the cached read is equal to the read without cache when the window of the operations query moves
+            (the months of the cache are the months of the operations query)
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            pd.DataFrame({'CODE': '060459', ndg_name: ['1', '2'] * 6,
+                          'DATE_OPERATION': [f'2022-{month:02d}-15' for month in range(1, 7) for _ in range(2)],
+                          'AMOUNT': [float(i) for i in range(12)]}).to_sql('OPERATIONS', engine, index=False)
+
+            def extract(ref_month, start_date, cache):
+                # operations query of the last 3 months
+                mock_read_query.return_value = f"SELECT NDG, DATE_OPERATION, AMOUNT FROM OPERATIONS WHERE " \
+                                               f"CODE = '%s' AND DATE_OPERATION >= '{start_date}' AND NDG IN %s"
+                extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                               system_id='1', control_code='1', intermediary_code='060459',
+                                               ref_month=ref_month, registry_month_to_skip=1, chunk_size=2,
+                                               operations_cache_directory=directory if cache else None)
+                extract_data_obj.ndg_list = ['1', '2']
+                operations = extract_data_obj.get_operations().astype(str)
+                return operations.sort_values(by=list(operations.columns)).reset_index(drop=True)
+
+            with patch.object(fcc, 'operations_months_features', 3):
+                for ref_month, start_date in [('042022', '2022-02-01'), ('052022', '2022-03-01'),
+                                              ('062022', '2022-04-01')]:
+                    cached = extract(ref_month, start_date, True)
+                    pd.testing.assert_frame_equal(cached, extract(ref_month, start_date, False))
+                    self.assertEqual(cached['DATE_OPERATION'].min()[:10], start_date[:8] + '15')
+
+            self.assertEqual(sorted(os.listdir(os.path.join(directory, '060459'))),
+                             ['2022-04.parquet', '2022-05.parquet', '2022-06.parquet', 'index.json'])
+            engine.dispose()
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_operations_cache(self, mock_read_query):
+        """
+            test operations cache (same operations of the extraction without cache, only missing months extracted)
+        """
+
+        mock_read_query.return_value = "SELECT NDG, DATE_OPERATION, AMOUNT FROM OPERATIONS WHERE CODE = '%s' " \
+                                       "AND NDG IN %s"
+
+        def operations_month(month, ndgs):
+            return pd.DataFrame({'CODE': '060459', ndg_name: ndgs, 'DATE_OPERATION': f'2022-{month}-15',
+                                 'AMOUNT': [float(ndg) for ndg in ndgs]})
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            operations_month('03', ['1', '2']).to_sql('OPERATIONS', engine, index=False)
+            operations_month('04', ['1', '2']).to_sql('OPERATIONS', engine, index=False, if_exists='append')
+
+            def extract(ref_month, ndgs, cache):
+                extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                               system_id='1', control_code='1', intermediary_code='060459',
+                                               ref_month=ref_month, registry_month_to_skip=1, chunk_size=2,
+                                               operations_cache_directory=directory if cache else None,
+                                               operations_cache_months=3)
+                extract_data_obj.ndg_list = ndgs
+                operations = extract_data_obj.get_operations().astype(str)
+                return operations.sort_values(by=list(operations.columns)).reset_index(drop=True)
+
+            first = extract('042022', ['1', '2'], True)
+            pd.testing.assert_frame_equal(first, extract('042022', ['1', '2'], False))
+
+            # only the operations of the reference month are extracted for the cached ndg
+            operations_month('03', ['3']).to_sql('OPERATIONS', engine, index=False, if_exists='append')
+            operations_month('05', ['1', '3']).to_sql('OPERATIONS', engine, index=False, if_exists='append')
+            with patch('pandas.read_sql_query', wraps=pd.read_sql_query) as mock_read_sql_query:
+                second = extract('052022', ['1', '2', '3'], True)
+            queries = [str(call.args[0]) for call in mock_read_sql_query.call_args_list]
+            self.assertIn("DATE_OPERATION >= '2022-05-01'", queries[0])
+            self.assertIn("('1', '2')", queries[0])
+            self.assertIn("('3')", queries[1])
+
+            pd.testing.assert_frame_equal(second, extract('052022', ['1', '2', '3'], False))
+            self.assertEqual(len(second), 7)
+
+            # partitions older than the retention months are evicted
+            extract('072022', ['1'], True)
+            cache_directory = os.path.join(directory, '060459')
+            self.assertFalse(os.path.exists(os.path.join(cache_directory, '2022-04.parquet')))
+            self.assertTrue(os.path.exists(os.path.join(cache_directory, '2022-05.parquet')))
+
+            engine.dispose()
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_operations_cache_dtypes(self, mock_read_query):
+        """
+            test the operations have the same dtypes with and without cached operations, the values that can not be
+            cast are replaced with missing values
+        """
+
+        mock_read_query.return_value = "SELECT NDG, DATE_OPERATION, AMOUNT, CAUSAL FROM OPERATIONS " \
+                                       "WHERE CODE = '%s' AND NDG IN %s"
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            pd.DataFrame({'CODE': '060459', ndg_name: ['1', '2', '1'],
+                          'DATE_OPERATION': ['2022-03-15', '2022-03-15', '2022-04-15'],
+                          'AMOUNT': ['1.5', 'x', '2.5'], 'CAUSAL': ['048', '050', '048']}).to_sql('OPERATIONS', engine,
+                                                                                                 index=False)
+
+            def extract():
+                extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                               system_id='1', control_code='1', intermediary_code='060459',
+                                               ref_month='042022', registry_month_to_skip=1, chunk_size=2,
+                                               operations_cache_directory=directory, operations_cache_months=3)
+                extract_data_obj.ndg_list = ['1', '2']
+                return extract_data_obj.get_operations()
+
+            # empty cache (the amount not valid is replaced and reported), then cached operations
+            with self.assertLogs(level='WARNING'):
+                first = extract()
+            second = extract()
+
+            self.assertEqual(first.dtypes.astype(str).to_dict(), second.dtypes.astype(str).to_dict())
+            self.assertEqual(str(first['AMOUNT'].dtype), 'float64')
+            self.assertEqual(first['AMOUNT'].isna().sum(), 1)
+            self.assertEqual(second['AMOUNT'].isna().sum(), 1)
+            engine.dispose()
+
+    @patch('kassandra.extraction.extract_data.ExtractData._private_read_query')
+    def test_schema_extraction(self, mock_read_query):
+        """
+            test the schema of the operations (columns selected in the query and dtypes applied to each chunk)
+        """
+
+        mock_read_query.return_value = "SELECT * FROM OPERATIONS WHERE CODE = '%s' AND NDG IN %s"
+        schema = {'DATE_OPERATION': 'datetime64[ns]', 'AMOUNT': 'float64', 'CAUSAL': 'category', 'SIGN': 'string'}
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            pd.DataFrame({'code': '060459', 'ndg': ['1', '2', '3'], 'date_operation': ['2022-03-15', '2022-04-15', ''],
+                          'amount': ['1.5', '2', ''], 'causal': ['48', '50', '48'], 'sign': ['A', 'D', 'A'],
+                          'unused': 'unused'}).to_sql('OPERATIONS', engine, index=False)
+
+            extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                           system_id='1', control_code='1', intermediary_code='060459',
+                                           ref_month='042022', registry_month_to_skip=1, chunk_size=2,
+                                           schemas={'operations': schema})
+            extract_data_obj.ndg_list = ['1', '2', '3']
+            operations = extract_data_obj.get_operations().reset_index(drop=True)
+            engine.dispose()
+
+        self.assertIn('SELECT SRC.DATE_OPERATION, SRC.AMOUNT', extract_data_obj.operations_query)
+        self.assertEqual(operations.columns.tolist(), list(schema))
+        self.assertEqual(operations.dtypes.astype(str).tolist(), ['datetime64[ns]', 'float64', 'category', 'string'])
+        self.assertEqual(operations['AMOUNT'].tolist()[:2], [1.5, 2.0])
+        self.assertTrue(pd.isna(operations.loc[2, 'DATE_OPERATION']) and pd.isna(operations.loc[2, 'AMOUNT']))
+
+        # values that can not be cast are not replaced with missing values
+        with tempfile.TemporaryDirectory() as directory:
+            engine = sqlalchemy.create_engine(f'sqlite:///{directory}/dwa.db')
+            pd.DataFrame({'code': '060459', 'ndg': ['1'], 'date_operation': ['2022-03-15'], 'amount': ['x'],
+                          'causal': ['48'], 'sign': ['A']}).to_sql('OPERATIONS', engine, index=False)
+
+            extract_data_obj = ExtractData(engine_evaluation=engine, engine_dwa=engine, registry=Registry(None),
+                                           system_id='1', control_code='1', intermediary_code='060459',
+                                           ref_month='042022', registry_month_to_skip=1,
+                                           schemas={'operations': schema})
+            extract_data_obj.ndg_list = ['1']
+            with self.assertRaises(ValueError):
+                extract_data_obj.get_operations()
+            engine.dispose()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test schema of the datasets read from dwa
+@TODO:
+"""
+
+import unittest
+import pandas as pd
+from kassandra.extraction.schema import project_query, apply_schema, cast_columns, get_storage_dtypes, \
+    get_categorical_columns
+
+
+class TestSchema(unittest.TestCase):
+    def test_project_query(self):
+        """
+            test projection of the columns of the schema
+        """
+
+        query = project_query("SELECT * FROM SUBJECTS WHERE CODE = '%s' AND NDG IN %s;\n", {'NDG': None, 'SAE': None})
+        self.assertEqual(query, "SELECT SRC.NDG, SRC.SAE FROM (SELECT * FROM SUBJECTS WHERE CODE = '%s' AND NDG IN %s) SRC")
+
+    def test_apply_schema(self):
+        """
+            test columns selection and cast (None keeps the dtype read from the database)
+        """
+
+        dataframe = pd.DataFrame({'ndg': [1, 2], 'birth_day': ['1980-01-01', '1990-01-01'], 'other': ['a', 'b']})
+        result = apply_schema(dataframe, {'NDG': 'string', 'BIRTH_DAY': None})
+
+        self.assertEqual(result.columns.tolist(), ['NDG', 'BIRTH_DAY'])
+        self.assertEqual(str(result['NDG'].dtype), 'string')
+        self.assertEqual(result['BIRTH_DAY'].dtype, object)
+
+        with self.assertRaises(ValueError):
+            apply_schema(dataframe, {'NDG': 'string', 'MISSING': None})
+
+    def test_cast_errors(self):
+        """
+            test the dates and the amounts that can not be cast raise an error or are coerced with a warning
+        """
+
+        dataframe = pd.DataFrame({'DATE': ['2023-01-01', 'wrong', None], 'AMOUNT': ['1.5', '2', None]})
+        schema = {'DATE': 'datetime64[ns]', 'AMOUNT': 'float64'}
+
+        with self.assertRaises(ValueError):
+            apply_schema(dataframe.copy(), schema)
+        with self.assertRaises(ValueError):
+            cast_columns(dataframe.copy(), schema, errors='wrong')
+
+        with self.assertLogs(level='WARNING') as logs:
+            result = apply_schema(dataframe.copy(), schema, errors='coerce')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('1 values of DATE', logs.output[0])
+        self.assertEqual(result['DATE'].isna().tolist(), [False, True, True])
+        self.assertEqual(result['AMOUNT'].tolist()[:2], [1.5, 2.0])
+
+        # missing values in the database are not coerced
+        result = apply_schema(dataframe.iloc[[0, 2]].copy(), schema)
+        self.assertEqual(result['DATE'].isna().tolist(), [False, True])
+
+    def test_storage_dtypes(self):
+        """
+            test dtypes used to store the datasets on disk (categories restored after the storage)
+        """
+
+        dtype = {'AMOUNT': 'float64', 'CAUSAL': 'category'}
+        columns = ['AMOUNT', 'CAUSAL', 'NDG']
+
+        self.assertEqual(get_storage_dtypes(columns, dtype), {'AMOUNT': 'float64', 'CAUSAL': 'string', 'NDG': 'string'})
+        self.assertEqual(get_storage_dtypes(columns, 'string'), {column: 'string' for column in columns})
+        self.assertEqual(get_categorical_columns(columns, dtype), {'CAUSAL': 'category'})
+        self.assertEqual(get_categorical_columns(columns, 'string'), {})
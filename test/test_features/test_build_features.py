@@ -11,12 +11,13 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pandas as pd
 import pandas.testing as pd_testing
 
 from kassandra.config_module import app_config as apc
 from kassandra.config_module import feature_creation_config as cfg
-from kassandra.features_creation.build_features import BuildFeatures
+from kassandra.features_creation.build_features import BuildFeatures, get_ndg_partitions
 from kassandra.features_creation.build_features_prod import BuildFeaturesProd
 from kassandra.features_creation.build_features_train import BuildFeaturesTrain
 from kassandra.features_creation.features_objects.target_features import TargetFeatures
@@ -43,6 +44,32 @@ class TestBuildFeatures(unittest.TestCase):
         pd_testing.assert_frame_equal(result, self.build_features(), check_dtype=False, check_like=True, check_exact=False)
         self.assertTrue(self.build_features_given_date().empty)
 
+        # low-cardinality codes of the operations as categoricals
+        operations = self.build_features._private_operations.get_operations()
+        for column in [cfg.sign_column, cfg.causal_column, cfg.counterpart_column]:
+            self.assertIsInstance(operations[column].dtype, pd.CategoricalDtype)
+
+    def test_partitions(self):
+        """
+            test the features built by ndg partitions are identical to the features of all the subjects together
+            :return: None
+        """
+
+        for given_date, bank_months in [(None, None), (None, 24), ('2018-01-01', 24)]:
+            expected = BuildFeatures(self.subject_data.copy(), self.operations_data.copy(),
+                                     self.operations_subjects_data.copy(), self.target_data.copy(), 12, given_date,
+                                     bank_months)()
+            inputs = [data.rename(columns=str.lower) for data in [self.subject_data, self.operations_data,
+                                                                  self.operations_subjects_data, self.target_data]]
+            build_features = BuildFeatures(*inputs, 12, given_date, bank_months, partitions=3)
+
+            # assert
+            pd_testing.assert_frame_equal(expected, build_features(), check_exact=True)
+            self.assertTrue(all(data.columns.str.islower().all() for data in inputs))
+            partitions = list(build_features.iter_features())
+            self.assertLessEqual(len(partitions), 3)
+            self.assertEqual(sum(partition.shape[0] for partition in partitions), expected.shape[0])
+
     @patch('joblib.load', MagicMock())
     @patch('kassandra.features_creation.BuildFeaturesProd._check_encoders_folder', MagicMock())
     def test_build_features_prod(self):
@@ -65,3 +92,23 @@ class TestBuildFeatures(unittest.TestCase):
 
         pd_testing.assert_frame_equal(result, x_train, check_dtype=False, check_like=True, check_exact=False)
         apc.save_model = tmp_save_model
+
+
+class TestNdgPartitions(unittest.TestCase):
+    def test_get_ndg_partitions(self):
+        """
+            test the partition of the ndg is stable and does not depend on the dtype of the ndg
+            :return: None
+        """
+
+        ndgs = pd.Series([str(ndg) for ndg in range(100000001, 100001001)])
+        partitions = get_ndg_partitions(ndgs, 8)
+
+        # assert
+        self.assertEqual(partitions.shape, (1000,))
+        self.assertEqual(set(partitions.tolist()), set(range(8)))
+        np.testing.assert_array_equal(partitions, get_ndg_partitions(ndgs.astype('string'), 8))
+        np.testing.assert_array_equal(partitions[::-1], get_ndg_partitions(ndgs[::-1], 8))
+        np.testing.assert_array_equal(get_ndg_partitions(ndgs, 1), np.zeros(1000, dtype=np.int64))
+        self.assertEqual(get_ndg_partitions(pd.Series(['100000001', '100000002']), 8).tolist(),
+                         partitions[:2].tolist())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test AggregationEngine object
+@TODO:
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+import pandas.testing as pd_testing
+from unittest.mock import MagicMock
+from kassandra.config_module import feature_creation_config as cfg
+from kassandra.features_creation.features_objects.aggregation_engine import AggregationEngine
+from kassandra.features_creation.features_objects.operation_features import OperationsFeatures
+from kassandra.features_creation.features_objects.ndg_encoder import NdgEncoder
+
+
+class TestAggregationEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 2000
+
+        causal_codes = ['48', '50', '10', '43', '77', '99', None]
+        self.analytical_causal = pd.DataFrame({column: rng.choice(causal_codes, 3, replace=False)
+                                               for column in cfg.analytical_causal_columns}, dtype='string')
+        self.country_risk = ['IR', 'KP']
+
+        amount = rng.normal(1000, 500, n).round(2)
+        amount[rng.random(n) < 0.05] = np.nan
+        self.operations = pd.DataFrame({
+            cfg.ndg_name: pd.Series([f'{i:016d}' for i in rng.integers(0, 60, n)], dtype='string'),
+            cfg.sign_column: pd.Series(rng.choice(['A', 'D', 'A', None], n), dtype='string'),
+            cfg.amount_column: amount,
+            cfg.month_year_column: pd.PeriodIndex(pd.to_datetime('2022-01-01') +
+                                                  pd.to_timedelta(rng.integers(0, 365, n), unit='D'), freq='M'),
+            cfg.causal_column: pd.Series(rng.choice(causal_codes, n), dtype='category'),
+            cfg.counterpart_column: pd.Series(rng.choice(['IT', 'IR', 'KP', 'FR', None], n), dtype='category')})
+
+        # subjects with operations of a single sign
+        self.operations.loc[self.operations[cfg.ndg_name] == f'{1:016d}', cfg.sign_column] = 'A'
+        self.operations.loc[self.operations[cfg.ndg_name] == f'{2:016d}', cfg.sign_column] = 'D'
+
+    def test_engine(self):
+        """
+            test the features of the engine (same result of a groupby for each statistic, missing values included)
+        """
+
+        analytical_causal, country_risk = MagicMock(), MagicMock()
+        analytical_causal.get_analytical_causal.return_value = self.analytical_causal
+        country_risk.get_country_risk.return_value = self.country_risk
+        operations_features = OperationsFeatures(dataframe=pd.DataFrame(columns=cfg.operations_columns),
+                                                 columns=cfg.operations_columns, dtype='string',
+                                                 analytical_causal=analytical_causal, country_risk=country_risk,
+                                                 target_object=MagicMock())
+
+        mean_features = operations_features._private_compute_mean_features(self.operations)
+        expected = operations_features._private_compute_analytical_causal_features(self.operations, mean_features)
+        result = AggregationEngine(self.analytical_causal, self.country_risk)(self.operations)
+
+        columns = cfg.output_features_columns[:-1]
+        self.assertEqual(result.columns.tolist(), columns)
+        self.assertTrue(result.isna().any().any())
+        pd_testing.assert_frame_equal(result.astype({column: float for column in columns[1:]}),
+                                      expected[columns].astype({column: float for column in columns[1:]})
+                                      .rename_axis(columns=None))
+
+    def test_empty_operations(self):
+        """
+            test the engine without operations
+        """
+
+        result = AggregationEngine(self.analytical_causal, self.country_risk)(self.operations.iloc[:0])
+
+        self.assertTrue(result.empty)
+        self.assertEqual(result.columns.tolist(), cfg.output_features_columns[:-1])
+
+    def test_encoded_operations(self):
+        """
+            test the engine with ndg codes and categorical signs (same features of the string columns)
+        """
+
+        encoder = NdgEncoder([self.operations[cfg.ndg_name]])
+        operations = self.operations.copy()
+        operations[cfg.ndg_name] = encoder.encode(operations[cfg.ndg_name])
+        operations[cfg.sign_column] = operations[cfg.sign_column].astype(pd.CategoricalDtype(['A', 'D', 'X']))
+
+        engine = AggregationEngine(self.analytical_causal, self.country_risk)
+        expected = engine(self.operations).set_index(cfg.ndg_name)
+        result = engine(operations).set_index(cfg.ndg_name)
+        result.index = encoder.decode(result.index)
+
+        pd_testing.assert_frame_equal(result, expected, check_exact=True)
@@ -8,8 +8,12 @@
 @TODO:
 """
 
+import os
+import tempfile
 import unittest
 import numpy as np
+import pandas as pd
+from unittest.mock import patch
 from kassandra.features_creation.features_objects.categorization_data import ProvinceCategorization, \
     ListValues, AnalyticalCausal
 from kassandra.config_module import feature_creation_config as cfg
@@ -48,6 +52,59 @@ class TestCategorizationData(unittest.TestCase):
         cfg.province_categorization_dict = tmp_province_categorization_dict
         cfg.province_features_to_not_process = tmp_province_features_to_not_process
 
+    def test_province_binning_and_cache(self):
+        """
+            test the binning of the province values (same categories of the sequential comparison) and the cache
+            :return: None
+        """
+
+        values = [np.nan, -1.0, 0.0, 0.25, 0.5, 0.75, 1.0, 1.5, np.inf]
+        dict_value_category = {'ALTO': 1.0, 'MEDIO': 0.5, 'MEDIO_2': 0.5, 'BASSO': 0.0}
+
+        expected = []
+        for value in values:
+            category = 'NONE'
+            for key, threshold in sorted(dict_value_category.items(), key=lambda x: x[1], reverse=True):
+                if value >= threshold:
+                    category = key
+                    break
+            expected.append(category)
+
+        province = ProvinceCategorization()
+        province._private_province = pd.DataFrame({'Value': values})
+        province._private_province_categorization('Value', dict_value_category)
+        self.assertEqual(province._private_province_processed['VALUE RANGED'].tolist(), expected)
+
+        with tempfile.TemporaryDirectory() as directory:
+            xlsx_path = os.path.join(directory, 'province.xlsx')
+            with open(xlsx_path, 'w') as file:
+                file.write('province')
+
+            def load_province_list(self):
+                self._private_province = pd.DataFrame({'Value': values, 'Sigla': range(len(values))})
+
+            with patch.object(cfg, 'country_province_path', xlsx_path), \
+                    patch.object(cfg, 'province_categorization_dict', [['Value', dict_value_category]]), \
+                    patch.object(cfg, 'province_features_to_not_process', ['Sigla']), \
+                    patch.object(ProvinceCategorization, '_private_load_province_list', autospec=True,
+                                 side_effect=load_province_list) as load:
+                first = ProvinceCategorization(directory)()
+                second = ProvinceCategorization(directory)()
+                self.assertEqual(load.call_count, 1)
+                pd.testing.assert_frame_equal(first, second)
+
+                # the cache is invalidated by the modification of the file
+                stat = os.stat(xlsx_path)
+                os.utime(xlsx_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+                ProvinceCategorization(directory)()
+                self.assertEqual(load.call_count, 2)
+
+                # and by the modification of the categorization
+                with patch.object(cfg, 'province_features_to_not_process', []):
+                    third = ProvinceCategorization(directory)()
+                self.assertEqual(load.call_count, 3)
+                self.assertEqual(third.columns.tolist(), ['VALUE RANGED'])
+
     def test_list_values(self):
         """
             test list values object
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test NdgEncoder object
+@TODO:
+"""
+
+import unittest
+import pandas as pd
+from kassandra.config_module import feature_creation_config as cfg
+from kassandra.features_creation.features_objects.ndg_encoder import NdgEncoder
+from kassandra.features_creation.features_objects.object_features import ObjectFeatures
+
+
+class TestNdgEncoder(unittest.TestCase):
+    def setUp(self):
+        self.subjects = pd.Series(['0000000000000003', '0000000000000001', None])
+        self.target = pd.Series(['0000000000000002', '0000000000000001'], dtype='string')
+        self.encoder = NdgEncoder([self.subjects, self.target])
+
+    def test_encode_decode(self):
+        """
+            test encoding (codes in the order of the sorted ndg) and decoding of the ndg
+        """
+
+        codes = self.encoder.encode(pd.Series(['0000000000000003', '0000000000000009', None, '0000000000000001']))
+
+        self.assertEqual(len(self.encoder), 3)
+        self.assertEqual(str(codes.dtype), cfg.ndg_code_dtype)
+        self.assertEqual(codes.tolist(), [2, pd.NA, pd.NA, 0])
+
+        ndgs = self.encoder.decode(codes)
+        self.assertEqual(ndgs.name, cfg.ndg_name)
+        self.assertEqual(str(ndgs.dtype), cfg.ndg_dtype)
+        self.assertEqual(ndgs.tolist(), ['0000000000000003', pd.NA, pd.NA, '0000000000000001'])
+
+        sorted_codes = codes.dropna().sort_values()
+        self.assertEqual(self.encoder.decode(sorted_codes).tolist(), sorted(ndgs.dropna().tolist()))
+
+    def test_encode_object(self):
+        """
+            test encoding of the ndg of a features object
+        """
+
+        dataframe = pd.DataFrame({cfg.ndg_name: self.target, 'STATUS': ['A', 'B']})
+        general_object = ObjectFeatures(dataframe, [cfg.ndg_name, 'STATUS'], 'string')
+        general_object.encode_ndg(self.encoder)
+
+        self.assertEqual(general_object.get_ndgs().tolist(), [1, 0])
+        self.assertEqual(dataframe[cfg.ndg_name].tolist(), self.target.tolist())
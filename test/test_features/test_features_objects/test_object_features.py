@@ -10,6 +10,7 @@
 
 import pandas as pd
 from unittest import TestCase
+from kassandra.config_module import feature_creation_config as cfg
 from kassandra.features_creation.features_objects.object_features import ObjectFeatures
 
 
@@ -31,4 +32,23 @@ class TestObjectFeatures(TestCase):
         self.assertEqual(general_object._private_dataframe.dtypes['A'], object)
 
         with self.assertRaises(AttributeError):
-            ObjectFeatures(dataframe, ['A'], 'dtype')
\ No newline at end of file
+            ObjectFeatures(dataframe, ['A'], 'dtype')
+
+    def test_preprocess_operations(self):
+        """
+            the operations read as strings are cast to the dtypes of the operations (dates, amounts, categories)
+        """
+
+        dataframe = pd.DataFrame({'account': ['1', '2', '3'], 'sign': ['A', 'D', 'A'], 'amount': ['1.5', '', 'x'],
+                                  'date_operation': ['2023-01-05', '2023-02-10', None],
+                                  'code_operation': ['10', '20', '30'], 'causal': ['048', '050', '048'],
+                                  'counterpart_country': ['086', None, '086']}, dtype=object)
+
+        with self.assertLogs(level='WARNING'):
+            operations = ObjectFeatures(dataframe, cfg.operations_columns, cfg.operations_dtype)._private_dataframe
+
+        self.assertEqual({column: str(dtype) for column, dtype in operations.dtypes.items()},
+                         {column: str(pd.Series(dtype=dtype).dtype) for column, dtype in cfg.operations_dtype.items()})
+        self.assertEqual(operations[cfg.amount_column].isna().tolist(), [False, True, True])
+        self.assertEqual(operations[cfg.date_operation_column].iloc[0], pd.Timestamp('2023-01-05'))
+        self.assertEqual(operations[cfg.sign_column].cat.categories.tolist(), ['A', 'D'])
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test class for the reference data registry
+@TODO:
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from unittest.mock import patch
+from kassandra.features_creation.features_objects.reference_data import ReferenceDataRegistry, get_file_stamp
+from kassandra.features_creation.features_objects.categorization_data import ListValues
+from kassandra.config_module import feature_creation_config as cfg
+
+
+class TestReferenceData(unittest.TestCase):
+    def setUp(self):
+        ReferenceDataRegistry().clear()
+
+    def tearDown(self):
+        ReferenceDataRegistry().clear()
+
+    def test_singleton(self):
+        """
+            test the registry is shared in the process
+            :return: None
+        """
+
+        self.assertIs(ReferenceDataRegistry(), ReferenceDataRegistry())
+
+    def test_reload_on_change(self):
+        """
+            test the reference data is loaded once and reloaded only when the file changes
+            :return: None
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'list_values.csv')
+            with open(path, 'w') as file:
+                file.write('PRV_A;RISCHIO_PAESE_ALTISSIMO;RISCHIO_PAESE_ALTO\nX;IR;AF\n')
+
+            with patch.object(cfg, 'list_values_path', path), patch.object(cfg, 'list_values_delimiter', ';'), \
+                    patch.object(cfg, 'list_values_dtype', 'string'):
+                registry = ReferenceDataRegistry()
+                first = registry.get_list_values()
+                second = ReferenceDataRegistry().get_list_values()
+
+                # assert
+                self.assertIsInstance(first, ListValues)
+                self.assertIs(first, second)
+                self.assertEqual(first.get_country_risk(), ['IR', 'AF'])
+
+                # the callers get copies of the shared table
+                first.get_list_values().loc[0, 'PRV_A'] = 'Y'
+                self.assertEqual(second.get_list_values().loc[0, 'PRV_A'], 'X')
+
+                stat = os.stat(path)
+                with open(path, 'w') as file:
+                    file.write('PRV_A;RISCHIO_PAESE_ALTISSIMO;RISCHIO_PAESE_ALTO\nX;IR;SY\n')
+                os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+                third = registry.get_list_values()
+                self.assertIsNot(first, third)
+                self.assertEqual(third.get_country_risk(), ['IR', 'SY'])
+
+                statistics = registry.get_statistics()['list_values']
+                self.assertEqual(statistics['hits'], 1)
+                self.assertEqual(statistics['misses'], 2)
+                self.assertEqual(statistics['loads'], 2)
+                self.assertGreater(statistics['load_time'], 0.0)
+
+    def test_province_categorization(self):
+        """
+            test the province categorization is built only when it is not in the registry and the callers get copies
+            :return: None
+        """
+
+        province = pd.DataFrame({'PROVINCE': ['MI', 'RM'], 'RISK RANGED': ['HIGH', 'LOW']})
+        with patch('kassandra.features_creation.features_objects.reference_data.ProvinceCategorization') as mock:
+            mock.get_cache_key.return_value = 'key'
+            mock.return_value.return_value = province.copy()
+
+            registry = ReferenceDataRegistry()
+            first = registry.get_province_categorization()
+            first.loc[0, 'RISK RANGED'] = 'CHANGED'
+            second = registry.get_province_categorization()
+
+        # assert
+        self.assertEqual(mock.call_count, 1)
+        pd.testing.assert_frame_equal(second, province)
+        self.assertEqual(registry.get_statistics()['province_categorization']['hits'], 1)
+
+    def test_loader_error(self):
+        """
+            test a failed load is not stored in the registry
+            :return: None
+        """
+
+        registry = ReferenceDataRegistry()
+        with self.assertRaises(FileNotFoundError):
+            registry.get('missing', lambda: open('/missing/file.csv'), get_file_stamp('/missing/file.csv'))
+        self.assertEqual(registry.get('missing', lambda: 'loaded', get_file_stamp('/missing/file.csv')), 'loaded')
+
+        statistics = registry.get_statistics()['missing']
+        self.assertEqual((statistics['hits'], statistics['misses'], statistics['loads']), (0, 2, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,7 @@ import pandas as pd
 from unittest.mock import MagicMock
 from kassandra.config_module import feature_creation_config as cfg
 from kassandra.features_creation.features_objects.subject_features import SubjectFeatures, ObjectFeatures
+from kassandra.features_creation.features_objects.categorization_data import build_categories_lookup
 
 
 class TestSubjectFeatures(unittest.TestCase):
@@ -85,6 +86,28 @@ class TestSubjectFeatures(unittest.TestCase):
         self.assertEqual(expected_df, category)
         cfg.subjects_columns = tmp_subject_columns
 
+    def test_categorization_lookup(self):
+        """
+            test categorization with the value -> category dictionary (first category of a value, none and other)
+        """
+
+        df_categorization = pd.DataFrame({'PRV': ['MI', 'TO', 'RM', None, float('nan'), 'NULL', 'XX', 'MI', 12.0]})
+        tmp_subject_columns = cfg.subjects_columns
+        cfg.subjects_columns = ['PRV']
+        self.list_values.get_list_values.return_value = pd.DataFrame({'PRV_1': ['MI', 'TO', '12.0'],
+                                                                      'PRV_2': ['RM', 'MI', None],
+                                                                      'OTHER': ['XX', None, None]}, dtype='string')
+
+        self.assertEqual(build_categories_lookup(self.list_values.get_list_values(), 'PRV'),
+                         {'MI': 'PRV_1', 'TO': 'PRV_1', '12.0': 'PRV_1', 'RM': 'PRV_2'})
+
+        subject_features = SubjectFeatures(df_categorization, self.list_values)
+        subject_features._private_categorize(row_name='PRV', prefix_name='PRV')
+        category = subject_features._private_dataframe['PRV'].tolist()
+        self.assertEqual(['PRV_1', 'PRV_1', 'PRV_2', 'PRV_NONE', 'PRV_NONE', 'PRV_NONE', 'PRV_OTHER', 'PRV_1', 'PRV_1'],
+                         category)
+        cfg.subjects_columns = tmp_subject_columns
+
     def test_call(self):
         """
             test call function
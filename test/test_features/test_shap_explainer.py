@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test class for the shap explainer factory
+@TODO:
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from kassandra.features_creation.shap_explainer import create_explainer, get_background, get_shap_values, \
+    compare_explainers, create_explainer_bundle, save_explainer_bundle, load_explainer_bundle, get_explainer_path
+from kassandra.features_creation import BuildFeaturesProd, BuildFeaturesTrain
+from kassandra.config_module import app_config as apc
+from kassandra.config_module import feature_creation_config as fcc
+
+
+class TestShapExplainer(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.data = pd.DataFrame(random.rand(300, 4), columns=['A', 'B', 'C', 'D'])
+        self.target = (self.data['A'] + self.data['B'] > 1).astype(int)
+        self.samples = self.data.iloc[:5]
+
+    def test_tree_explainer(self):
+        """
+            test the tree explainer is used for the tree models (exact shap values of the probability)
+            :return: None
+        """
+
+        model = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=0).fit(self.data, self.target)
+        explainer, mode = create_explainer(model, self.data, background_size=50)
+        explanation = explainer(self.samples)
+        values = get_shap_values(explanation)
+
+        # assert
+        self.assertEqual(mode, 'tree')
+        self.assertEqual(values.shape, self.samples.shape)
+        base_values = np.asarray(explanation.base_values)
+        base_values = base_values[:, -1] if base_values.ndim == 2 else base_values
+        np.testing.assert_allclose(values.sum(axis=1) + base_values, model.predict_proba(self.samples)[:, 1],
+                                   atol=1e-6)
+
+    def test_fallback_explainer(self):
+        """
+            test the summarised background is used for the models not supported by the tree explainer
+            :return: None
+        """
+
+        model = LogisticRegression().fit(self.data, self.target)
+
+        for fallback_mode in ['sampled', 'kmeans']:
+            explainer, mode = create_explainer(model, self.data, background_size=20, fallback_mode=fallback_mode)
+            values = get_shap_values(explainer(self.samples))
+
+            # assert
+            self.assertEqual(mode, fallback_mode)
+            self.assertEqual(values.shape, self.samples.shape)
+
+        with self.assertRaises(ValueError):
+            create_explainer(model, self.data, mode='tree')
+        with self.assertRaises(ValueError):
+            create_explainer(model, self.data, mode='wrong')
+
+    def test_full_explainer(self):
+        """
+            test the full mode explains the output of predict (previous explainer) unless the probability is requested
+            :return: None
+        """
+
+        model = LogisticRegression().fit(self.data, self.target)
+        data = self.data.iloc[:60]
+
+        for full_probability, expected in [(False, model.predict(self.samples)),
+                                           (True, model.predict_proba(self.samples)[:, 1])]:
+            explainer, mode = create_explainer(model, data, mode='full', full_probability=full_probability)
+            explanation = explainer(self.samples)
+
+            # assert
+            self.assertEqual(mode, 'full')
+            np.testing.assert_allclose(get_shap_values(explanation).sum(axis=1) + explanation.base_values, expected,
+                                       atol=1e-6)
+
+            bundle = create_explainer_bundle(model, data, mode='full', full_probability=full_probability)
+            self.assertEqual(bundle['probability'], full_probability)
+
+    def test_background(self):
+        """
+            test the size of the summarised background
+            :return: None
+        """
+
+        self.assertEqual(get_background(self.data, 'sampled', 10).shape, (10, 4))
+        self.assertEqual(get_background(self.data, 'kmeans', 10).shape, (10, 4))
+        self.assertEqual(get_background(self.data, 'full', 10).shape, self.data.shape)
+        self.assertEqual(get_background(self.data.iloc[:5], 'kmeans', 10).shape, (5, 4))
+
+    def test_compare_explainers(self):
+        """
+            test the report of time and approximation error of the modes
+            :return: None
+        """
+
+        model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(self.data, self.target)
+        report = compare_explainers(model, self.data.iloc[:60], self.samples, background_size=20)
+
+        # assert
+        self.assertEqual(report['MODE'].tolist(), ['full', 'tree', 'sampled', 'kmeans'])
+        self.assertEqual(report.loc[0, 'MEAN_ABS_ERROR'], 0.0)
+        self.assertTrue((report['SECONDS'] > 0).all())
+        self.assertTrue((report['MAX_ABS_ERROR'] < 1).all())
+
+    def test_explainer_bundle(self):
+        """
+            test the explainer bundle saved next to the model gives the same shap values
+            :return: None
+        """
+
+        tree_model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(self.data, self.target)
+        linear_model = LogisticRegression().fit(self.data, self.target)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = get_explainer_path(directory, '20230701.joblib')
+            self.assertEqual(path, os.path.join(directory, '20230701.explainer'))
+
+            for model, expected_mode in [(tree_model, 'tree'), (linear_model, 'sampled')]:
+                bundle = create_explainer_bundle(model, self.data, background_size=20, fallback_mode='sampled')
+                save_explainer_bundle(bundle, path)
+                explainer, loaded = load_explainer_bundle(path, model)
+                reference, _ = create_explainer(model, self.data, background_size=20, fallback_mode='sampled')
+
+                # assert
+                self.assertEqual(loaded['mode'], expected_mode)
+                self.assertEqual(loaded['columns'], self.data.columns.tolist())
+                self.assertEqual(loaded['background'].shape, (20, 4))
+                np.testing.assert_allclose(get_shap_values(explainer(self.samples)),
+                                           get_shap_values(reference(self.samples)), atol=1e-6)
+
+            with self.assertRaises(ValueError):
+                load_explainer_bundle(path, linear_model, columns=['B', 'A', 'C', 'D'])
+
+    def test_save_model(self):
+        """
+            test the training saves the explainer bundle with the model and the production rebuilds the explainer
+            when the columns of the bundle do not match the features
+            :return: None
+        """
+
+        model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(self.data, self.target)
+        build_features_train = BuildFeaturesTrain.__new__(BuildFeaturesTrain)
+        build_features_train._x_train_trans = self.data
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(apc, 'models_directory', directory), patch.object(apc, 'data_directory', directory), \
+                patch.object(apc, 'save_model', True):
+            self.data.to_csv(directory + fcc.x_train_name, index=False)
+
+            model_path = build_features_train.save_model(model, '20230701')
+            self.assertEqual(model_path, os.path.join(directory, '20230701.joblib'))
+            self.assertTrue(os.path.exists(get_explainer_path(directory, '20230701.joblib')))
+
+            with patch('kassandra.features_creation.build_features_prod.create_explainer',
+                       wraps=create_explainer) as mock_create:
+                BuildFeaturesProd.get_shap_explainer(model_object=model, model_name_date='20230701.joblib',
+                                                     columns=self.data.columns.tolist())
+                mock_create.assert_not_called()
+
+                explainer = BuildFeaturesProd.get_shap_explainer(model_object=model, model_name_date='20230701.joblib',
+                                                                 columns=['B', 'A', 'C', 'D'])
+                mock_create.assert_called_once()
+                self.assertEqual(get_shap_values(explainer(self.samples)).shape, (5, 4))
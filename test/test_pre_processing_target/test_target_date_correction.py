@@ -11,7 +11,8 @@
 import unittest
 from datetime import datetime
 import pandas as pd
-from kassandra.pre_processing_target.target_date_correction import parse_date, update_date, update_target
+from kassandra.pre_processing_target.target_date_correction import parse_date, update_date, update_target, \
+    extract_refmonth, check_refmonth
 
 
 class TestTargetProcessing(unittest.TestCase):
@@ -71,6 +72,62 @@ class TestTargetProcessing(unittest.TestCase):
         with self.assertRaises(ValueError):
             update_date(df)
 
+    def test_update_date_fast_path(self):
+        # regex rows, rows parsed as XML (spaces, attributes, missing refmonth) and other software
+        xml = ['<main><attributes><simple><id>RefMonth</id><value>202110</value></simple></attributes></main>',
+               '<main><attributes><simple><id>REFMONTH</id><value>3/2022</value></simple></attributes></main>',
+               '<main><attributes><simple id="1"><id>REFMONTH</id><value>202205</value></simple></attributes></main>',
+               '<main><attributes><simple><id>REFMONTH</id><value> 07/2022</value></simple></attributes></main>',
+               '<main><attributes><simple><id>OTHERID</id><value>202201</value></simple></attributes></main>',
+               '<main><attributes><simple><id>REFMONTH</id><value>202301</value></simple></attributes></main>']
+        df = pd.DataFrame({'SOFTWARE': ['COMPORTAMENT'] * 5 + ['OTHER_SOFTWARE'], 'XML': xml, 'DATA': [None] * 6})
+
+        dates, parsed = extract_refmonth(df['XML'])
+        self.assertEqual(parsed.tolist(), [True, True, False, False, False, True])
+        self.assertEqual(dates.tolist(), ['2021-10-01 01:00:00.000', '2022-03-01 01:00:00.000',
+                                          '2023-01-01 01:00:00.000'])
+
+        expected = df.copy()
+        update_date(expected, fast_path=False)
+        update_date(df)
+        self.assertEqual(df['DATA'].tolist(), expected['DATA'].tolist())
+        self.assertEqual(df['DATA'].tolist()[:5], ['2021-10-01 01:00:00.000', '2022-03-01 01:00:00.000',
+                                                   '2022-05-01 01:00:00.000', '2022-07-01 01:00:00.000', None])
+        self.assertIsNone(df.at[5, 'DATA'])
+
+        # out of range values are parsed as XML (and rejected)
+        df = pd.DataFrame({'SOFTWARE': ['COMPORTAMENT'], 'XML': [xml[0].replace('202110', '202113')], 'DATA': [None]})
+        with self.assertRaises(ValueError):
+            update_date(df)
+
+    def test_fast_path_agrees_with_xml(self):
+        # refmonth outside the attributes block, tags in upper case, other attributes before the refmonth
+        xml = ['<main><table><simple><id>REFMONTH</id><value>202110</value></simple></table></main>',
+               '<main><ATTRIBUTES><SIMPLE><ID>REFMONTH</ID><VALUE>202110</VALUE></SIMPLE></ATTRIBUTES></main>',
+               '<main><attributes><simple><id>NDG</id><value>1</value></simple>'
+               '<simple><id>REFMONTH</id><value>202110</value></simple></attributes></main>',
+               '<main><attributes><simple><id>REFMONTH</id><value>202111</value></simple></attributes>'
+               '<tables><simple><id>NOTE</id><value>202201</value></simple></tables></main>']
+        df = pd.DataFrame({'SOFTWARE': 'COMPORTAMENT', 'XML': xml * 50, 'DATA': None})
+
+        dates, parsed = extract_refmonth(df['XML'])
+        self.assertEqual(parsed.tolist()[:4], [False, False, True, True])
+        self.assertTrue(check_refmonth(df['XML'], dates))
+
+        expected = df.copy()
+        update_date(expected, fast_path=False)
+        update_date(df)
+        self.assertEqual(df['DATA'].tolist(), expected['DATA'].tolist())
+
+        # attributes block nested in another element: the regex is different from the XML parsing on the sample
+        nested = '<main><table><attributes><simple><id>REFMONTH</id><value>202110</value></simple></attributes>' \
+                 '</table></main>'
+        df = pd.DataFrame({'SOFTWARE': ['COMPORTAMENT'] * 2, 'XML': [xml[2], nested], 'DATA': [None] * 2})
+        dates, _ = extract_refmonth(df['XML'])
+        self.assertFalse(check_refmonth(df['XML'], dates))
+        update_date(df)
+        self.assertEqual(df['DATA'].tolist(), ['2021-10-01 01:00:00.000', None])
+
     def test_update_target(self):
         eval_df = pd.DataFrame({
             'ID': [1, 2],
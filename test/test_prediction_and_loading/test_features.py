@@ -10,8 +10,9 @@
 
 import unittest
 from unittest.mock import patch
+import numpy as np
 import pandas as pd
-from kassandra.prediction_and_loading.features import FeatureCategories, Features
+from kassandra.prediction_and_loading.features import FeatureCategories, Features, FeaturesBatch
 from test.test_prediction_and_loading import subjects_path
 
 
@@ -95,3 +96,40 @@ class TestFeatures(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             self.features._private_get_features_contribution_str('test6')
+
+    def test_features_batch(self):
+        """
+            test for the class FeaturesBatch (same features of Features when all the features are shown)
+        """
+
+        features_name = FeatureCategories(description_features={}, boolean_features=['A'], binary_features=['B'],
+                                          numerical_features=['C'], currency_features=['D'])
+        values = pd.DataFrame({'A': [1.0, 0.0, 1.0], 'B': [0.5, 0.25, 1.0], 'C': [3.0, 2.0, 0.0],
+                               'D': [10.0, 0.0, 5.0]}, index=['1', '2', '3'])
+        contributions = pd.DataFrame({'A': [0.1, -0.4, 0.0], 'B': [-0.3, 0.2, 0.0], 'C': [0.2, 0.1, 0.0],
+                                      'D': [0.05, 0.3, 0.0]}, index=['1', '2', '3'])
+
+        batch = FeaturesBatch(features_values=values, features_contribution=contributions,
+                              features_name=features_name, max_features=10)
+        batch()
+
+        for position, ndg in enumerate(values.index):
+            features = Features(features_values=values.loc[ndg], features_contribution=contributions.loc[ndg],
+                                features_name=features_name, max_features=10)
+            features()
+
+            expected = [(f.name, f.contribution, f.percentage_contribution, f.contribution_str)
+                        for f in features.list_features]
+            result = [(f.name, f.contribution, f.percentage_contribution, f.contribution_str)
+                      for f in batch.get_features(position).list_features]
+            self.assertEqual(result, expected)
+
+        # top k features (the features with a zero value are not shown)
+        batch = FeaturesBatch(features_values=values, features_contribution=contributions,
+                              features_name=features_name, max_features=2)
+        batch()
+
+        self.assertEqual(batch.indices.tolist(), [[1, 2], [1, 2], [-1, -1]])
+        self.assertEqual([f.name for f in batch.get_features(0).list_features], ['B', 'C'])
+        self.assertEqual(batch.get_features(2).list_features, [])
+        np.testing.assert_allclose(batch.percentages[0], [46.15, 30.77])
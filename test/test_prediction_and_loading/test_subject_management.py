@@ -12,6 +12,7 @@ import unittest
 import numpy as np
 import pandas as pd
 from unittest.mock import patch, MagicMock
+from test import create_in_memory_engine
 from test.test_prediction_and_loading import subjects_path, input_data_path, xml_to_load_path
 from ml_anomaly_gate import AnomalyGate
 from kassandra.prediction_and_loading import FeatureCategories, Subject, Features, Feature
@@ -149,6 +150,70 @@ class TestSubjectManagement(unittest.TestCase):
             self.subject_management.anomaly_gate = None
             self.subject_management.create_xml_and_load()
 
+    def test_batch_create_xml_and_load(self):
+        """
+            test for the registry batch loading (failures raised at the end without stopping the loading)
+        """
+
+        gate = MagicMock()
+        gate.basic_information.system_name = {'0': 'KASSANDRA'}
+        gate.basic_information.code = {'0': '0001'}
+        gate.basic_information.bank_code = {'0': '000000'}
+
+        subject_management = SubjectManagement(model_object=MagicMock(),
+                                               model_date_name='20230601',
+                                               shap_explainer=MagicMock(),
+                                               registry_object=MagicMock(),
+                                               registry_last_prediction_object=MagicMock(),
+                                               evaluation_connection=create_in_memory_engine(),
+                                               anomaly_gate=gate,
+                                               features_categories=self.features_name,
+                                               subjects_info=self.subjects_df,
+                                               ref_month_anomaly='062023',
+                                               registry_batch_loading=True,
+                                               batch_size=2)
+
+        subjects = []
+        for ndg in ['1', '2', '3', '4', '5']:
+            features = Features(features_values=pd.DataFrame(), features_contribution=pd.Series(dtype=float),
+                                features_name=self.features_name, max_features=10)
+            subjects.append(Subject(ndg=ndg, name='test', fiscal_code='test', residence_city='test',
+                                    juridical_nature='PG', residence_country='086',
+                                    birthday='1929-02-17 00:00:00.000', sae='600', ateco='01', office='test',
+                                    score=0.5, features_values=features))
+        subject_management.list_subjects = subjects
+
+        # the xml of the second subject is not loaded, the registry batch of the last subject fails
+        loaded_ndg = []
+
+        def load_on_db(engine):
+            self.assertIs(engine, subject_management.engine)
+            ndg = gate.define_attribute_list.call_args.kwargs['attribute_list'][0]
+            if ndg == subjects[1].ndg: raise ValueError('xml not valid')
+            loaded_ndg.append(ndg)
+
+        def load_batch_on_db(data):
+            if any(row['CLIENT_ID'] == subjects[4].ndg for row in data): raise ValueError('registry error')
+
+        gate.create_attribute.side_effect = lambda etichetta, valore, **kwargs: valore
+        gate.load_on_db.side_effect = load_on_db
+        subject_management.registry.get_registry_data.side_effect = lambda **kwargs: {'CLIENT_ID': kwargs['client_id']}
+        subject_management.registry.load_batch_on_db.side_effect = load_batch_on_db
+
+        with self.assertRaises(ValueError) as context:
+            subject_management.create_xml_and_load()
+        self.assertIn(f'{subjects[1].ndg}/evaluation', str(context.exception))
+        self.assertIn(f'{subjects[4].ndg}/registry', str(context.exception))
+
+        failures = [(failure['NDG'], failure['STEP']) for failure in subject_management.loading_failures]
+        self.assertEqual(failures, [(subjects[1].ndg, 'evaluation'), (subjects[4].ndg, 'registry')])
+        self.assertEqual(sorted(set(loaded_ndg)), [subjects[0].ndg, subjects[2].ndg, subjects[3].ndg,
+                                                   subjects[4].ndg])
+
+        registry_rows = [row['CLIENT_ID'] for call in subject_management.registry.load_batch_on_db.call_args_list
+                         for row in call.args[0]]
+        self.assertNotIn(subjects[1].ndg, registry_rows)
+
     def test_date_transformation(self):
         """
             testing date transformation function
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test class for the stage profiler
+@TODO:
+"""
+
+import os
+import json
+import tempfile
+import unittest
+from kassandra.profiling import StageProfiler, get_peak_rss
+
+
+class TestStageProfiler(unittest.TestCase):
+    def test_stages(self):
+        """
+            test the record of each stage (also the failed one) and the json of the run
+            :return: None
+        """
+
+        profiler = StageProfiler('oneshot', intermediary_code='123456', ref_month='062023')
+
+        with profiler.stage('extraction') as stage:
+            data = list(range(100000))
+            stage['rows'] = len(data)
+
+        with self.assertRaises(ValueError):
+            with profiler.stage('features', rows=10):
+                raise ValueError('error')
+
+        # assert
+        self.assertEqual([stage['stage'] for stage in profiler.stages], ['extraction', 'features'])
+        extraction = profiler.stages[0]
+        self.assertEqual(extraction['rows'], 100000)
+        self.assertGreater(extraction['seconds'], 0)
+        self.assertGreaterEqual(extraction['cpu_seconds'], 0)
+        self.assertGreater(extraction['rows_per_second'], 0)
+        if get_peak_rss() is not None:
+            self.assertGreaterEqual(extraction['peak_rss_delta_mb'], 0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = profiler.save(directory)
+            self.assertTrue(os.path.basename(path).startswith('oneshot_123456_062023_'))
+            with open(path, 'r') as file:
+                record = json.load(file)
+
+        self.assertEqual(record['name'], 'oneshot')
+        self.assertEqual(record['intermediary_code'], '123456')
+        self.assertEqual(record['ref_month'], '062023')
+        self.assertEqual(len(record['stages']), 2)
+        self.assertGreaterEqual(record['seconds'], extraction['seconds'])
+
+    def test_disabled(self):
+        """
+            test the disabled profiler does not record the stages
+            :return: None
+        """
+
+        profiler = StageProfiler('oneshot', enabled=False)
+        with profiler.stage('extraction') as stage:
+            stage['rows'] = 10
+
+        # assert
+        self.assertEqual(profiler.stages, [])
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(profiler.save(directory))
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
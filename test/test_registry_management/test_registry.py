@@ -9,7 +9,9 @@
 """
 
 import unittest
+import sqlalchemy
 import pandas as pd
+from unittest.mock import patch
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 from kassandra.config_module import registry_config as rc
@@ -136,6 +138,157 @@ class TestRegistry(unittest.TestCase):
         registry.delete_registry()
         self.assertIsNone(registry.get_table())
 
+    def test_load_batch_on_db(self):
+        """
+            test load of the rows in a single transaction
+            :return:
+        """
+
+        registry = Registry(self.engine)
+        data = [registry.get_registry_data(system_id="000000", control_code="000000", intermediary_code="000000",
+                                           client_id=str(i), prediction=0.5, model_name_date="model_name_date",
+                                           current_date=datetime(year=2023, month=5, day=1)) for i in range(3)]
+
+        with self.assertRaises(sqlalchemy.exc.SQLAlchemyError):
+            registry.load_batch_on_db(data)
+
+        registry.create_registry_table_index()
+        registry.load_batch_on_db(data)
+
+        id_to_not_process = registry.get_client_id_to_not_process(system_id="000000", control_code="000000",
+                                                                  intermediary_code="000000",
+                                                                  start_date='2023-01-01', end_date='2023-05-02')
+        self.assertEqual(sorted(id_to_not_process), ['0', '1', '2'])
+
+        # the transaction is rolled back when a row fails (duplicated primary key)
+        with self.assertRaises(sqlalchemy.exc.SQLAlchemyError):
+            registry.load_batch_on_db([dict(data[0], **{rc.client_id_name: '3'}), data[0]])
+
+        id_to_not_process = registry.get_client_id_to_not_process(system_id="000000", control_code="000000",
+                                                                  intermediary_code="000000",
+                                                                  start_date='2023-01-01', end_date='2023-05-02')
+        self.assertEqual(sorted(id_to_not_process), ['0', '1', '2'])
+
+    def test_load_many(self):
+        """
+            test load of the records in batches with the on conflict policies
+            :return:
+        """
+
+        registry = Registry(self.engine)
+        registry.create_registry_table_index()
+
+        columns = [column.name for column in registry.get_columns_registry()]
+        records = pd.DataFrame({rc.id_system_name: "000000", rc.control_code_name: "000000",
+                                rc.intermediary_code_name: "000000", rc.client_id_name: ['0', '1', '2'],
+                                rc.report_date_name: datetime(year=2023, month=5, day=1),
+                                rc.prediction_name: [0.1, 0.2, 0.3],
+                                rc.model_name_date_name: "model_name_date"})
+
+        self.assertEqual(registry.load_many(records, batch_size=2), 3)
+
+        # tuples in the order of the columns, the existing rows are skipped
+        tuples = [("000000", "000000", "000000", '2', datetime(year=2023, month=5, day=1), 0.9, "model_name_date"),
+                  ("000000", "000000", "000000", '3', datetime(year=2023, month=5, day=1), 0.4, "model_name_date")]
+        self.assertEqual(registry.load_many(tuples, on_conflict='skip'), 1)
+
+        with self.assertRaises(sqlalchemy.exc.SQLAlchemyError):
+            registry.load_many(tuples)
+
+        # the existing rows are replaced
+        self.assertEqual(registry.load_many(tuples, batch_size=1, on_conflict='overwrite'), 2)
+
+        result = pd.DataFrame(self.engine.execute(registry.get_table().select()).fetchall(), columns=columns)
+        predictions = result.set_index(rc.client_id_name)[rc.prediction_name].sort_index()
+        self.assertEqual(predictions.tolist(), [0.1, 0.2, 0.9, 0.4])
+
+        with self.assertRaises(ValueError):
+            registry.load_many(records, on_conflict='wrong')
+        with self.assertRaises(ValueError):
+            registry.load_many(records.drop(columns=[rc.prediction_name]))
+
+    def test_load_many_concurrent(self):
+        """
+            test rows written by a concurrent load after the read of the existing keys (rejected by the primary key)
+            :return:
+        """
+
+        registry = Registry(self.engine)
+        registry.create_registry_table_index()
+
+        columns = [column.name for column in registry.get_columns_registry()]
+        tuples = [("000000", "000000", "000000", str(i), datetime(year=2023, month=5, day=1), 0.1, "model_name_date")
+                  for i in range(3)]
+        registry.load_many(tuples[:2])
+
+        # the keys read before the concurrent load
+        tuples = [values[:5] + (0.9,) + values[6:] for values in tuples]
+        with patch.object(registry, '_private_get_existing_keys', return_value=set()):
+            self.assertEqual(registry.load_many(tuples, on_conflict='skip'), 1)
+            self.assertEqual(registry.load_many(tuples, on_conflict='overwrite'), 3)
+            with self.assertRaises(sqlalchemy.exc.SQLAlchemyError):
+                registry.load_many(tuples)
+
+        result = pd.DataFrame(self.engine.execute(registry.get_table().select()).fetchall(), columns=columns)
+        self.assertEqual(result.shape[0], 3)
+        self.assertEqual(result[rc.prediction_name].tolist(), [0.9, 0.9, 0.9])
+
+    def test_table_reflection_cache(self):
+        """
+            test the table is reflected once and reflected again only when invalidated or expired
+            :return:
+        """
+
+        registry = Registry(self.engine)
+        registry.create_registry_table_index()
+
+        for i in range(3):
+            registry.load_on_registry(system_id="000000", control_code="000000", intermediary_code="000000",
+                                      client_id=str(i), prediction=0.5, model_name_date="model_name_date")
+        registry.get_client_id_to_not_process(system_id="000000", control_code="000000", intermediary_code="000000",
+                                              start_date='2023-01-01', end_date='2023-05-02')
+        self.assertEqual(registry.get_reflection_count(), 1)
+
+        # invalidated by delete and create
+        registry.delete_registry()
+        self.assertIsNone(registry.get_table())
+        registry.create_registry_table_index()
+        self.assertIsNotNone(registry.get_table())
+        self.assertEqual(registry.get_reflection_count(), 3)
+
+        # expired
+        registry = Registry(self.engine, table_ttl=0)
+        registry.get_table()
+        registry.get_table()
+        self.assertEqual(registry.get_reflection_count(), 2)
+
+    def test_last_prediction_server_side(self):
+        """
+            test the latest prediction selected on the db is the same of the selection in pandas
+            :return:
+        """
+
+        registry = Registry(self.engine)
+        registry.create_registry_table_index()
+
+        records = []
+        for client_id in ['0', '1', '2']:
+            for model_name_date, days in [('20230101', [1, 15, 28]), ('20230601', [2, 10, 27])]:
+                for day in days:
+                    records.append(("000000", "000000", "000000", client_id, datetime(year=2023, month=6, day=day),
+                                    (int(client_id) * 100 + day) / 1000, model_name_date))
+        records.append(("000000", "000000", "000001", '0', datetime(year=2023, month=7, day=1), 0.99, '20230601'))
+        registry.load_many(records)
+
+        expected = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                                intermediary_code="000000", server_side=False)
+        result = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                              intermediary_code="000000", server_side=True)
+
+        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(result.shape[0], 6)
+        self.assertEqual(result[rc.prediction_name].tolist(), [0.027, 0.028, 0.127, 0.128, 0.227, 0.228])
+
     def test_exceptions(self):
         """
             test exceptions to the registry class
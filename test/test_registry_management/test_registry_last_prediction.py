@@ -9,7 +9,9 @@
 """
 
 import unittest
+import sqlalchemy
 import pandas as pd
+from sqlalchemy import inspect
 from sqlalchemy.orm import declarative_base
 from datetime import datetime
 from kassandra.config_module import registry_config as rc
@@ -78,4 +80,71 @@ class TestRegistry(unittest.TestCase):
                                                            control_code=control_code,
                                                            intermediary_code=intermediary_code)
 
-        pd.testing.assert_frame_equal(expected_result, last_predictions_df)
\ No newline at end of file
+        pd.testing.assert_frame_equal(expected_result, last_predictions_df)
+
+    def test_incremental_load(self):
+        """
+            test only the new predictions are written (primary key and rows of the other banks kept)
+            :return:
+        """
+
+        registry = RegistryLastPrediction(self.engine)
+        registry.create_registry_table_index()
+
+        for intermediary_code in ["000000", "000001"]:
+            registry.load(system_id="000000", control_code="000000", intermediary_code=intermediary_code,
+                          current_date=datetime(year=2022, month=7, day=11),
+                          prediction=pd.DataFrame({rc.prediction_name.lower(): [0.5, 0.6]}, index=['0', '1']),
+                          model_name_date="model_name_date")
+
+        self.assertTrue(registry.load(system_id="000000", control_code="000000", intermediary_code="000000",
+                                      prediction=pd.DataFrame({rc.prediction_name.lower(): [0.2, 0.3]},
+                                                              index=['1', '2']),
+                                      model_name_date="model_name_date"))
+
+        primary_key = inspect(self.engine).get_pk_constraint(registry.get_table_name())['constrained_columns']
+        self.assertEqual(len(primary_key), 5)
+
+        last_predictions_df = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                                           intermediary_code="000000")
+        self.assertEqual(last_predictions_df[rc.prediction_name].tolist(), [0.5, 0.2, 0.3])
+
+        last_predictions_df = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                                           intermediary_code="000001")
+        self.assertEqual(last_predictions_df[rc.prediction_name].tolist(), [0.5, 0.6])
+
+    def test_load_legacy_table(self):
+        """
+            test a table written by to_sql (LOB keys, no primary key) is recreated with the registry columns
+            :return:
+        """
+
+        registry = RegistryLastPrediction(self.engine)
+        legacy = pd.DataFrame({rc.id_system_name: "000000", rc.control_code_name: "000000",
+                               rc.intermediary_code_name: ["000000", "000000", "000001"],
+                               rc.client_id_name: ['0', '1', '0'],
+                               rc.report_date_name: datetime(year=2022, month=7, day=11),
+                               rc.prediction_name: [0.5, 0.6, 0.7],
+                               rc.model_name_date_name: "model_name_date"})
+        legacy.to_sql(registry.get_table_name(), self.engine, if_exists='replace', index=False)
+
+        with self.assertRaises(sqlalchemy.exc.SQLAlchemyError):
+            registry.load_many(legacy, on_conflict='overwrite')
+
+        for predictions in [[0.2, 0.3], [0.1, 0.4]]:
+            self.assertTrue(registry.load(system_id="000000", control_code="000000", intermediary_code="000000",
+                                          prediction=pd.DataFrame({rc.prediction_name.lower(): predictions},
+                                                                  index=['1', '2']),
+                                          model_name_date="model_name_date"))
+
+        columns = inspect(self.engine).get_columns(registry.get_table_name())
+        self.assertFalse(any(isinstance(column['type'], sqlalchemy.Text) for column in columns))
+        primary_key = inspect(self.engine).get_pk_constraint(registry.get_table_name())['constrained_columns']
+        self.assertEqual(len(primary_key), 5)
+
+        last_predictions_df = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                                           intermediary_code="000000")
+        self.assertEqual(last_predictions_df[rc.prediction_name].tolist(), [0.5, 0.1, 0.4])
+        last_predictions_df = registry.get_last_prediction(system_id="000000", control_code="000000",
+                                                           intermediary_code="000001")
+        self.assertEqual(last_predictions_df[rc.prediction_name].tolist(), [0.7])
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test the import time of the entry points (heavy packages loaded only when their stage runs)
+@TODO:
+"""
+
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+root_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# seconds to import an entry point in a new interpreter
+import_time_budget = 2.0
+heavy_modules = ['shap', 'sklearn', 'xgboost', 'numba', 'cx_Oracle', 'paramiko', 'sshtunnel', 'ml_anomaly_gate',
+                 'joblib', 'monitoring', 'requests']
+
+import_script = """
+import sys, time, json, logging
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'modules': [name for name in {heavy_modules} if name in sys.modules],
+                  'handlers': len(logging.getLogger().handlers)}}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+    @staticmethod
+    def _import(module: str) -> dict:
+        """
+            import the module in a new interpreter
+            :param module: module to import
+            :return: seconds, heavy modules loaded and number of logging handlers
+        """
+
+        env = dict(os.environ, TEST_ENV='1', PYTHONPATH=os.pathsep.join([root_path, os.environ.get('PYTHONPATH', '')]))
+        script = import_script.format(module=module, heavy_modules=heavy_modules)
+        output = subprocess.run([sys.executable, '-c', script], cwd=root_path, env=env, capture_output=True, text=True,
+                                check=True)
+        return json.loads(output.stdout.strip().splitlines()[-1])
+
+    def test_entry_points_import(self):
+        for module in ['kassandra.starter.subject_prioritization_oneshot',
+                       'kassandra.starter.subject_prioritization_batch',
+                       'monitoring_kassandra.monitoring_service']:
+            with self.subTest(module=module):
+                result = self._import(module)
+
+                # assert
+                self.assertEqual(result['modules'], [])
+                self.assertEqual(result['handlers'], 0)
+                self.assertLess(result['seconds'], import_time_budget)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""
+@Author: Miro
+@Date: 18/10/2026
+@Version: 1.0
+@Objective: test subject prioritization batch starter
+@TODO:
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from unittest.mock import patch, MagicMock
+from kassandra.starter import subject_prioritization_batch as batch
+
+
+class TestSubjectPrioritizationBatch(unittest.TestCase):
+    def setUp(self):
+        batch._worker_state.clear()
+
+    def tearDown(self):
+        batch._worker_state.clear()
+
+    def test_read_intermediary_codes(self):
+        self.assertEqual(batch.read_intermediary_codes('123456, 654321,123456'), ['123456', '654321'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'intermediaries.txt')
+            with open(path, 'w') as file:
+                file.write('# banks\n123456\n\n654321\n')
+            self.assertEqual(batch.read_intermediary_codes(path), ['123456', '654321'])
+
+        with self.assertRaises(ValueError):
+            batch.read_intermediary_codes(' , ')
+
+    @patch('kassandra.starter.subject_prioritization_batch.setup_logging')
+    @patch('kassandra.starter.database_manager.DatabaseManager', MagicMock())
+    @patch('kassandra.starter.subject_prioritization_batch.get_shared_artefacts')
+    @patch('kassandra.starter.subject_prioritization_batch._execute')
+    def test_run_batch(self, mock_execute, mock_get_shared_artefacts, mock_setup_logging):
+        mock_get_shared_artefacts.return_value = {'model': 'model'}
+
+        def execute(dbm, intermediary_code, ref_month, artefacts):
+            if intermediary_code == '2': exit(0)
+            if intermediary_code == '3': raise ValueError('error')
+
+        mock_execute.side_effect = execute
+        summary = batch.run_batch(['1', '2', '3'], '062023')
+
+        # the logging of the worker is configured and the shared artefacts are loaded once
+        mock_setup_logging.assert_called_once()
+        mock_get_shared_artefacts.assert_called_once()
+        self.assertEqual(mock_execute.call_args_list[0].args[3], {'model': 'model'})
+        self.assertEqual(summary.columns.tolist(), batch.summary_columns)
+        self.assertEqual(summary['STATUS'].tolist(), [batch.status_ok, batch.status_empty, batch.status_error])
+        self.assertEqual(summary['ERROR'].tolist(), ['', '', 'error'])
+        self.assertTrue((summary['SECONDS'] >= 0).all())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = batch.save_summary(summary, '062023', directory)
+            self.assertEqual(pd.read_csv(path, dtype=str)['INTERMEDIARY_CODE'].tolist(), ['1', '2', '3'])
+
+    @patch('kassandra.starter.database_manager.DatabaseManager', MagicMock())
+    @patch('kassandra.starter.subject_prioritization_batch.get_shared_artefacts')
+    @patch('kassandra.starter.subject_prioritization_batch._execute')
+    def test_run_batch_artefacts_error(self, mock_execute, mock_get_shared_artefacts):
+        mock_get_shared_artefacts.side_effect = FileNotFoundError('model not found')
+        summary = batch.run_batch(['1', '2'], '062023')
+
+        mock_execute.assert_not_called()
+        self.assertEqual(summary['STATUS'].tolist(), [batch.status_error] * 2)
+        self.assertEqual(summary['ERROR'].tolist(), ['model not found'] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()